@@ -1,5 +1,128 @@
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, exc, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.schema import CreateColumn
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Union
+from app.services import metrics
 import os
+import threading
+import time
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+# Connection pool, tunable per deployment
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", "true")
+
+# SQLite: how long a writer waits on a locked database before failing
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+class PoolStats:
+    """Checkout wait times of one pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+
+# Stats per engine name, kept across pool re-creation (dispose/recycle)
+pool_stats: Dict[str, PoolStats] = {}
+
+
+class _WaitTimingMixin:
+    """Times how long a checkout waits for a free connection"""
+    stats_name = "primary"
+
+    def _do_get(self):
+        stats = pool_stats.setdefault(self.stats_name, PoolStats())
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        stats.record(time.perf_counter() - start)
+        return connection
+
+
+def _instrumented_pool(base, name: str):
+    return type(f"Instrumented{base.__name__}", (_WaitTimingMixin, base), {"stats_name": name})
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the writer; busy_timeout waits instead of 'database is locked'"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA cache_size=-20000")  # ~20MB page cache
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def _pool_options(url: str, base, name: str) -> dict:
+    options = {
+        "poolclass": _instrumented_pool(base, name),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+    return options
+
+
+def _make_engine(url: str, name: str = "primary") -> Engine:
+    new_engine = create_engine(url, echo=False, **_pool_options(url, QueuePool, name))
+    if url.startswith("sqlite"):
+        event.listen(new_engine, "connect", _set_sqlite_pragmas)
+    metrics.instrument_engine(new_engine, name)
+    return new_engine
+
+
+def _make_async_engine(url: str, name: str = "primary_async"):
+    url = _async_url(url)
+    new_engine = create_async_engine(url, echo=False, **_pool_options(url, AsyncAdaptedQueuePool, name))
+    if url.startswith("sqlite"):
+        event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    metrics.instrument_engine(new_engine.sync_engine, name)
+    return new_engine
+
+
+def _async_url(url: str) -> str:
+    """Same database, async driver"""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
 
 # Use PostgreSQL in production, SQLite in development
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -9,20 +132,186 @@ if DATABASE_URL:
     # Render provides postgres:// but SQLAlchemy needs postgresql://
     if DATABASE_URL.startswith("postgres://"):
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-    engine = create_engine(DATABASE_URL, echo=False)
+    engine = _make_engine(DATABASE_URL)
 else:
     # Development - SQLite
     sqlite_file_name = "database.db"
     sqlite_url = f"sqlite:///{sqlite_file_name}"
-    engine = create_engine(sqlite_url, echo=False)
+    DATABASE_URL = sqlite_url
+    engine = _make_engine(sqlite_url)
+
+# Async access (DB_ASYNC=1): asyncpg for PostgreSQL, aiosqlite for the dev file.
+# The sync engine is still used at startup (create tables, indexes, caches).
+DB_ASYNC = _env_bool("DB_ASYNC", "false")
+
+async_engine = _make_async_engine(DATABASE_URL) if DB_ASYNC else None
+
+# Optional read replica for GET routes; writes always go to the primary
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+if DATABASE_REPLICA_URL and DATABASE_REPLICA_URL.startswith("postgres://"):
+    DATABASE_REPLICA_URL = DATABASE_REPLICA_URL.replace("postgres://", "postgresql://", 1)
+
+replica_engine = _make_engine(DATABASE_REPLICA_URL, "replica") if DATABASE_REPLICA_URL else engine
+async_replica_engine = (
+    _make_async_engine(DATABASE_REPLICA_URL, "replica_async")
+    if DATABASE_REPLICA_URL and DB_ASYNC else async_engine
+)
+
+# Read-your-writes: after a write, the client reads from the primary
+# for this many seconds (tracked with a cookie, so it works across workers)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+
+
+def get_pool_status() -> dict:
+    """Live pool numbers for the diagnostics endpoint"""
+    engines = {"primary": engine}
+    if async_engine is not None:
+        engines["primary_async"] = async_engine.sync_engine
+    if replica_engine is not engine:
+        engines["replica"] = replica_engine
+    if async_replica_engine is not async_engine:
+        engines["replica_async"] = async_replica_engine.sync_engine
+
+    status = {}
+    for name, current_engine in engines.items():
+        pool = current_engine.pool
+        stats = pool_stats.get(name, PoolStats())
+        status[name] = {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "avg_wait_ms": round(stats.total_wait / max(stats.checkouts + stats.timeouts, 1) * 1000, 3),
+            "max_wait_ms": round(stats.max_wait * 1000, 3),
+        }
+    return status
+
+
+def _add_missing_columns():
+    """create_all never alters existing tables: add columns declared since"""
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                # New NOT NULL columns need a server_default for the existing rows
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}"))
+                print(f"🛠️ Added column {table.name}.{column.name}")
 
 
 def create_db_and_tables():
     """Create all database tables"""
+    _add_missing_columns()
     SQLModel.metadata.create_all(engine)
+    
+    # create_all skips indexes on tables that already exist,
+    # so make sure newly declared indexes get created too
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
 
 
 def get_session():
     """Dependency to get database session"""
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def get_async_session():
+    """Dependency to get an async database session"""
+    async with AsyncSession(async_engine) as session:
+        yield session
+
+
+class ReadOnlySession(Session):
+    """Session bound to the replica: refuses to flush"""
+
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def _refuse_flush(session, flush_context, instances):
+    raise RuntimeError("Read-only session: writes must use the primary")
+
+
+def _read_from_primary(request: Request) -> bool:
+    """True while the client is inside its read-your-writes window"""
+    try:
+        return float(request.cookies.get(PRIMARY_STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def mark_client_wrote(response: Response):
+    """Pin the client's reads to the primary for a short while"""
+    until = time.time() + READ_YOUR_WRITES_SECONDS
+    response.set_cookie(
+        PRIMARY_STICKY_COOKIE,
+        f"{until:.3f}",
+        max_age=max(1, int(READ_YOUR_WRITES_SECONDS + 0.999)),
+        httponly=True,
+        samesite="lax"
+    )
+
+
+def read_source(request: Request) -> str:
+    """Which database this request's reads go to: primary or replica"""
+    if replica_engine is engine or _read_from_primary(request):
+        return "primary"
+    return "replica"
+
+
+def get_read_engine(request: Request) -> Engine:
+    """Engine for reads that manage their own connection (e.g. streamed exports)"""
+    if _read_from_primary(request):
+        return engine
+    return replica_engine
+
+
+def get_read_session(request: Request):
+    """Dependency for GET routes: replica session, unless the client just wrote"""
+    if replica_engine is engine or _read_from_primary(request):
+        with Session(engine) as session:
+            yield session
+    else:
+        with ReadOnlySession(replica_engine) as session:
+            yield session
+
+
+async def get_async_read_session(request: Request):
+    """Async flavour of get_read_session"""
+    if async_replica_engine is async_engine or _read_from_primary(request):
+        async with AsyncSession(async_engine) as session:
+            yield session
+    else:
+        async with AsyncSession(async_replica_engine, sync_session_class=ReadOnlySession) as session:
+            yield session
+
+
+# Session flavours used by the routers, selected with DB_ASYNC
+get_db_session = get_async_session if DB_ASYNC else get_session
+get_db_read_session = get_async_read_session if DB_ASYNC else get_read_session
+
+DbSession = Union[Session, AsyncSession]
+
+
+async def run_db(session: DbSession, fn, *args, **kwargs):
+    """
+    Run a sync service function with either session flavour without
+    blocking the event loop: AsyncSession.run_sync drives it through the
+    async driver, a plain Session runs it in the threadpool.
+    With an AsyncSession fn itself runs on the event loop thread: it must
+    only do database work (uploads and HTTP calls go through
+    asyncio.to_thread before or after it).
+    """
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, session, *args, **kwargs)
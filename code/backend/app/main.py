@@ -1,10 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
-from app.database import create_db_and_tables
+from app.database import create_db_and_tables, engine, mark_client_wrote
+from sqlmodel import Session
+from app.models.post_model import Post
 from app.routers import post_router, category_router  # Add category_router
+from app.routers import diagnostics_router, image_router
 from app.routers import post_router
-import cloudinary
+from app.services import search_service, suggest_index, version_service, category_registry, image_jobs, storage
+from app.services import image_processing, cloudinary_client, metrics
 import json
+import math
+import time
 from pathlib import Path
 import os
 
@@ -43,28 +50,48 @@ def load_secrets():
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     try:
-        secrets = load_secrets()
-        
-        # Validate secrets
-        required_keys = ["cloudinary_cloud_name", "cloudinary_api_key", "cloudinary_api_secret"]
-        missing_keys = [key for key in required_keys if not secrets.get(key)]
-        
-        if missing_keys:
-            raise ValueError(f"Missing required secrets: {', '.join(missing_keys)}")
-        
-        # Configure Cloudinary
-        cloudinary.config(
-            cloud_name=secrets["cloudinary_cloud_name"],
-            api_key=secrets["cloudinary_api_key"],
-            api_secret=secrets["cloudinary_api_secret"],
-            secure=True
-        )
+        # Cloudinary secrets are only needed when images go to Cloudinary
+        if isinstance(storage.backend, storage.CloudinaryStorage):
+            secrets = load_secrets()
+            
+            # Validate secrets
+            required_keys = ["cloudinary_cloud_name", "cloudinary_api_key", "cloudinary_api_secret"]
+            missing_keys = [key for key in required_keys if not secrets.get(key)]
+            
+            if missing_keys:
+                raise ValueError(f"Missing required secrets: {', '.join(missing_keys)}")
+            
+            # Configure Cloudinary
+            storage.backend.configure(
+                cloud_name=secrets["cloudinary_cloud_name"],
+                api_key=secrets["cloudinary_api_key"],
+                api_secret=secrets["cloudinary_api_secret"]
+            )
+        storage.backend.setup()
+        print(f"🖼️ Image storage: {storage.backend.name}")
         
         # Create database tables
         create_db_and_tables()
+        search_service.setup_search_index(engine)
+        
+        with Session(engine) as session:
+            # Load the category registry
+            version_service.ensure_version(session, category_registry.TABLE)
+            version_service.ensure_version(session, Post.__tablename__)
+            category_registry.categories.load(session)
+            
+            # Build the in-memory autocomplete index
+            suggest_index.build_post_name_index(session)
+        print(f"🔎 Indexed {len(suggest_index.post_names)} post names for suggestions")
+        
+        # Background image uploads
+        image_jobs.start_workers()
         
         yield
         
+        await image_jobs.stop_workers()
+        image_processing.shutdown()
+        
     except Exception as e:
         print(f"Startup error: {e}")
         raise
@@ -82,6 +109,80 @@ app = FastAPI(
 # Register routers
 app.include_router(post_router.router)
 app.include_router(category_router.router)  # Add this
+app.include_router(diagnostics_router.router)
+if isinstance(storage.backend, storage.LocalStorage):
+    app.include_router(image_router.router)
+
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """Successful writes pin the client's next reads to the primary database"""
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        mark_client_wrote(response)
+    return response
+
+
+def _route_path(scope) -> str:
+    # Route template, not the raw path, to keep the label set small
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+class CollectMetrics:
+    """
+    Latency, size, SQL queries and Cloudinary time per route (see /metrics).
+    Plain ASGI rather than @app.middleware: the request is recorded when the
+    app returns, after the last byte or when sending is aborted (client gone,
+    task cancelled), so the in-flight gauge always comes back down.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        # Unhandled error before the response started: the server will answer 500
+        status = 500
+        size = 0
+        
+        async def measured_send(message):
+            # Streamed responses (exports) are measured until their last byte
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+        
+        metrics.requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, measured_send)
+        finally:
+            metrics.current_request.reset(token)
+            metrics.requests_in_flight.dec()
+            metrics.observe_request(
+                scope["method"], _route_path(scope), status, time.perf_counter() - start, size, stats
+            )
+
+
+app.add_middleware(CollectMetrics)
+
+
+@app.exception_handler(cloudinary_client.CircuitOpenError)
+async def image_storage_unavailable(request: Request, exc: cloudinary_client.CircuitOpenError):
+    """Cloudinary circuit is open: fail fast instead of waiting on timeouts"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(cloudinary_client.CLOUDINARY_BREAKER_RESET))}
+    )
 
 
 @app.get("/")
@@ -90,6 +191,12 @@ def root():
     return {"message": "Posts API", "version": "1.0.0"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
@@ -98,12 +205,11 @@ def health_check():
 
 @app.get("/test-upload")
 def test_upload():
-    """Test Cloudinary upload"""
+    """Test an upload to the image storage"""
     try:
-        result = cloudinary.uploader.upload(
+        result = storage.backend.upload(
             "https://res.cloudinary.com/demo/image/upload/getting-started/shoes.jpg",
-            public_id="test_upload",
-            folder="tests"
+            public_id="test_upload"
         )
         return {"status": "success", "url": result["secure_url"]}
     except Exception as e:
@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+from typing import Optional
+
+
+class ImageAsset(SQLModel, table=True):
+    """An image already in the image storage, addressed by its content (see services/image_assets.py)"""
+    __tablename__ = "image_asset"
+
+    asset_id: Optional[int] = Field(default=None, primary_key=True)
+    # "sha256:<hex of the bytes>" or "url:<normalized source URL>"
+    content_key: str = Field(unique=True)
+    secure_url: str = Field(index=True)
+    public_id: str
+    size: Optional[int] = Field(default=None)
+    # Bytes received, when the stored copy was re-encoded smaller
+    original_size: Optional[int] = Field(default=None)
+    # Posts currently using secure_url; 0 means nothing points at it anymore
+    ref_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.now)
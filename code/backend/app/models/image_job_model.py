@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field, Column, JSON, Index
+from typing import List, Optional
+
+
+class ImageJob(SQLModel, table=True):
+    """Background image upload for a post (see services/image_jobs.py)"""
+    __tablename__ = "image_job"
+    __table_args__ = (
+        # Queue polling: next runnable job
+        Index("ix_image_job_status_run_after", "status", "run_after"),
+    )
+
+    job_id: Optional[int] = Field(default=None, primary_key=True)
+    post_id: int = Field(index=True)
+    # Staged files: [{"path", "filename", "content_type", "size", "sha256"}]
+    files: List[dict] = Field(sa_column=Column(JSON))
+    status: str = Field(default="queued")  # queued | running | done | failed
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = Field(default=None)
+    run_after: datetime = Field(default_factory=datetime.now)
+    locked_until: Optional[datetime] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.now)
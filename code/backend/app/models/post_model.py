@@ -1,12 +1,29 @@
 from datetime import datetime
-from sqlmodel import SQLModel, Field, Column, JSON, Relationship
+from enum import Enum
+from sqlmodel import SQLModel, Field, Column, JSON, Relationship, Index
 from typing import List, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from app.models.category_model import Category
 
 
+class PostStatus(str, Enum):
+    """Where a post's images are: background processing, done, or given up on"""
+    processing = "processing"
+    ready = "ready"
+    failed = "failed"
+
+
 class Post(SQLModel, table=True):
+    __table_args__ = (
+        # Keyset pagination / sort: ORDER BY <created_at|price>, post_id
+        # The category_id-leading ones also cover the foreign key lookups
+        Index("ix_post_created_at_post_id", "created_at", "post_id"),
+        Index("ix_post_price_post_id", "price", "post_id"),
+        Index("ix_post_category_id_created_at_post_id", "category_id", "created_at", "post_id"),
+        Index("ix_post_category_id_price_post_id", "category_id", "price", "post_id"),
+    )
+
     post_id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True)
     content: str
@@ -14,6 +31,9 @@ class Post(SQLModel, table=True):
     updated_at: Optional[datetime] = Field(default=None, nullable=True)
     images: List[str] = Field(sa_column=Column(JSON))
     price: float
+    status: str = Field(default=PostStatus.ready.value, sa_column_kwargs={"server_default": PostStatus.ready.value})
+    # Bumped on every save; clients send it back in If-Match to edit safely
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
     
     # Foreign Key to Category
     category_id: Optional[int] = Field(default=None, foreign_key="category.category_id")
@@ -0,0 +1,9 @@
+from sqlmodel import SQLModel, Field
+
+
+class TableVersion(SQLModel, table=True):
+    """Change counter per table, bumped in the same transaction as each write"""
+    __tablename__ = "table_version"
+
+    name: str = Field(primary_key=True)
+    version: int = Field(default=0)
@@ -1,53 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
 from sqlmodel import Session
-from app.database import get_session
-from app.services import category_service
+from app.database import get_db_session, get_db_read_session, run_db, DbSession
+from app.services import category_service, response_cache, fast_json
 from app.schemas.category_schema import CategoryRead, CategoryCreate
 from app.models.category_model import Category
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
+FieldsQuery = Query(None, description="Comma-separated fields to return (e.g. category_id,name)")
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[tuple]:
+    """Sparse fieldset from ?fields= (None = every field); unknown names → 400"""
+    try:
+        return fast_json.parse_fields(fields, CategoryRead)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
 @router.get("/", response_model=List[CategoryRead])
-def get_all_categories(session: Session = Depends(get_session)):
+async def get_all_categories(
+    request: Request,
+    fields: Optional[str] = FieldsQuery,
+    session: DbSession = Depends(get_db_read_session)
+):
     """Get all categories"""
-    return category_service.get_categories(session)
+    selected = _parse_fields(fields)
+    
+    def build(session: Session):
+        categories = category_service.get_categories(session)
+        if not selected:
+            return categories
+        # Categories come from the in-memory registry: only the payload shrinks
+        adapter = TypeAdapter(List[fast_json.sparse_model(CategoryRead, selected)])
+        return adapter.dump_json(adapter.validate_python(categories, from_attributes=True))
+    
+    return await run_db(
+        session,
+        response_cache.cached_json_response,
+        request,
+        (Category.__tablename__,),
+        List[CategoryRead],
+        build
+    )
 
 
 @router.get("/{category_id}", response_model=CategoryRead)
-def get_single_category(category_id: int, session: Session = Depends(get_session)):
+async def get_single_category(
+    category_id: int,
+    fields: Optional[str] = FieldsQuery,
+    session: DbSession = Depends(get_db_read_session)
+):
     """Get a single category by ID"""
-    category = category_service.get_category(session, category_id)
+    selected = _parse_fields(fields)
+    category = await run_db(session, category_service.get_category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
+    if selected:
+        model = fast_json.sparse_model(CategoryRead, selected)
+        return Response(content=model.model_validate(category).model_dump_json(), media_type="application/json")
     return category
 
 
 @router.post("/", response_model=CategoryRead, status_code=201)
-def create_new_category(
+async def create_new_category(
     category_data: CategoryCreate,
-    session: Session = Depends(get_session)
+    session: DbSession = Depends(get_db_session)
 ):
     """Create a new category"""
     try:
         new_category = Category(**category_data.model_dump())
-        return category_service.create_category(session, new_category)
+        return await run_db(session, category_service.create_category, new_category)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.put("/{category_id}", response_model=CategoryRead)
-def update_existing_category(
+async def update_existing_category(
     category_id: int,
     category_data: CategoryCreate,
-    session: Session = Depends(get_session)
+    session: DbSession = Depends(get_db_session)
 ):
     """Update a category"""
     try:
-        category = category_service.update_category(
-            session, 
-            category_id, 
+        category = await run_db(
+            session,
+            category_service.update_category,
+            category_id,
             category_data.model_dump()
         )
         
@@ -70,15 +111,15 @@ def update_existing_category(
 
 
 @router.delete("/{category_id}", status_code=204)
-def delete_existing_category(
+async def delete_existing_category(
     category_id: int,
-    session: Session = Depends(get_session)
+    session: DbSession = Depends(get_db_session)
 ):
     """Delete a category"""
     try:
-        result = category_service.delete_category(session, category_id)
+        result = await run_db(session, category_service.delete_category, category_id)
         if not result:
             raise HTTPException(status_code=404, detail="Category not found")
         return None
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
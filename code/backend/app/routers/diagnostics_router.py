@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+from app.database import get_pool_status
+from app.services import image_processing, cloudinary_client, single_flight
+
+router = APIRouter(prefix="/diagnostics", tags=["diagnostics"])
+
+
+@router.get("/pool")
+def get_pool_diagnostics():
+    """Connection pool usage: checked out, overflow, checkout wait times"""
+    return get_pool_status()
+
+
+
+@router.get("/images")
+def get_image_diagnostics():
+    """Pre-upload optimization: images re-encoded and bytes before/after"""
+    return image_processing.stats.as_dict()
+
+
+@router.get("/cloudinary")
+def get_cloudinary_diagnostics():
+    """Cloudinary client: circuit breaker state, in-flight calls, retries"""
+    return cloudinary_client.client.status()
+
+
+@router.get("/coalescing")
+def get_coalescing_diagnostics():
+    """Single-flight post reads: calls, how many shared another's fetch"""
+    return single_flight.post_reads.stats()
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from app.services import storage
+
+router = APIRouter(prefix="/images", tags=["images"])
+
+# Content-addressed: a URL always means the same bytes
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# SVG can carry scripts: fine inside <img>, never rendered as a page of our origin
+SVG_HEADERS = {
+    "Content-Security-Policy": "default-src 'none'; sandbox",
+    "Content-Disposition": "attachment",
+}
+
+
+@router.get("/{public_id}")
+def get_image(public_id: str, request: Request):
+    """Serve an image from the local store (sendfile when the server supports it, Range requests)"""
+    path = storage.backend.path_for(public_id)
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    etag = f'"{public_id.split(".")[0]}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE, "X-Content-Type-Options": "nosniff"}
+    if public_id.endswith(".svg"):
+        headers.update(SVG_HEADERS)
+    if etag in [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    return FileResponse(
+        path,
+        media_type=storage.MEDIA_TYPES[public_id.rsplit(".", 1)[1]],
+        headers=headers
+    )
@@ -1,50 +1,231 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
-from app.database import get_session
-from app.services import post_service
-from app.schemas.post_schema import PostRead, PostCreate
+from app.database import get_db_session, get_db_read_session, get_read_engine, get_read_session, read_source, run_db, DbSession
+from app.services import post_service, category_service, bulk_import_service, export_service, image_jobs
+from app.schemas.post_schema import (
+    PostRead, PostCreate, PostPage, PostSuggestion, PostReadWithCategory, PostReadExpandable,
+    BulkImportReport, PostStatusRead, PostUpdate
+)
+from app.services import suggest_index, response_cache, fast_json, single_flight
+from app.services.pagination import PostSort
+from app.services.cloudinary_client import CircuitOpenError
 from app.models.post_model import Post
-from typing import List, Optional
+from app.models.category_model import Category
+from datetime import datetime
+from typing import List, Literal, Optional
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
+ExpandQuery = Query(None, description="'category' embeds each post's category (loaded in one query)")
+IfMatchHeader = Header(None, description="ETag (or version) of the post the edit is based on; 412 if it changed since")
+FieldsQuery = Query(None, description="Comma-separated fields to return (e.g. post_id,name,price,images); only those columns are read")
 
-@router.get("/", response_model=List[PostRead])
-def get_all_posts(session: Session = Depends(get_session)):
-    return post_service.get_posts(session)
 
+def _serialize_posts(posts: List[Post], expand: Optional[str]) -> list:
+    """Build the response rows; categories are only read when they were eager-loaded"""
+    schema = PostReadWithCategory if expand == "category" else PostRead
+    return [schema.model_validate(post) for post in posts]
 
-@router.get("/search/", response_model=List[PostRead])
-def search_posts(
+
+def _parse_fields(fields: Optional[str]) -> Optional[tuple]:
+    """Sparse fieldset from ?fields= (None = every field); unknown names → 400"""
+    try:
+        return fast_json.parse_fields(fields, PostRead)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _page_json(page, expand: Optional[str], fields: Optional[tuple] = None) -> bytes:
+    """Encode a page of column rows (as_rows=True) without building models"""
+    return fast_json.dumps({
+        "items": fast_json.post_dicts(page.items, expand == "category", fields),
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor
+    })
+
+
+def _cache_tables(expand: Optional[str]) -> tuple:
+    """Tables a post response is built from (for cache versioning)"""
+    if expand == "category":
+        return (Post.__tablename__, Category.__tablename__)
+    return (Post.__tablename__,)
+
+
+@router.get("/", response_model=PostPage)
+async def get_all_posts(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor/prev_cursor from a previous page"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    category_id: Optional[int] = Query(None),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    sort: PostSort = Query(PostSort.created_at_asc),
+    expand: Optional[Literal["category"]] = ExpandQuery,
+    fields: Optional[str] = FieldsQuery,
+    session: DbSession = Depends(get_db_read_session)
+):
+    selected = _parse_fields(fields)
+    
+    def build(session: Session):
+        try:
+            page = post_service.get_posts(
+                session,
+                limit=limit,
+                cursor=cursor,
+                min_price=min_price,
+                max_price=max_price,
+                category_id=category_id,
+                created_after=created_after,
+                created_before=created_before,
+                sort=sort,
+                expand_category=expand == "category",
+                as_rows=True,
+                fields=selected
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return _page_json(page, expand, selected)
+    
+    return await run_db(
+        session, response_cache.cached_json_response, request, _cache_tables(expand), PostPage, build
+    )
+
+
+@router.get("/search/", response_model=List[PostReadExpandable])
+async def search_posts(
     name: str = Query(..., min_length=2, description="Search term (min 2 characters)"),
-    session: Session = Depends(get_session)
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    offset: int = Query(0, ge=0, description="Results to skip"),
+    expand: Optional[Literal["category"]] = ExpandQuery,
+    fields: Optional[str] = FieldsQuery,
+    session: DbSession = Depends(get_db_read_session)
 ):
-    posts = post_service.search_posts_by_name(session, name.strip())
+    selected = _parse_fields(fields)
     
-    if not posts:
+    def search(session: Session):
+        return post_service.search_posts_by_name(
+            session,
+            name.strip(),
+            limit=limit,
+            offset=offset,
+            expand_category=expand == "category",
+            as_rows=True,
+            fields=selected
+        )
+    
+    rows = await run_db(session, search)
+    
+    if not rows:
         raise HTTPException(
             status_code=404,
             detail=f"Not found by name '{name}'"
         )
     
-    return posts
+    return Response(
+        content=fast_json.dumps(fast_json.post_dicts(rows, expand == "category", selected)),
+        media_type="application/json"
+    )
+
+@router.get("/suggest", response_model=List[PostSuggestion])
+def suggest_posts(
+    q: str = Query(..., min_length=1, description="Name prefix"),
+    limit: int = Query(10, ge=1, le=50, description="Max suggestions"),
+    session: Session = Depends(get_read_session)
+):
+    """
+    Autocomplete post names from the in-memory prefix index.
+    Sync on purpose: a rebuild after other workers' writes runs in the threadpool.
+    """
+    suggest_index.refresh_if_stale(session)
+    return suggest_index.post_names.suggest(q, limit)
+
+
+@router.get("/export")
+def export_posts(
+    request: Request,
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    category_id: Optional[int] = Query(None),
+    updated_since: Optional[datetime] = Query(None, description="Posts created or edited since this date"),
+):
+    """Stream every matching post as NDJSON or CSV (flat memory, any table size)"""
+    return StreamingResponse(
+        export_service.export_posts(
+            get_read_engine(request),
+            format=format,
+            category_id=category_id,
+            updated_since=updated_since
+        ),
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="posts.{format}"'}
+    )
+
+
+@router.get("/{post_id}", response_model=PostReadExpandable)
+async def get_single_post(
+    request: Request,
+    post_id: int,
+    expand: Optional[Literal["category"]] = ExpandQuery,
+    fields: Optional[str] = FieldsQuery,
+    session: DbSession = Depends(get_db_read_session)
+):
+    selected = _parse_fields(fields)
+    
+    def build(session: Session):
+        post = post_service.get_post(session, post_id, expand_category=expand == "category", fields=selected)
+        if not post:
+            raise HTTPException(status_code=404, detail="Post not found")
+        if not selected:
+            return response_cache.Versioned(_serialize_posts([post], expand)[0], post.version)
+        
+        # Response model with just the requested fields
+        if expand == "category":
+            model = fast_json.sparse_model(PostReadWithCategory, selected + ("category",))
+        else:
+            model = fast_json.sparse_model(PostRead, selected)
+        body = model.model_validate(fast_json.post_dicts([post], expand == "category", selected)[0]).model_dump_json().encode()
+        return response_cache.Versioned(body, post.version)
+    
+    key = response_cache.request_key(request)
+    
+    async def fetch():
+        return await run_db(session, response_cache.cached_entry, key, _cache_tables(expand), PostReadExpandable, build)
+    
+    # Concurrent identical reads of a hot post share one fetch (and a 404)
+    (entry, status), shared = await single_flight.post_reads.do((post_id, read_source(request), key), fetch)
+    return response_cache.entry_response(request, entry, "COALESCED" if shared else status)
+
 
-@router.get("/{post_id}", response_model=PostRead)
-def get_single_post(post_id: int, session: Session = Depends(get_session)):
-    post = post_service.get_post(session, post_id)
+@router.get("/{post_id}/status", response_model=PostStatusRead)
+async def get_post_status(post_id: int, session: DbSession = Depends(get_db_read_session)):
+    """Poll a post created with ?background=true until it is ready or failed"""
+    post = await run_db(session, post_service.get_post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-    return post
+    
+    job = await image_jobs.queue.latest(post_id)
+    return PostStatusRead(
+        post_id=post.post_id,
+        status=post.status,
+        images=post.images,
+        attempts=job.attempts if job else 0,
+        error=job.last_error if job and post.status != "ready" else None
+    )
 
 
 @router.post("/", response_model=PostRead, status_code=201)
 async def create_post_with_files(
+    response: Response,
     name: str = Form(...),
     content: str = Form(...),
     price: float = Form(...),
     category_id: Optional[int] = Form(None),
     images: List[UploadFile] = File(...),
-    session: Session = Depends(get_session)
+    background: bool = Query(False, description="Return right away (202) and upload the images in the background"),
+    session: DbSession = Depends(get_db_session)
 ):
     """Create a new post with file uploads"""
     try:
@@ -65,12 +246,15 @@ async def create_post_with_files(
             content=content,
             price=price,
             image_files=images,
-            category_id=category_id
+            category_id=category_id,
+            background=background
         )
         
+        if background:
+            response.status_code = 202
         return new_post
         
-    except HTTPException:
+    except (HTTPException, CircuitOpenError):
         raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -79,30 +263,62 @@ async def create_post_with_files(
 
 
 @router.post("/from-urls", response_model=PostRead, status_code=201)
-def create_post_from_urls(
+async def create_post_from_urls(
     post_data: PostCreate,
-    session: Session = Depends(get_session)
+    session: DbSession = Depends(get_db_session)
 ):
     """Create a post with image URLs"""
     try:
         new_post = Post(**post_data.model_dump())
-        return post_service.create_post(session, new_post)
+        return await post_service.create_post(session, new_post)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.put("/{post_id}", response_model=PostRead)
-def update_existing_post(
-    post_id: int,
-    post_data: PostCreate,
-    session: Session = Depends(get_session)
+@router.post("/bulk", response_model=BulkImportReport)
+async def bulk_import_posts(
+    request: Request,
+    resume_from: int = Query(1, ge=1, description="First line to import (last_committed_line + 1 of a previous run)"),
+    batch_size: int = Query(bulk_import_service.BULK_IMPORT_BATCH_SIZE, ge=1, le=1000, description="Rows per transaction"),
+    session: DbSession = Depends(get_db_session)
 ):
-    """Update an existing post"""
+    """
+    Import posts from an NDJSON body (one PostCreate object per line).
+    The body is read as a stream; the report lists the outcome of every line.
+    """
+    return await bulk_import_service.import_posts_ndjson(
+        session,
+        request.stream(),
+        resume_from=resume_from,
+        batch_size=batch_size
+    )
+
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """
+    If-Match carries the post version the edit is based on: the ETag of
+    GET /posts/{post_id} ("\"3-<hash>\""), the bare version ("3") or *
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"').split("-", 1)[0])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match debe ser la versión del post")
+
+
+async def _update(session: DbSession, post_id: int, data: dict, if_match: Optional[str]):
+    expected_version = _parse_if_match(if_match)
     try:
-        post = post_service.update_post(session, post_id, post_data.model_dump())
+        post = await post_service.update_post(session, post_id, data, expected_version=expected_version)
         if not post:
             raise HTTPException(status_code=404, detail="Post no encontrado")
         return post
+    except (HTTPException, CircuitOpenError):
+        raise
+    except post_service.VersionConflict as e:
+        # Someone else saved first: the client should re-read and retry
+        raise HTTPException(status_code=412, detail=str(e))
     except ValueError as e:
         # Category doesn't exist, validation errors → 400
         raise HTTPException(status_code=400, detail=str(e))
@@ -111,33 +327,75 @@ def update_existing_post(
         print(f"❌ Unexpected error in update_post: {str(e)}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
-@router.get("/category/{category_id}", response_model=List[PostRead])
-def get_posts_by_category(
+
+@router.put("/{post_id}", response_model=PostRead)
+async def update_existing_post(
+    post_id: int,
+    post_data: PostCreate,
+    if_match: Optional[str] = IfMatchHeader,
+    session: DbSession = Depends(get_db_session)
+):
+    """Update an existing post"""
+    return await _update(session, post_id, post_data.model_dump(), if_match)
+
+
+@router.patch("/{post_id}", response_model=PostRead)
+async def patch_existing_post(
+    post_id: int,
+    post_data: PostUpdate,
+    if_match: Optional[str] = IfMatchHeader,
+    session: DbSession = Depends(get_db_session)
+):
+    """Change only the fields sent; images already on the post are not processed again"""
+    return await _update(session, post_id, post_data.model_dump(exclude_unset=True), if_match)
+
+@router.get("/category/{category_id}", response_model=PostPage)
+async def get_posts_by_category(
     category_id: int,
-    session: Session = Depends(get_session)
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor/prev_cursor from a previous page"),
+    expand: Optional[Literal["category"]] = ExpandQuery,
+    fields: Optional[str] = FieldsQuery,
+    session: DbSession = Depends(get_db_read_session)
 ):
-    """Get all posts in a specific category"""
-    from app.models.category_model import Category
+    """Get a page of posts in a specific category"""
+    selected = _parse_fields(fields)
     
-    category = session.get(Category, category_id)
-    if not category:
-        raise HTTPException(status_code=404, detail="Categoría no encontrada")
+    def query(session: Session):
+        category = category_service.get_category(session, category_id)
+        if not category:
+            raise HTTPException(status_code=404, detail="Categoría no encontrada")
     
-    if not category.posts:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No hay posts en la categoría '{category.name}'"
-        )
+        try:
+            page = post_service.get_posts_by_category(
+                session,
+                category_id,
+                limit=limit,
+                cursor=cursor,
+                expand_category=expand == "category",
+                as_rows=True,
+                fields=selected
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+        if not page.items and not cursor:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No hay posts en la categoría '{category.name}'"
+            )
+    
+        return _page_json(page, expand, selected)
     
-    return category.posts
+    return Response(content=await run_db(session, query), media_type="application/json")
 
 @router.delete("/{post_id}", status_code=204)
-def delete_existing_post(
+async def delete_existing_post(
     post_id: int,
-    session: Session = Depends(get_session)
+    session: DbSession = Depends(get_db_session)
 ):
     """Delete a post"""
-    result = post_service.delete_post(session, post_id)
+    result = await run_db(session, post_service.delete_post, post_id)
     if not result:
         raise HTTPException(status_code=404, detail="Post not found")
     return None
\ No newline at end of file
@@ -1,6 +1,7 @@
 from datetime import datetime
 from pydantic import BaseModel, field_validator
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
+from app.schemas.category_schema import CategoryRead
 
 
 class PostBase(BaseModel):
@@ -21,10 +22,29 @@ class PostCreate(PostBase):
     pass
 
 
+class PostUpdate(BaseModel):
+    """PATCH body: only the fields sent are changed"""
+    name: Optional[str] = None
+    content: Optional[str] = None
+    images: Optional[List[str]] = None
+    price: Optional[float] = None
+    category_id: Optional[int] = None
+    
+    @field_validator("name", "content", "images", "price")
+    def not_null(cls, v, field):
+        if v is None:
+            raise ValueError(f"{field.field_name} cannot be null")
+        if isinstance(v, str) and not v.strip():
+            raise ValueError(f"{field.field_name} is required")
+        return v
+
+
 class PostRead(PostBase):
     post_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    status: str = "ready"
+    version: int = 1
     
     class Config:
         from_attributes = True
@@ -32,4 +52,48 @@ class PostRead(PostBase):
 
 class PostReadWithCategory(PostRead):
     """Post with category details"""
-    category: Optional[dict] = None  # Will contain {category_id, name, description}
\ No newline at end of file
+    category: Optional[CategoryRead] = None
+
+
+# PostRead first: a post without an embedded category must not
+# come out with "category": null
+PostReadExpandable = Union[PostRead, PostReadWithCategory]
+
+
+class PostPage(BaseModel):
+    """A page of posts with opaque keyset cursors"""
+    items: List[PostReadExpandable]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class PostSuggestion(BaseModel):
+    post_id: int
+    name: str
+
+
+class BulkImportLineResult(BaseModel):
+    line: int
+    status: Literal["created", "error"]
+    post_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkImportReport(BaseModel):
+    """Outcome of an NDJSON import; resume with resume_from=last_committed_line + 1"""
+    created: int
+    failed: int
+    skipped: int
+    last_committed_line: int
+    aborted: bool = False
+    error: Optional[str] = None
+    results: List[BulkImportLineResult]
+
+
+class PostStatusRead(BaseModel):
+    """Progress of a post's background image processing"""
+    post_id: int
+    status: str
+    images: List[str]
+    attempts: int = 0
+    error: Optional[str] = None
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlmodel import Session
+from app.database import DbSession, run_db
+from app.models.post_model import Post
+from app.schemas.post_schema import PostCreate, BulkImportLineResult, BulkImportReport
+from app.services import category_service, post_service
+
+# Rows committed per transaction
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "200"))
+
+# Posts whose images are processed at the same time (the global upload cap still applies)
+BULK_IMPORT_CONCURRENCY = int(os.getenv("BULK_IMPORT_CONCURRENCY", "8"))
+
+# A single line can carry base64 images, but not an unbounded amount
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Split a byte stream into (line number, line) pairs, 1-based, without buffering the body.
+    Only each new chunk is searched for newlines; the pieces of a line are joined once.
+    """
+    pending: List[bytes] = []
+    pending_size = 0
+    line_no = 0
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            size = pending_size + ((end if end != -1 else len(chunk)) - start)
+            if size > MAX_LINE_BYTES:
+                raise ValueError(f"Línea {line_no + 1} supera el tamaño máximo ({MAX_LINE_BYTES // (1024*1024)}MB)")
+            if end == -1:
+                break
+            pending.append(chunk[start:end])
+            line_no += 1
+            yield line_no, b"".join(pending)
+            pending = []
+            pending_size = 0
+            start = end + 1
+        if start < len(chunk):
+            pending.append(chunk[start:])
+            pending_size = size
+    if pending:
+        yield line_no + 1, b"".join(pending)
+
+
+def _parse_line(raw: bytes) -> PostCreate:
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON: {str(e)}")
+    try:
+        post = PostCreate.model_validate(data)
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(loc) for loc in err['loc']) or 'body'}: {err['msg']}" for err in e.errors()
+        ))
+    if len(post.images) > 10:
+        raise ValueError("Max 10 images")
+    return post
+
+
+def _missing_categories(session: Session, category_ids: set) -> set:
+    return {
+        category_id for category_id in category_ids
+        if category_service.get_category(session, category_id) is None
+    }
+
+
+def _insert_batch(session: Session, posts: List[Post]) -> List[int]:
+    try:
+        return post_service.save_posts(session, posts, refresh=False)
+    except Exception:
+        session.rollback()
+        raise
+
+
+async def _process_batch(
+    session: DbSession,
+    batch: List[Tuple[int, PostCreate]],
+    slots: asyncio.Semaphore,
+    report: BulkImportReport
+):
+    """Upload the batch's images concurrently, then insert the survivors in one transaction"""
+    errors: List[BulkImportLineResult] = []
+
+    category_ids = {post.category_id for _, post in batch if post.category_id is not None}
+    missing = await run_db(session, _missing_categories, category_ids) if category_ids else set()
+
+    async def prepare(line_no: int, data: PostCreate) -> Optional[Post]:
+        if data.category_id in missing:
+            errors.append(BulkImportLineResult(
+                line=line_no, status="error", error=f"Categoría con ID {data.category_id} no existe"
+            ))
+            return None
+        images = data.images
+        if images:
+            fresh = []
+            try:
+                async with slots, post_service.get_global_upload_slots():
+                    images = await asyncio.to_thread(
+                        post_service.upload_images_to_cloudinary,
+                        images,
+                        public_prefix=f"post_{datetime.now().timestamp()}",
+                        fresh=fresh
+                    )
+            except Exception as e:
+                # Storage down (CircuitOpenError) included: this line fails, the rest of the batch goes on.
+                # Images of this line uploaded before the failure would be orphans
+                if fresh:
+                    await asyncio.to_thread(post_service.discard_uploads, fresh)
+                errors.append(BulkImportLineResult(line=line_no, status="error", error=str(e)))
+                return None
+        return Post(**data.model_dump(exclude={"images"}), images=images)
+
+    posts = await asyncio.gather(*(prepare(line_no, data) for line_no, data in batch))
+    ready = [(line_no, post) for (line_no, _), post in zip(batch, posts) if post is not None]
+    report.results.extend(errors)
+    report.failed += len(errors)
+
+    if ready:
+        try:
+            post_ids = await run_db(session, _insert_batch, [post for _, post in ready])
+        except Exception as e:
+            print(f"❌ Bulk import batch failed (lines {batch[0][0]}-{batch[-1][0]}): {str(e)}")
+            report.results.extend(
+                BulkImportLineResult(line=line_no, status="error", error=f"Batch insert failed: {str(e)}")
+                for line_no, _ in ready
+            )
+            report.failed += len(ready)
+            raise
+        
+        report.results.extend(
+            BulkImportLineResult(line=line_no, status="created", post_id=post_id)
+            for (line_no, _), post_id in zip(ready, post_ids)
+        )
+        report.created += len(ready)
+    
+    report.last_committed_line = batch[-1][0]
+    batch.clear()
+
+
+async def import_posts_ndjson(
+    session: DbSession,
+    chunks: AsyncIterator[bytes],
+    resume_from: int = 1,
+    batch_size: int = BULK_IMPORT_BATCH_SIZE
+) -> BulkImportReport:
+    """
+    Import posts from an NDJSON stream, one PostCreate object per line.
+    Bad lines are reported and skipped; valid ones are committed in batches.
+    If a batch cannot be committed the import stops there: send the same
+    body again with resume_from=last_committed_line + 1 to continue.
+    """
+    report = BulkImportReport(created=0, failed=0, skipped=0, last_committed_line=resume_from - 1, results=[])
+    slots = asyncio.Semaphore(BULK_IMPORT_CONCURRENCY)
+    batch: List[Tuple[int, PostCreate]] = []
+    last_line = resume_from - 1
+
+    try:
+        async for line_no, raw in iter_ndjson_lines(chunks):
+            last_line = line_no
+            if line_no < resume_from:
+                report.skipped += 1
+                continue
+            if not raw.strip():
+                continue
+
+            try:
+                batch.append((line_no, _parse_line(raw)))
+            except ValueError as e:
+                report.results.append(BulkImportLineResult(line=line_no, status="error", error=str(e)))
+                report.failed += 1
+                continue
+
+            if len(batch) >= batch_size:
+                await _process_batch(session, batch, slots, report)
+
+        if batch:
+            await _process_batch(session, batch, slots, report)
+        report.last_committed_line = max(report.last_committed_line, last_line)
+    except Exception as e:
+        report.aborted = True
+        report.error = str(e)
+
+    report.results.sort(key=lambda result: result.line)
+    print(f"📦 Bulk import: {report.created} created, {report.failed} failed, {report.skipped} skipped")
+    return report
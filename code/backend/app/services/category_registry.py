@@ -0,0 +1,96 @@
+import os
+import threading
+from typing import Dict, List, Optional
+from sqlmodel import Session, select
+from app.models.category_model import Category
+from app.services import version_service
+
+# How often (seconds) a worker checks the shared version counter
+# to notice categories written by other workers
+REGISTRY_CHECK_INTERVAL = float(os.getenv("CATEGORY_REGISTRY_CHECK_INTERVAL", "5"))
+
+TABLE = "category"
+
+
+def _name_key(name: str) -> str:
+    """Registry key of a category name: trimmed and case-folded"""
+    return name.strip().casefold()
+
+
+def _copy(category: Category) -> Category:
+    """Detached snapshot, safe to share between requests"""
+    return Category(
+        category_id=category.category_id,
+        name=category.name,
+        description=category.description,
+        created_at=category.created_at
+    )
+
+
+class CategoryRegistry:
+    """In-process copy of the category table, keyed by id and by case-folded name"""
+
+    def __init__(self):
+        self.by_id: Dict[int, Category] = {}
+        self.by_name: Dict[str, Category] = {}
+        self.version = -1
+        self._lock = threading.Lock()
+
+    def load(self, session: Session):
+        """(Re)load every category from the database"""
+        with self._lock:
+            version = version_service.current(session, TABLE)
+            categories = [_copy(c) for c in session.exec(select(Category)).all()]
+            self.by_id = {c.category_id: c for c in categories}
+            self.by_name = {_name_key(c.name): c for c in categories}
+            self.version = version
+
+    def refresh_if_stale(self, session: Session):
+        """Reload when another worker changed the table"""
+        # Only move forward: a lagging replica must not roll the registry back
+        if version_service.current(session, TABLE, max_age=REGISTRY_CHECK_INTERVAL) > self.version:
+            self.load(session)
+
+    def put(self, session: Session, category: Category, version: int):
+        """Write-through after a committed create/update"""
+        if version != self.version + 1:
+            # Missed someone else's write in between
+            self.load(session)
+            return
+        with self._lock:
+            old = self.by_id.get(category.category_id)
+            by_name = dict(self.by_name)
+            if old:
+                by_name.pop(_name_key(old.name), None)
+            snapshot = _copy(category)
+            by_name[_name_key(snapshot.name)] = snapshot
+            self.by_id = {**self.by_id, snapshot.category_id: snapshot}
+            self.by_name = by_name
+            self.version = version
+
+    def remove(self, session: Session, category_id: int, version: int):
+        """Write-through after a committed delete"""
+        if version != self.version + 1:
+            self.load(session)
+            return
+        with self._lock:
+            by_id = dict(self.by_id)
+            old = by_id.pop(category_id, None)
+            by_name = dict(self.by_name)
+            if old:
+                by_name.pop(_name_key(old.name), None)
+            self.by_id = by_id
+            self.by_name = by_name
+            self.version = version
+
+    def all(self) -> List[Category]:
+        return sorted(self.by_id.values(), key=lambda c: c.category_id)
+
+    def get(self, category_id: int) -> Optional[Category]:
+        return self.by_id.get(category_id)
+
+    def get_by_name(self, name: str) -> Optional[Category]:
+        return self.by_name.get(_name_key(name))
+
+
+categories = CategoryRegistry()
@@ -1,35 +1,66 @@
-from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, func, select
 from app.models.category_model import Category
+from app.services import version_service, response_cache
+from app.services.category_registry import categories as registry, TABLE
 from typing import List
 
 
 def get_categories(session: Session) -> List[Category]:
     """Get all categories"""
-    return session.exec(select(Category)).all()
+    registry.refresh_if_stale(session)
+    return registry.all()
 
 
 def get_category(session: Session, category_id: int) -> Category | None:
     """Get a single category by ID"""
-    return session.get(Category, category_id)
+    registry.refresh_if_stale(session)
+    return registry.get(category_id)
 
 
 def get_category_by_name(session: Session, name: str) -> Category | None:
     """Get category by name (case-insensitive)"""
-    return session.exec(
-        select(Category).where(Category.name.ilike(name))
-    ).first()
+    registry.refresh_if_stale(session)
+    return registry.get_by_name(name)
+
+
+def _name_taken(session: Session, name: str, category_id: int | None = None) -> bool:
+    """
+    Case-insensitive name check against the table itself: the registry
+    may not have seen a category another worker just created.
+    """
+    statement = select(Category.category_id).where(func.lower(func.trim(Category.name)) == name.strip().lower())
+    if category_id is not None:
+        statement = statement.where(Category.category_id != category_id)
+    return session.exec(statement).first() is not None
+
+
+def _save_unique(session: Session, category: Category, error: str) -> int:
+    """
+    Commit a new or renamed category; returns the new table version.
+    A unique-name violation (a concurrent insert won) becomes the usual ValueError.
+    """
+    session.add(category)
+    try:
+        version = version_service.bump(session, TABLE)
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise ValueError(error)
+    return version
 
 
 def create_category(session: Session, category_data: Category) -> Category:
     """Create a new category"""
     # Check if category with same name exists
-    existing = get_category_by_name(session, category_data.name)
-    if existing:
-        raise ValueError(f"Category '{category_data.name}' already exists")
+    error = f"Category '{category_data.name}' already exists"
+    if _name_taken(session, category_data.name):
+        raise ValueError(error)
     
-    session.add(category_data)
-    session.commit()
+    version = _save_unique(session, category_data, error)
     session.refresh(category_data)
+    response_cache.invalidate(TABLE, version)
+    registry.put(session, category_data, version)
     return category_data
 
 
@@ -39,19 +70,20 @@ def update_category(session: Session, category_id: int, data: dict) -> Category
         return None
     
     # Check if new name conflicts with existing category
+    error = f"Ya existe una categoría con el nombre '{data.get('name')}'"
     if "name" in data and data["name"]:
-        existing = get_category_by_name(session, data["name"])
-        if existing and existing.category_id != category_id:
-            raise ValueError(f"Ya existe una categoría con el nombre '{data['name']}'")
+        if _name_taken(session, data["name"], category_id):
+            raise ValueError(error)
     
     # Update category fields
     for key, value in data.items():
         if value is not None:  # Only update non-None values
             setattr(category, key, value)
     
-    session.add(category)
-    session.commit()
+    version = _save_unique(session, category, error)
     session.refresh(category)
+    response_cache.invalidate(TABLE, version)
+    registry.put(session, category, version)
     return category
 
 
@@ -69,5 +101,8 @@ def delete_category(session: Session, category_id: int) -> bool:
         )
     
     session.delete(category)
+    version = version_service.bump(session, TABLE)
     session.commit()
-    return True
\ No newline at end of file
+    response_cache.invalidate(TABLE, version)
+    registry.remove(session, category_id, version)
+    return True
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import cloudinary
+import cloudinary.uploader
+import urllib3
+from cloudinary import exceptions
+from cloudinary.utils import get_http_connector
+from app.services import metrics
+
+# One client for every Cloudinary call in the process
+CLOUDINARY_MAX_CONCURRENCY = int(os.getenv("CLOUDINARY_MAX_CONCURRENCY", "16"))
+CLOUDINARY_CONNECT_TIMEOUT = float(os.getenv("CLOUDINARY_CONNECT_TIMEOUT", "5"))
+CLOUDINARY_TIMEOUT = float(os.getenv("CLOUDINARY_TIMEOUT", "60"))
+_TIMEOUT = urllib3.Timeout(connect=CLOUDINARY_CONNECT_TIMEOUT, read=CLOUDINARY_TIMEOUT)
+
+# Transient failures (network, 5xx, rate limits) are retried with
+# full-jitter exponential backoff: sleep ~ U(0, min(max, base * 2^n))
+CLOUDINARY_MAX_RETRIES = int(os.getenv("CLOUDINARY_MAX_RETRIES", "3"))
+CLOUDINARY_RETRY_BASE = float(os.getenv("CLOUDINARY_RETRY_BASE", "0.5"))
+CLOUDINARY_RETRY_MAX = float(os.getenv("CLOUDINARY_RETRY_MAX", "8"))
+
+# After this many consecutive transient failures calls fail fast for
+# CLOUDINARY_BREAKER_RESET seconds, then one trial call decides
+CLOUDINARY_BREAKER_THRESHOLD = int(os.getenv("CLOUDINARY_BREAKER_THRESHOLD", "5"))
+CLOUDINARY_BREAKER_RESET = float(os.getenv("CLOUDINARY_BREAKER_RESET", "30"))
+
+# API base URL override, e.g. a local fake server in tests
+CLOUDINARY_UPLOAD_PREFIX = os.getenv("CLOUDINARY_UPLOAD_PREFIX")
+
+# Client errors: retrying the same request won't help
+_PERMANENT = (
+    exceptions.BadRequest,
+    exceptions.AuthorizationRequired,
+    exceptions.NotAllowed,
+    exceptions.NotFound,
+    exceptions.AlreadyExists,
+)
+
+
+class CircuitOpenError(Exception):
+    """Cloudinary has been failing: the call was not attempted"""
+
+
+def is_transient(error: Exception) -> bool:
+    # call_api wraps socket/urllib3 errors, timeouts and non-JSON 5xx replies in a plain Error
+    return isinstance(error, exceptions.Error) and not isinstance(error, _PERMANENT)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_after:
+                    raise CircuitOpenError("Cloudinary no disponible (circuito abierto), reintente más tarde")
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                # Only one trial call at a time
+                if self._trial_running:
+                    raise CircuitOpenError("Cloudinary no disponible (circuito abierto), reintente más tarde")
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Call ended without telling anything about Cloudinary's health"""
+        with self._lock:
+            self._trial_running = False
+
+
+class CloudinaryClient:
+    """
+    Process-wide Cloudinary access: sized keep-alive connection pool,
+    concurrency cap, timeouts, retries and a circuit breaker.
+    """
+
+    def __init__(self):
+        self.slots = threading.BoundedSemaphore(CLOUDINARY_MAX_CONCURRENCY)
+        self.breaker = CircuitBreaker(CLOUDINARY_BREAKER_THRESHOLD, CLOUDINARY_BREAKER_RESET)
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def configure(self, **config):
+        if CLOUDINARY_UPLOAD_PREFIX:
+            config["upload_prefix"] = CLOUDINARY_UPLOAD_PREFIX
+        cloudinary.config(**config)
+
+        # The SDK's module-level pool keeps a single connection per host;
+        # size it for our concurrency so parallel uploads reuse connections
+        cloudinary.uploader._http = get_http_connector(cloudinary.config(), {
+            **cloudinary.CERT_KWARGS,
+            "maxsize": CLOUDINARY_MAX_CONCURRENCY,
+            "block": True,
+            "timeout": _TIMEOUT,
+            "retries": False,
+        })
+
+    def _call(self, operation: str, fn, source=None, *args, **kwargs):
+        # Calls and their backoff sleeps block the calling thread
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("Cloudinary calls block: run them in a worker thread (asyncio.to_thread)")
+        with self._lock:
+            self.calls += 1
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            if hasattr(source, "seek"):
+                # A retry must send the file from the start again
+                source.seek(0)
+            try:
+                with self.slots:
+                    with self._lock:
+                        self.in_flight += 1
+                    start = time.perf_counter()
+                    outcome = "error"
+                    try:
+                        # A bare number here would replace the pool's connect/read split
+                        result = fn(source, *args, timeout=_TIMEOUT, **kwargs)
+                        outcome = "ok"
+                    finally:
+                        metrics.observe_cloudinary(operation, outcome, time.perf_counter() - start)
+                        with self._lock:
+                            self.in_flight -= 1
+            except Exception as e:
+                if not is_transient(e):
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= CLOUDINARY_MAX_RETRIES or self.breaker.state == CircuitBreaker.OPEN:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                delay = random.uniform(0, min(CLOUDINARY_RETRY_MAX, CLOUDINARY_RETRY_BASE * 2 ** attempt))
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                print(f"⚠️ Cloudinary call failed ({str(e)}), retry {attempt}/{CLOUDINARY_MAX_RETRIES} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def upload(self, source, **options) -> dict:
+        return self._call("upload", cloudinary.uploader.upload, source, **options)
+
+    def destroy(self, public_id: str, **options) -> dict:
+        return self._call("destroy", cloudinary.uploader.destroy, public_id, **options)
+
+    def status(self) -> dict:
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "times_opened": self.breaker.times_opened,
+            "in_flight": self.in_flight,
+            "max_concurrency": CLOUDINARY_MAX_CONCURRENCY,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+
+client = CloudinaryClient()
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Iterator, Optional
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from app.models.post_model import Post
+
+# Rows fetched from the database (and encoded) per round trip
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = ("post_id", "name", "content", "price", "category_id", "images", "created_at", "updated_at")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _export_statement(category_id: Optional[int], updated_since: Optional[datetime]):
+    """Plain column select (no ORM objects), in primary key order"""
+    statement = select(*(getattr(Post, name) for name in EXPORT_COLUMNS)).order_by(Post.post_id)
+    if category_id is not None:
+        statement = statement.where(Post.category_id == category_id)
+    if updated_since is not None:
+        # Never-edited posts count as updated when they were created
+        statement = statement.where(func.coalesce(Post.updated_at, Post.created_at) >= updated_since)
+    return statement
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _encode_ndjson(rows) -> bytes:
+    return "".join(
+        json.dumps(dict(row._mapping), default=_json_default, ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _encode_csv(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            json.dumps(value) if isinstance(value, list)
+            else value.isoformat() if isinstance(value, datetime)
+            else value
+            for value in row
+        ])
+    return buffer.getvalue().encode()
+
+
+def export_posts(
+    engine: Engine,
+    format: str = "ndjson",
+    category_id: Optional[int] = None,
+    updated_since: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Yield the posts table encoded as NDJSON or CSV, one chunk per batch of rows.
+    Uses its own connection with a server-side cursor, so memory stays at
+    one batch whatever the table size. It is a plain generator: Starlette
+    iterates it in the threadpool.
+    """
+    if format == "csv":
+        yield _encode_csv([], header=True)
+
+    statement = _export_statement(category_id, updated_since)
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+        for rows in result.partitions():
+            yield _encode_csv(rows) if format == "csv" else _encode_ndjson(rows)
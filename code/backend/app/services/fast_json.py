@@ -0,0 +1,109 @@
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Type
+from pydantic import BaseModel, create_model
+from sqlalchemy import Select
+from app.models.category_model import Category
+from app.models.post_model import Post
+from app.schemas.category_schema import CategoryRead
+from app.schemas.post_schema import PostRead
+
+# orjson is optional: the stdlib encoder gives the same output, slower
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fast path for list endpoints: select plain columns, build the response
+# dicts straight from the row tuples (no ORM objects, no pydantic
+# validation) and encode them in one go. Field order follows the schemas.
+POST_FIELDS = tuple(PostRead.model_fields)
+CATEGORY_FIELDS = tuple(CategoryRead.model_fields)
+
+_category_columns = [getattr(Category, name).label(f"category__{name}") for name in CATEGORY_FIELDS]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def parse_fields(raw: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a ?fields=a,b,c sparse fieldset against a read schema.
+    Returns the names in schema order, or None for "every field".
+    """
+    if raw is None or not raw.strip():
+        return None
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise ValueError(
+            f"Campos desconocidos: {', '.join(sorted(unknown))}. "
+            f"Disponibles: {', '.join(schema.model_fields)}"
+        )
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+@lru_cache(maxsize=256)
+def sparse_model(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Response model with only the given fields of schema (built once per combination)"""
+    definitions = {name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    return create_model(
+        f"{schema.__name__}_{'_'.join(fields)}",
+        __config__={"from_attributes": True},
+        **definitions
+    )
+
+
+def post_columns(
+    statement: Select,
+    expand_category: bool = False,
+    fields: Optional[Tuple[str, ...]] = None,
+    keys: Iterable[str] = ()
+) -> Select:
+    """
+    Turn a select(Post) into a select of the PostRead columns (plus the
+    category's when expanded). With fields only those columns are read;
+    keys are extra columns the caller needs (e.g. the pagination key),
+    selected after the fields so post_dicts() leaves them out.
+    """
+    fields = fields or POST_FIELDS
+    columns = [getattr(Post, name) for name in fields]
+    columns += [getattr(Post, name) for name in keys if name not in fields]
+    if not expand_category:
+        return statement.with_only_columns(*columns)
+    return (
+        statement
+        .with_only_columns(*columns, *_category_columns)
+        .outerjoin(Category, Category.category_id == Post.category_id)
+    )
+
+
+def post_dicts(
+    rows: Sequence,
+    expand_category: bool = False,
+    fields: Optional[Tuple[str, ...]] = None
+) -> List[dict]:
+    """Response dicts from rows selected with post_columns()"""
+    fields = fields or POST_FIELDS
+    n = len(fields)
+    if not expand_category:
+        return [dict(zip(fields, row[:n])) for row in rows]
+
+    m = len(CATEGORY_FIELDS)
+    category_id = CATEGORY_FIELDS.index("category_id") - m
+    items = []
+    for row in rows:
+        item = dict(zip(fields, row[:n]))
+        item["category"] = dict(zip(CATEGORY_FIELDS, row[-m:])) if row[category_id] is not None else None
+        items.append(item)
+    return items
@@ -0,0 +1,156 @@
+import base64
+import binascii
+import hashlib
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from sqlalchemy import delete, inspect, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+from app.database import engine
+from app.models.image_asset_model import ImageAsset
+from app.models.post_model import Post
+
+# Content-addressed index of stored images: the same bytes (or the same
+# source URL) resolve to the existing secure_url instead of a new upload.
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def file_key(sha256: str) -> str:
+    return f"sha256:{sha256}"
+
+
+def normalize_url(url: str) -> str:
+    """Lowercase scheme and host, drop default port and fragment, sort the query"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def image_key(image_data: str) -> Optional[str]:
+    """Content key for an image given as URL or data URI (None if it can't be keyed)"""
+    if image_data.startswith("data:image"):
+        # Same key as uploading the same bytes as a file
+        try:
+            payload = base64.b64decode(image_data.split(",", 1)[1], validate=True)
+        except (IndexError, binascii.Error, ValueError):
+            return None
+        return file_key(hashlib.sha256(payload).hexdigest())
+    if image_data.startswith(("http://", "https://")):
+        return f"url:{normalize_url(image_data)}"
+    return None
+
+
+def lookup(keys: Iterable[str]) -> Dict[str, str]:
+    """secure_url of every key already uploaded"""
+    keys = set(keys)
+    if not keys:
+        return {}
+    with Session(engine) as session:
+        rows = session.exec(
+            select(ImageAsset.content_key, ImageAsset.secure_url).where(ImageAsset.content_key.in_(keys))
+        ).all()
+    return dict(rows)
+
+
+def stored_ids(public_ids: Iterable[str]) -> set:
+    """The public_ids some asset still points at"""
+    public_ids = set(public_ids)
+    if not public_ids:
+        return set()
+    with Session(engine) as session:
+        return set(session.exec(select(ImageAsset.public_id).where(ImageAsset.public_id.in_(public_ids))).all())
+
+
+def record(uploads: List[Tuple[str, dict]]) -> Dict[str, str]:
+    """
+    Register fresh uploads: (content key, storage upload result).
+    If another request registered the same content meanwhile, its
+    asset wins and our copy is removed. Returns key -> secure_url.
+    """
+    from app.services.post_service import _destroy_uploaded
+
+    urls = {}
+    duplicates = []
+    with Session(engine) as session:
+        for key, result in uploads:
+            try:
+                with session.begin_nested():
+                    session.add(ImageAsset(
+                        content_key=key,
+                        secure_url=result["secure_url"],
+                        public_id=result["public_id"],
+                        size=result.get("bytes"),
+                        original_size=result.get("original_bytes")
+                    ))
+                urls[key] = result["secure_url"]
+            except IntegrityError:
+                existing = session.exec(select(ImageAsset).where(ImageAsset.content_key == key)).one()
+                urls[key] = existing.secure_url
+                # A content-addressed store may have written the very same object
+                if result["public_id"] != existing.public_id:
+                    duplicates.append(result)
+        session.commit()
+
+    if duplicates:
+        _destroy_uploaded(duplicates)
+    return urls
+
+
+def forget(uploads: List[Tuple[Optional[str], dict]]):
+    """Drop the assets record() made for these uploads, unless a post uses them by now"""
+    with Session(engine) as session:
+        for key, result in uploads:
+            if key is None:
+                continue
+            session.execute(
+                delete(ImageAsset)
+                .where(
+                    ImageAsset.content_key == key,
+                    ImageAsset.public_id == result["public_id"],
+                    ImageAsset.ref_count == 0
+                )
+                .execution_options(synchronize_session=False)
+            )
+        session.commit()
+
+
+def _adjust_refs(session: Session, deltas: Counter):
+    by_delta = defaultdict(list)
+    for url, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(url)
+    for delta, urls in by_delta.items():
+        session.execute(
+            update(ImageAsset)
+            .where(ImageAsset.secure_url.in_(urls))
+            .values(ref_count=ImageAsset.ref_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def track_post_images(session: Session, posts: List[Post]):
+    """
+    Update reference counts for new or changed image lists.
+    Call before the flush: it reads the pending attribute history.
+    """
+    deltas = Counter()
+    for post in posts:
+        history = inspect(post).attrs.images.history
+        for images in history.added:
+            deltas.update(images or [])
+        for images in history.deleted:
+            deltas.subtract(images or [])
+    _adjust_refs(session, deltas)
+
+
+def release_post_images(session: Session, post: Post):
+    """Drop a deleted post's references"""
+    deltas = Counter()
+    deltas.subtract(post.images or [])
+    _adjust_refs(session, deltas)
@@ -0,0 +1,314 @@
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+from sqlalchemy import and_, or_, update
+from sqlmodel import Session, select
+from app.database import engine
+from app.models.image_job_model import ImageJob
+from app.models.post_model import Post, PostStatus
+from app.services import post_service
+from app.services.ingest_service import CHUNK_SIZE, IngestedUpload
+
+# Background image uploads for posts created with ?background=true.
+#   memory:   asyncio queue inside this process (jobs are lost on restart)
+#   database: image_job table, shared by every worker and restart-safe
+IMAGE_JOB_QUEUE = os.getenv("IMAGE_JOB_QUEUE", "memory")
+IMAGE_JOB_WORKERS = int(os.getenv("IMAGE_JOB_WORKERS", "2"))
+IMAGE_JOB_MAX_ATTEMPTS = int(os.getenv("IMAGE_JOB_MAX_ATTEMPTS", "3"))
+# Retry n waits about base * 2^(n-1) seconds
+IMAGE_JOB_RETRY_DELAY = float(os.getenv("IMAGE_JOB_RETRY_DELAY", "2"))
+IMAGE_JOB_POLL_INTERVAL = float(os.getenv("IMAGE_JOB_POLL_INTERVAL", "1"))
+# A running database job whose worker died is picked up again after this
+IMAGE_JOB_LEASE_SECONDS = float(os.getenv("IMAGE_JOB_LEASE_SECONDS", "300"))
+
+# Uploaded files wait here until a worker sends them; with the database
+# queue and several machines this must be shared storage
+IMAGE_JOB_STAGING_DIR = Path(
+    os.getenv("IMAGE_JOB_STAGING_DIR", os.path.join(tempfile.gettempdir(), "post_image_jobs"))
+)
+
+
+def stage_files(ingested: List[IngestedUpload]) -> List[dict]:
+    """Copy validated uploads out of the request's temp files so they outlive the request"""
+    IMAGE_JOB_STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    staged = []
+    for file in ingested:
+        path = IMAGE_JOB_STAGING_DIR / uuid.uuid4().hex
+        file.stream.seek(0)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(file.stream, out, CHUNK_SIZE)
+        staged.append({
+            "path": str(path),
+            "filename": file.filename,
+            "content_type": file.content_type,
+            "size": file.size,
+            "sha256": file.sha256
+        })
+    return staged
+
+
+def discard_staged(files: List[dict]):
+    for file in files:
+        try:
+            os.remove(file["path"])
+        except FileNotFoundError:
+            pass
+
+
+def finish_post(post_id: int, images: Optional[List[str]], files: List[dict]) -> bool:
+    """
+    Store the uploaded image URLs and mark the post ready,
+    or mark it failed when images is None. Returns False if the post is gone.
+    The staged files are removed only once this is committed.
+    """
+    with Session(engine) as session:
+        post = session.get(Post, post_id)
+        if post:
+            if images is None:
+                post.status = PostStatus.failed.value
+            else:
+                post.images = images
+                post.status = PostStatus.ready.value
+            post_service._save_post(session, post)
+    discard_staged(files)
+    return post is not None
+
+
+class InMemoryJobQueue:
+    """asyncio queue; retries are re-queued after their delay"""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._next_id = 1
+        # Unfinished and failed jobs, for the status endpoint
+        self._jobs: Dict[int, ImageJob] = {}
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        for job in self._jobs.values():
+            if job.status in ("queued", "running"):
+                self._queue.put_nowait(job)
+
+    async def put(self, post_id: int, files: List[dict]):
+        job = ImageJob(job_id=self._next_id, post_id=post_id, files=files)
+        self._next_id += 1
+        self._jobs[post_id] = job
+        self._queue.put_nowait(job)
+
+    async def get(self) -> ImageJob:
+        job = await self._queue.get()
+        job.status = "running"
+        job.attempts += 1
+        return job
+
+    async def retry(self, job: ImageJob, error: str, delay: float):
+        job.status = "queued"
+        job.last_error = error
+        job.run_after = datetime.now() + timedelta(seconds=delay)
+        asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, job)
+
+    async def done(self, job: ImageJob):
+        self._jobs.pop(job.post_id, None)
+
+    async def fail(self, job: ImageJob, error: str):
+        job.status = "failed"
+        job.last_error = error
+
+    async def latest(self, post_id: int) -> Optional[ImageJob]:
+        return self._jobs.get(post_id)
+
+
+class DatabaseJobQueue:
+    """
+    Jobs in the image_job table. Workers claim a job with a conditional
+    UPDATE and hold it for IMAGE_JOB_LEASE_SECONDS, so several processes
+    can share the queue and jobs of a crashed worker are retried. The
+    claim counts the attempt, so a job that keeps killing its worker
+    still fails after IMAGE_JOB_MAX_ATTEMPTS.
+    """
+
+    def start(self):
+        pass
+
+    def _insert(self, post_id: int, files: List[dict]):
+        with Session(engine) as session:
+            session.add(ImageJob(post_id=post_id, files=files))
+            session.commit()
+
+    async def put(self, post_id: int, files: List[dict]):
+        await asyncio.to_thread(self._insert, post_id, files)
+
+    @staticmethod
+    def _runnable(now: datetime):
+        return or_(
+            and_(ImageJob.status == "queued", ImageJob.run_after <= now),
+            and_(ImageJob.status == "running", ImageJob.locked_until < now)
+        )
+
+    def _claim(self) -> Optional[ImageJob]:
+        now = datetime.now()
+        with Session(engine) as session:
+            candidates = session.exec(
+                select(ImageJob.job_id)
+                .where(self._runnable(now))
+                .order_by(ImageJob.run_after)
+                .limit(IMAGE_JOB_WORKERS)
+            ).all()
+            for job_id in candidates:
+                claimed = session.execute(
+                    update(ImageJob)
+                    .where(ImageJob.job_id == job_id, self._runnable(now))
+                    .values(
+                        status="running",
+                        attempts=ImageJob.attempts + 1,
+                        locked_until=now + timedelta(seconds=IMAGE_JOB_LEASE_SECONDS)
+                    )
+                ).rowcount
+                session.commit()
+                if not claimed:
+                    continue
+                job = session.get(ImageJob, job_id)
+                if job.attempts <= IMAGE_JOB_MAX_ATTEMPTS:
+                    return job
+                # Its last attempt's lease ran out: the worker died on it
+                print(f"❌ Image job for post {job.post_id} failed: worker lost after {IMAGE_JOB_MAX_ATTEMPTS} attempts")
+                job.status = "failed"
+                job.last_error = "Worker lost during the last attempt"
+                job.locked_until = None
+                session.commit()
+                finish_post(job.post_id, None, job.files)
+        return None
+
+    async def get(self) -> ImageJob:
+        while True:
+            job = await asyncio.to_thread(self._claim)
+            if job:
+                return job
+            await asyncio.sleep(IMAGE_JOB_POLL_INTERVAL)
+
+    def _update(self, job_id: int, **values):
+        with Session(engine) as session:
+            session.execute(update(ImageJob).where(ImageJob.job_id == job_id).values(**values))
+            session.commit()
+
+    async def retry(self, job: ImageJob, error: str, delay: float):
+        await asyncio.to_thread(
+            self._update, job.job_id,
+            status="queued", attempts=job.attempts, last_error=error, locked_until=None,
+            run_after=datetime.now() + timedelta(seconds=delay)
+        )
+
+    async def done(self, job: ImageJob):
+        await asyncio.to_thread(self._update, job.job_id, status="done", attempts=job.attempts, locked_until=None)
+
+    async def fail(self, job: ImageJob, error: str):
+        await asyncio.to_thread(
+            self._update, job.job_id, status="failed", attempts=job.attempts, last_error=error, locked_until=None
+        )
+
+    def _latest(self, post_id: int) -> Optional[ImageJob]:
+        with Session(engine) as session:
+            return session.exec(
+                select(ImageJob).where(ImageJob.post_id == post_id).order_by(ImageJob.job_id.desc())
+            ).first()
+
+    async def latest(self, post_id: int) -> Optional[ImageJob]:
+        return await asyncio.to_thread(self._latest, post_id)
+
+
+QUEUES = {
+    "memory": InMemoryJobQueue,
+    "database": DatabaseJobQueue,
+}
+
+if IMAGE_JOB_QUEUE not in QUEUES:
+    raise RuntimeError(f"IMAGE_JOB_QUEUE must be one of: {', '.join(QUEUES)}")
+
+queue = QUEUES[IMAGE_JOB_QUEUE]()
+
+_workers: List[asyncio.Task] = []
+
+
+async def enqueue(post_id: int, files: List[dict]):
+    await queue.put(post_id, files)
+
+
+async def _upload_staged(job: ImageJob) -> List[str]:
+    streams = [open(file["path"], "rb") for file in job.files]
+    try:
+        ingested = [
+            IngestedUpload(
+                filename=file["filename"],
+                content_type=file["content_type"],
+                size=file["size"],
+                stream=stream,
+                sha256=file["sha256"]
+            )
+            for file, stream in zip(job.files, streams)
+        ]
+        return await post_service.upload_ingested(ingested, public_prefix=f"post_{job.post_id}")
+    finally:
+        for stream in streams:
+            stream.close()
+
+
+async def _run(job: ImageJob):
+    try:
+        images = await _upload_staged(job)
+        saved = await asyncio.to_thread(finish_post, job.post_id, images, job.files)
+    except Exception as e:
+        if job.attempts >= IMAGE_JOB_MAX_ATTEMPTS:
+            print(f"❌ Image job for post {job.post_id} failed after {job.attempts} attempts: {str(e)}")
+            await queue.fail(job, str(e))
+            await asyncio.to_thread(finish_post, job.post_id, None, job.files)
+        else:
+            delay = IMAGE_JOB_RETRY_DELAY * 2 ** (job.attempts - 1) * random.uniform(0.8, 1.2)
+            print(f"⚠️ Image job for post {job.post_id} failed (attempt {job.attempts}), retrying in {delay:.1f}s: {str(e)}")
+            await queue.retry(job, str(e), delay)
+        return
+
+    if not saved:
+        print(f"⚠️ Post {job.post_id} was deleted while its images were uploading")
+    await queue.done(job)
+    print(f"✅ Images ready for post {job.post_id}")
+
+
+async def _worker():
+    failures = 0
+    while True:
+        try:
+            job = await queue.get()
+        except Exception as e:
+            # e.g. "database is locked" while claiming: back off, but never stop draining the queue
+            failures += 1
+            delay = min(IMAGE_JOB_RETRY_DELAY * 2 ** (failures - 1), IMAGE_JOB_LEASE_SECONDS)
+            print(f"⚠️ Image job queue unavailable, retrying in {delay:.1f}s: {str(e)}")
+            await asyncio.sleep(delay)
+            continue
+        failures = 0
+        try:
+            await _run(job)
+        except Exception as e:
+            # Never let one bad job stop the worker
+            print(f"❌ Image job {job.job_id} crashed: {str(e)}")
+
+
+def start_workers():
+    """Start the worker tasks (called from the app lifespan)"""
+    queue.start()
+    for _ in range(IMAGE_JOB_WORKERS):
+        _workers.append(asyncio.create_task(_worker()))
+    print(f"🧵 {IMAGE_JOB_WORKERS} image job workers started ({IMAGE_JOB_QUEUE} queue)")
+
+
+async def stop_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
@@ -0,0 +1,153 @@
+import asyncio
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from app.services.ingest_service import IngestedUpload
+
+# Pillow is optional: without it images are uploaded unchanged
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Pre-upload stage: decode, drop metadata, downscale, re-encode
+IMAGE_OPTIMIZE = os.getenv("IMAGE_OPTIMIZE", "false").lower() in ("1", "true", "yes")
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "2048"))
+IMAGE_OUTPUT_FORMAT = os.getenv("IMAGE_OUTPUT_FORMAT", "webp").lower()  # webp | jpeg
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+
+OUTPUT_TYPES = {"webp": ("WEBP", "image/webp", "webp"), "jpeg": ("JPEG", "image/jpeg", "jpg")}
+
+# SVG is not raster; GIFs may be animated
+OPTIMIZABLE_TYPES = {"image/jpeg", "image/png", "image/webp", "image/bmp", "image/tiff"}
+
+if IMAGE_OUTPUT_FORMAT not in OUTPUT_TYPES:
+    raise RuntimeError(f"IMAGE_OUTPUT_FORMAT must be one of: {', '.join(OUTPUT_TYPES)}")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+class OptimizeStats:
+    """Totals since startup, for the diagnostics endpoint"""
+
+    def __init__(self):
+        self.images = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+
+    def record(self, bytes_in: int, bytes_out: Optional[int]):
+        with self._lock:
+            if bytes_out is None:
+                self.skipped += 1
+                return
+            self.images += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def as_dict(self) -> dict:
+        return {
+            "enabled": enabled(),
+            "images": self.images,
+            "skipped": self.skipped,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+        }
+
+
+stats = OptimizeStats()
+
+
+def enabled() -> bool:
+    return IMAGE_OPTIMIZE and Image is not None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=IMAGE_PROCESS_WORKERS)
+        return _pool
+
+
+def shutdown():
+    """Stop the worker processes (called from the app lifespan)"""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _reencode(data: bytes, max_dimension: int, output_format: str, quality: int) -> Optional[bytes]:
+    """
+    Runs in a worker process. Returns the re-encoded bytes, or None
+    when re-encoding would not make the image smaller.
+    """
+    pil_format, _, _ = OUTPUT_TYPES[output_format]
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        resized = max(image.size) > max_dimension
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        if pil_format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        # No exif/icc arguments: metadata is not carried over
+        out = io.BytesIO()
+        image.save(out, format=pil_format, quality=quality, optimize=True)
+
+    encoded = out.getvalue()
+    if not resized and len(encoded) >= len(data):
+        return None
+    return encoded
+
+
+async def optimize(file: IngestedUpload) -> IngestedUpload:
+    """
+    Downscale and re-encode an image before it is uploaded.
+    Returns the file unchanged when disabled, not a raster image, or
+    when the result would not be smaller. The content hash stays the one
+    of the original bytes, so deduplication still matches the source.
+    """
+    if not enabled() or file.content_type not in OPTIMIZABLE_TYPES:
+        return file
+
+    file.stream.seek(0)
+    data = await asyncio.to_thread(file.stream.read)
+    file.stream.seek(0)
+
+    loop = asyncio.get_running_loop()
+    try:
+        encoded = await loop.run_in_executor(
+            _get_pool(), _reencode, data, IMAGE_MAX_DIMENSION, IMAGE_OUTPUT_FORMAT, IMAGE_QUALITY
+        )
+    except Exception as e:
+        print(f"⚠️ Could not optimize {file.filename}, uploading it unchanged: {str(e)}")
+        encoded = None
+
+    stats.record(file.size, len(encoded) if encoded is not None else None)
+    if encoded is None:
+        return file
+
+    _, content_type, extension = OUTPUT_TYPES[IMAGE_OUTPUT_FORMAT]
+    stream = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    stream.write(encoded)
+    stream.seek(0)
+    print(f"🗜️ {file.filename}: {file.size / 1024:.0f}KB → {len(encoded) / 1024:.0f}KB")
+
+    return file._replace(
+        filename=os.path.splitext(file.filename)[0] + "." + extension,
+        content_type=content_type,
+        size=len(encoded),
+        stream=stream
+    )
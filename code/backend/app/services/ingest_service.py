@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+from fastapi import UploadFile
+
+# Read uploads in 64KB chunks, never the whole file at once
+CHUNK_SIZE = 64 * 1024
+
+# Max size per image (10MB)
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
+
+class IngestedUpload(NamedTuple):
+    filename: str
+    content_type: str
+    size: int
+    stream: BinaryIO
+    sha256: str
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Detect the image MIME type from the first bytes of a file"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"BM"):
+        return "image/bmp"
+    if head.startswith((b"II*\x00", b"MM\x00*")):
+        return "image/tiff"
+
+    # SVG is text: look for the root element near the start
+    text = head[:1024].lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith((b"<svg", b"<?xml", b"<!--")) and b"<svg" in text:
+        return "image/svg+xml"
+
+    return None
+
+
+def iter_chunks(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a file in chunks from the start"""
+    stream.seek(0)
+    while chunk := stream.read(chunk_size):
+        yield chunk
+
+
+def _scan_stream(stream: BinaryIO, filename: str, max_size: int) -> tuple[str, int, str]:
+    """
+    Validate magic bytes on the first chunk and the size on the way, chunk by chunk.
+    The content hash is computed in the same pass.
+    """
+    size = 0
+    detected_type = None
+    digest = hashlib.sha256()
+
+    for chunk in iter_chunks(stream):
+        if size == 0:
+            detected_type = sniff_image_type(chunk)
+            if detected_type is None:
+                raise ValueError(f"Archivo '{filename}' no es una imagen válida")
+
+        size += len(chunk)
+        digest.update(chunk)
+        if size > max_size:
+            # Stop reading as soon as we are over the limit
+            raise ValueError(
+                f"Archivo '{filename}' es demasiado grande (más de {max_size / (1024*1024):.0f}MB). "
+                f"Tamaño máximo permitido: {max_size / (1024*1024):.0f}MB"
+            )
+
+    if size == 0:
+        raise ValueError(f"Archivo '{filename}' está vacío")
+
+    stream.seek(0)
+    return detected_type, size, digest.hexdigest()
+
+
+async def ingest_upload(file: UploadFile, max_size: int = MAX_FILE_SIZE) -> IngestedUpload:
+    """
+    Stream-validate an UploadFile without loading it in memory.
+    The returned stream is the spooled temp file, rewound to the start.
+    Only validation streams: the Cloudinary SDK reads the whole file when
+    uploading it (see CloudinaryStorage.upload).
+    """
+    # Starlette knows the size of the spooled part: reject without reading
+    if file.size is not None and file.size > max_size:
+        raise ValueError(
+            f"Archivo '{file.filename}' es demasiado grande ({file.size / (1024*1024):.2f}MB). "
+            f"Tamaño máximo permitido: {max_size / (1024*1024):.0f}MB"
+        )
+
+    detected_type, size, sha256 = await asyncio.to_thread(_scan_stream, file.file, file.filename, max_size)
+
+    return IngestedUpload(
+        filename=file.filename,
+        content_type=detected_type,
+        size=size,
+        stream=file.file,
+        sha256=sha256
+    )
@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Request latency buckets (seconds)
+METRICS_LATENCY_BUCKETS = tuple(
+    float(bucket) for bucket in os.getenv(
+        "METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10"
+    ).split(",")
+)
+# More SQL queries than this in one request is logged as a likely N+1
+METRICS_QUERY_BUDGET = int(os.getenv("METRICS_QUERY_BUDGET", "20"))
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.items())
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, labels, "", value) for labels, value in self.values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Cumulative buckets plus _sum and _count, one series per label set"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.series: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.items())
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                # [count per bucket..., sum, count]
+                series = self.series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self.series.items()}
+        samples = []
+        for labels, series in snapshot.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", labels, f'le="{_format_value(bound)}"', cumulative))
+            samples.append((f"{self.name}_sum", labels, "", series[-2]))
+            samples.append((f"{self.name}_count", labels, "", series[-1]))
+        return samples
+
+
+requests_total = Counter("http_requests_total", "HTTP requests by route and status code")
+request_duration = Histogram(
+    "http_request_duration_seconds", "Time from request to the last body byte", METRICS_LATENCY_BUCKETS
+)
+requests_in_flight = Gauge("http_requests_in_flight", "Requests being handled right now")
+response_size = Histogram("http_response_size_bytes", "Response body size", SIZE_BUCKETS)
+request_queries = Histogram("http_request_db_queries", "SQL statements run per request", QUERY_COUNT_BUCKETS)
+request_db_time = Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL per request", METRICS_LATENCY_BUCKETS
+)
+request_cloudinary_time = Histogram(
+    "http_request_cloudinary_duration_seconds", "Time spent in Cloudinary calls per request", METRICS_LATENCY_BUCKETS
+)
+query_budget_exceeded = Counter(
+    "http_request_query_budget_exceeded_total", f"Requests running more than {METRICS_QUERY_BUDGET} SQL statements"
+)
+query_duration = Histogram("db_query_duration_seconds", "SQL statement execution time", METRICS_LATENCY_BUCKETS)
+cloudinary_duration = Histogram(
+    "cloudinary_call_duration_seconds", "Cloudinary API call time (each attempt)", METRICS_LATENCY_BUCKETS
+)
+
+REGISTRY = [
+    requests_total, request_duration, requests_in_flight, response_size,
+    request_queries, request_db_time, request_cloudinary_time, query_budget_exceeded, query_duration, cloudinary_duration,
+]
+
+
+class RequestStats:
+    """SQL and Cloudinary work done on behalf of the current request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.cloudinary_calls = 0
+        self.cloudinary_seconds = 0.0
+
+
+# Set by the metrics middleware. Worker threads and the async engine's
+# greenlets run with a copy of the request's context, so they see (and
+# update) the same RequestStats object.
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(engine: Engine, name: str):
+    """Time every SQL statement run through this (sync) engine"""
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        query_duration.observe(elapsed, engine=name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def observe_cloudinary(operation: str, outcome: str, seconds: float):
+    cloudinary_duration.observe(seconds, operation=operation, outcome=outcome)
+    stats = current_request.get()
+    if stats is not None:
+        stats.cloudinary_calls += 1
+        stats.cloudinary_seconds += seconds
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, size: int, stats: RequestStats):
+    requests_total.inc(method=method, route=route, status=str(status))
+    request_duration.observe(seconds, method=method, route=route)
+    response_size.observe(size, method=method, route=route)
+    request_queries.observe(stats.queries, method=method, route=route)
+    request_db_time.observe(stats.db_seconds, method=method, route=route)
+    if stats.cloudinary_calls:
+        request_cloudinary_time.observe(stats.cloudinary_seconds, method=method, route=route)
+
+    if stats.queries > METRICS_QUERY_BUDGET:
+        query_budget_exceeded.inc(method=method, route=route)
+        print(
+            f"⚠️ {method} {route} ran {stats.queries} SQL queries ({stats.db_seconds * 1000:.1f}ms), "
+            f"budget is {METRICS_QUERY_BUDGET}: likely an N+1"
+        )
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, extra, value in metric.samples():
+            lines.append(f"{name}{_format_labels(labels, extra)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,109 @@
+import base64
+import json
+from datetime import datetime
+from enum import Enum
+from typing import List, NamedTuple, Optional
+from sqlmodel import Session, tuple_
+from app.models.post_model import Post
+
+
+class PostSort(str, Enum):
+    created_at_asc = "created_at_asc"
+    created_at_desc = "created_at_desc"
+    price_asc = "price_asc"
+    price_desc = "price_desc"
+
+    @property
+    def column_name(self) -> str:
+        return self.value.rsplit("_", 1)[0]
+
+    @property
+    def descending(self) -> bool:
+        return self.value.endswith("_desc")
+
+
+class Page(NamedTuple):
+    items: List[Post]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+def encode_cursor(post: Post, direction: str, sort: PostSort = PostSort.created_at_asc) -> str:
+    """Build an opaque cursor pointing at a post's (sort key, post_id)"""
+    value = getattr(post, sort.column_name)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = {"k": [value, post.post_id], "d": direction, "s": sort.value}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: PostSort = PostSort.created_at_asc) -> tuple:
+    """Decode a cursor into (sort value, post_id, direction)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        value, post_id = payload["k"]
+        direction = payload["d"]
+        if direction not in ("next", "prev") or payload["s"] != sort.value:
+            raise ValueError(direction)
+        if sort.column_name == "created_at":
+            value = datetime.fromisoformat(value)
+        else:
+            value = float(value)
+        return value, int(post_id), direction
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def paginate_posts(
+    session: Session,
+    statement,
+    limit: int,
+    cursor: Optional[str] = None,
+    sort: PostSort = PostSort.created_at_asc,
+    as_rows: bool = False
+) -> Page:
+    """
+    Keyset pagination over (sort column, post_id).
+    Seeks straight to the cursor position through the composite index,
+    so deep pages cost the same as the first one.
+    as_rows: the statement selects columns, items are rows instead of Posts.
+    """
+    sort_column = getattr(Post, sort.column_name)
+    key = tuple_(sort_column, Post.post_id)
+    direction = "next"
+
+    if cursor:
+        value, post_id, direction = decode_cursor(cursor, sort)
+        # Walking forward on an ascending sort (or back on a descending one) means "greater than"
+        if (direction == "next") != sort.descending:
+            statement = statement.where(key > tuple_(value, post_id))
+        else:
+            statement = statement.where(key < tuple_(value, post_id))
+
+    if (direction == "next") != sort.descending:
+        statement = statement.order_by(sort_column, Post.post_id)
+    else:
+        statement = statement.order_by(sort_column.desc(), Post.post_id.desc())
+
+    # Fetch one extra row to know whether there is another page
+    statement = statement.limit(limit + 1)
+    rows = list(session.execute(statement).all() if as_rows else session.exec(statement).all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if direction == "prev":
+        rows.reverse()
+
+    if not rows:
+        return Page(items=[], next_cursor=None, prev_cursor=None)
+
+    if direction == "next":
+        next_cursor = encode_cursor(rows[-1], "next", sort) if has_more else None
+        prev_cursor = encode_cursor(rows[0], "prev", sort) if cursor else None
+    else:
+        next_cursor = encode_cursor(rows[-1], "next", sort)
+        prev_cursor = encode_cursor(rows[0], "prev", sort) if has_more else None
+
+    return Page(items=rows, next_cursor=next_cursor, prev_cursor=prev_cursor)
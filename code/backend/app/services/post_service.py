@@ -1,22 +1,69 @@
 from sqlmodel import Session, select
-from app.models.post_model import Post
+from sqlalchemy import inspect, update
+from sqlalchemy.orm import joinedload, selectinload
+from app.database import DbSession, run_db
+from app.models.post_model import Post, PostStatus
+from app.services.pagination import Page, PostSort, paginate_posts
+from app.services.ingest_service import IngestedUpload, ingest_upload
+from app.services import search_service, suggest_index, version_service, response_cache, image_assets, storage
+from app.services import image_processing, fast_json, single_flight
+from app.services.cloudinary_client import CircuitOpenError
 from datetime import datetime
-import cloudinary.uploader
+import asyncio
+import os
 from fastapi import UploadFile
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 
-async def upload_files_to_cloudinary(
-    files: List[UploadFile], 
-    public_prefix: str = "post"
-) -> List[str]:
+POSTS_TABLE = Post.__tablename__
+
+# Upload concurrency: per request and across the whole process
+UPLOAD_CONCURRENCY_PER_REQUEST = int(os.getenv("UPLOAD_CONCURRENCY_PER_REQUEST", "4"))
+UPLOAD_CONCURRENCY_GLOBAL = int(os.getenv("UPLOAD_CONCURRENCY_GLOBAL", "16"))
+
+_global_upload_slots: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+
+
+class VersionConflict(Exception):
+    """The post was saved by someone else since the version the edit is based on"""
+
+
+def get_global_upload_slots() -> asyncio.Semaphore:
+    """Process-wide upload semaphore, bound to the running event loop"""
+    global _global_upload_slots
+    loop = asyncio.get_running_loop()
+    if _global_upload_slots is None or _global_upload_slots[0] is not loop:
+        _global_upload_slots = (loop, asyncio.Semaphore(UPLOAD_CONCURRENCY_GLOBAL))
+    return _global_upload_slots[1]
+
+
+def _destroy_uploaded(uploads: List[dict]):
     """
-    Upload actual files to Cloudinary.
-    Accepts UploadFile objects from FastAPI.
-    Validates that all files are images.
+    Remove already uploaded images (storage upload results) after a failed
+    batch. Objects the store already held, or that an image asset points
+    at, stay: a content-addressed store gives the same bytes the same object.
+    """
+    public_ids = {upload["public_id"] for upload in uploads if not upload.get("existed")}
+    public_ids -= image_assets.stored_ids(public_ids)
+    for public_id in public_ids:
+        try:
+            storage.backend.destroy(public_id)
+            print(f"🧹 Removed orphan upload {public_id}")
+        except Exception as e:
+            print(f"❌ Error removing orphan upload {public_id}: {str(e)}")
+
+
+def discard_uploads(uploads: List[Tuple[Optional[str], dict]]):
+    """Undo fresh uploads whose post was never saved: their unused assets, then the objects"""
+    image_assets.forget(uploads)
+    _destroy_uploaded([result for _, result in uploads])
+
+
+async def ingest_files(files: List[UploadFile]) -> List[IngestedUpload]:
+    """
+    Validate that all files are images (name, MIME type, extension,
+    magic bytes and size) before anything is uploaded.
     """
-    uploaded_urls = []
-    
     # Allowed image MIME types
     allowed_types = {
         'image/jpeg', 'image/jpg', 'image/png', 'image/gif', 
@@ -26,78 +73,142 @@ async def upload_files_to_cloudinary(
     # Allowed file extensions
     allowed_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.svg', '.tiff', '.tif'}
     
+    # Validate every file before starting any upload
+    ingested = []
     for i, file in enumerate(files):
-        try:
-            # Validate file has a filename
-            if not file.filename:
-                raise ValueError(f"Archivo en posición {i} no tiene nombre")
-            
-            # Get file extension
-            file_extension = None
-            if '.' in file.filename:
-                file_extension = '.' + file.filename.rsplit('.', 1)[1].lower()
-            
-            # Validate MIME type
-            if file.content_type not in allowed_types:
-                raise ValueError(
-                    f"Archivo '{file.filename}' tiene un tipo no permitido: {file.content_type}. "
-                    f"Solo se permiten imágenes (JPEG, PNG, GIF, WEBP, BMP, SVG, TIFF)"
-                )
-            
-            # Validate file extension
-            if file_extension and file_extension not in allowed_extensions:
-                raise ValueError(
-                    f"Archivo '{file.filename}' tiene una extensión no permitida: {file_extension}. "
-                    f"Extensiones permitidas: {', '.join(sorted(allowed_extensions))}"
-                )
-            
-            # Read file content
-            file_content = await file.read()
-            
-            # Validate file size (e.g., max 10MB)
-            max_size = 10 * 1024 * 1024  # 10MB in bytes
-            if len(file_content) > max_size:
-                raise ValueError(
-                    f"Archivo '{file.filename}' es demasiado grande ({len(file_content) / (1024*1024):.2f}MB). "
-                    f"Tamaño máximo permitido: 10MB"
-                )
-            
-            # Validate file is not empty
-            if len(file_content) == 0:
-                raise ValueError(f"Archivo '{file.filename}' está vacío")
-            
-            # Upload to Cloudinary
-            print(f"📤 Uploading {file.filename} ({len(file_content) / 1024:.2f}KB)...")
-            result = cloudinary.uploader.upload(
-                file_content,
-                public_id=f"{public_prefix}_{i}_{datetime.now().timestamp()}",
-                resource_type="image",
-                folder="posts"  # Organize in a folder
+        # Validate file has a filename
+        if not file.filename:
+            raise ValueError(f"Archivo en posición {i} no tiene nombre")
+        
+        # Get file extension
+        file_extension = None
+        if '.' in file.filename:
+            file_extension = '.' + file.filename.rsplit('.', 1)[1].lower()
+        
+        # Validate MIME type
+        if file.content_type not in allowed_types:
+            raise ValueError(
+                f"Archivo '{file.filename}' tiene un tipo no permitido: {file.content_type}. "
+                f"Solo se permiten imágenes (JPEG, PNG, GIF, WEBP, BMP, SVG, TIFF)"
             )
-            
-            uploaded_urls.append(result["secure_url"])
-            print(f"✅ {file.filename} uploaded successfully")
-            
-            # Reset file pointer for potential reuse
-            await file.seek(0)
-            
-        except ValueError as ve:
-            # Re-raise validation errors
-            raise ve
-        except Exception as e:
-            print(f"❌ Error uploading {file.filename}: {str(e)}")
-            raise ValueError(f"Error al subir '{file.filename}': {str(e)}")
+        
+        # Validate file extension
+        if file_extension and file_extension not in allowed_extensions:
+            raise ValueError(
+                f"Archivo '{file.filename}' tiene una extensión no permitida: {file_extension}. "
+                f"Extensiones permitidas: {', '.join(sorted(allowed_extensions))}"
+            )
+        
+        # Stream the file in chunks: size cap and magic bytes checked on the way
+        ingested.append(await ingest_upload(file))
     
-    return uploaded_urls
+    return ingested
+
+
+async def upload_ingested(
+    ingested: List[IngestedUpload],
+    public_prefix: str = "post"
+) -> List[str]:
+    """
+    Upload validated files to the image storage (Cloudinary or local).
+    Content seen before resolves to its existing URL without a network call.
+    Uploads run in worker threads, in parallel, keeping the original order;
+    if one fails the others are removed again.
+    """
+    keys = [image_assets.file_key(file.sha256) for file in ingested]
+    known = await asyncio.to_thread(image_assets.lookup, keys)
+    
+    # Each new content is uploaded once, even if the request repeats it
+    pending = {}
+    for i, (key, file) in enumerate(zip(keys, ingested)):
+        if key not in known and key not in pending:
+            pending[key] = (i, file)
+    if len(pending) < len(ingested):
+        print(f"♻️ {len(ingested) - len(pending)} of {len(ingested)} images already uploaded")
+    
+    request_slots = asyncio.Semaphore(UPLOAD_CONCURRENCY_PER_REQUEST)
+    global_slots = get_global_upload_slots()
+    failed = asyncio.Event()
+    
+    async def upload_one(i: int, original: IngestedUpload):
+        # Optional downscale/re-encode, on the process pool, before taking an upload slot
+        file = await image_processing.optimize(original)
+        try:
+            async with request_slots, global_slots:
+                # Another upload already failed: don't start new ones
+                if failed.is_set():
+                    return None
+                
+                print(f"📤 Uploading {file.filename} ({file.size / 1024:.2f}KB)...")
+                try:
+                    # Cloudinary reads the file whole here, the local store in chunks;
+                    # the upload slots bound how many are in memory at once
+                    result = await asyncio.to_thread(
+                        storage.backend.upload,
+                        file.stream,
+                        public_id=f"{public_prefix}_{i}_{datetime.now().timestamp()}",
+                        filename=file.filename
+                    )
+                except CircuitOpenError:
+                    failed.set()
+                    raise
+                except Exception as e:
+                    failed.set()
+                    print(f"❌ Error uploading {file.filename}: {str(e)}")
+                    raise ValueError(f"Error al subir '{original.filename}': {str(e)}")
+        finally:
+            if file.stream is not original.stream:
+                file.stream.close()
+        
+        print(f"✅ {file.filename} uploaded successfully")
+        return {**result, "original_bytes": original.size}
+    
+    results = await asyncio.gather(
+        *(upload_one(i, file) for i, file in pending.values()),
+        return_exceptions=True
+    )
+    
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        uploaded = [r for r in results if isinstance(r, dict)]
+        if uploaded:
+            await asyncio.to_thread(_destroy_uploaded, uploaded)
+        raise errors[0]
+    
+    if pending:
+        known.update(await asyncio.to_thread(image_assets.record, list(zip(pending, results))))
+    
+    return [known[key] for key in keys]
+
+
+async def upload_files_to_cloudinary(
+    files: List[UploadFile], 
+    public_prefix: str = "post"
+) -> List[str]:
+    """
+    Upload actual files to the image storage (Cloudinary or local).
+    Accepts UploadFile objects from FastAPI.
+    Validates that all files are images.
+    """
+    return await upload_ingested(await ingest_files(files), public_prefix)
+
+
+def _record_upload(key: Optional[str], result: dict) -> str:
+    """Register an upload in the content index; returns the URL to use"""
+    if key is None:
+        return result["secure_url"]
+    return image_assets.record([(key, result)])[key]
 
 
 def upload_images_to_cloudinary(
     image_data_list: list[str], 
-    public_prefix: str = "post"
+    public_prefix: str = "post",
+    fresh: Optional[list] = None
 ) -> list[str]:
     """
     Upload images from URLs or base64.
     Validates image format before uploading.
+    fresh, if given, collects (content key, upload result) of each new upload.
     """
     uploaded_urls = []
     
@@ -114,12 +225,20 @@ def upload_images_to_cloudinary(
                     f"Debe ser una URL válida (http/https) o base64"
                 )
             
-            # Check if already on Cloudinary
-            if "cloudinary.com" in image_data:
-                print(f"✅ Image {i} is already on Cloudinary")
+            # Check if already in our image storage
+            if storage.backend.owns(image_data):
+                print(f"✅ Image {i} is already stored")
                 uploaded_urls.append(image_data)
                 continue
             
+            # Same bytes / same source URL uploaded before
+            key = image_assets.image_key(image_data)
+            existing = image_assets.lookup([key]).get(key) if key else None
+            if existing:
+                print(f"♻️ Image {i} already uploaded")
+                uploaded_urls.append(existing)
+                continue
+            
             # Validate URL format
             if image_data.startswith('http://') or image_data.startswith('https://'):
                 # Additional URL validation
@@ -127,25 +246,25 @@ def upload_images_to_cloudinary(
                     raise ValueError(f"URL {i} is too short: '{image_data}'")
                 
                 print(f"📤 Uploading image {i} from URL...")
-                result = cloudinary.uploader.upload(
+                result = storage.backend.upload(
                     image_data,
-                    public_id=f"{public_prefix}_{i}_{datetime.now().timestamp()}",
-                    resource_type="image",
-                    folder="posts"
+                    public_id=f"{public_prefix}_{i}_{datetime.now().timestamp()}"
                 )
-                uploaded_urls.append(result["secure_url"])
+                if fresh is not None:
+                    fresh.append((key, result))
+                uploaded_urls.append(_record_upload(key, result))
                 print(f"✅ Image {i} uploaded successfully")
                 
             # Validate base64 format
             elif image_data.startswith('data:image'):
                 print(f"📤 Uploading image {i} from base64...")
-                result = cloudinary.uploader.upload(
+                result = storage.backend.upload(
                     image_data,
-                    public_id=f"{public_prefix}_{i}_{datetime.now().timestamp()}",
-                    resource_type="image",
-                    folder="posts"
+                    public_id=f"{public_prefix}_{i}_{datetime.now().timestamp()}"
                 )
-                uploaded_urls.append(result["secure_url"])
+                if fresh is not None:
+                    fresh.append((key, result))
+                uploaded_urls.append(_record_upload(key, result))
                 print(f"✅ Image {i} uploaded successfully")
                 
             else:
@@ -159,6 +278,9 @@ def upload_images_to_cloudinary(
         except ValueError as ve:
             # Re-raise validation errors (will become 400 Bad Request)
             raise ve
+        except CircuitOpenError:
+            # Image storage is down (will become 503)
+            raise
         except Exception as e:
             # Convert other errors to validation errors
             print(f"❌ Error uploading image {i}: {str(e)}")
@@ -167,22 +289,78 @@ def upload_images_to_cloudinary(
     return uploaded_urls
 
 
+def save_posts(session: Session, posts: List[Post], refresh: bool = True) -> List[int]:
+    """
+    Commit new or changed posts in one transaction, keeping everything
+    derived from them (search index, suggestions, response cache) in sync.
+    Returns the post ids; refresh=False skips reloading each row afterwards.
+    """
+    for post in posts:
+        if inspect(post).persistent:
+            # Bumped in the UPDATE itself: two edits that loaded the same row still get distinct versions
+            post.version = Post.version + 1
+    image_assets.track_post_images(session, posts)
+    session.add_all(posts)
+    session.flush()
+    saved = [(post.post_id, post.name) for post in posts]
+    for post in posts:
+        search_service.index_post(session, post)
+    version = version_service.bump(session, POSTS_TABLE)
+    session.commit()
+    if refresh:
+        for post in posts:
+            session.refresh(post)
+    for post_id, name in saved:
+        suggest_index.post_names.add(post_id, name)
+        single_flight.post_reads.invalidate(post_id)
+    suggest_index.post_names.advance(version)
+    response_cache.invalidate(POSTS_TABLE, version)
+    return [post_id for post_id, _ in saved]
+
+
+def _save_post(session: Session, post: Post):
+    save_posts(session, [post])
+
+
 async def create_post_with_files(
-    session: Session,
+    session: DbSession,
     name: str,
     content: str,
     price: float,
     image_files: List[UploadFile],
-    category_id: Optional[int] = None 
+    category_id: Optional[int] = None,
+    background: bool = False
 ) -> Post:
     """
     Create a post with file uploads.
+    background=True saves the post right away with status "processing"
+    and leaves the uploads to the image job workers.
     """
     # Validate number of images
     if len(image_files) > 10:
         raise ValueError("Max 10 images")
     
-    # Upload files to Cloudinary
+    if background:
+        from app.services import image_jobs
+        ingested = await ingest_files(image_files)
+        staged = await asyncio.to_thread(image_jobs.stage_files, ingested)
+        new_post = Post(
+            name=name,
+            content=content,
+            price=price,
+            images=[],
+            category_id=category_id,
+            status=PostStatus.processing.value
+        )
+        await run_db(session, _save_post, new_post)
+        try:
+            await image_jobs.enqueue(new_post.post_id, staged)
+        except Exception:
+            await asyncio.to_thread(image_jobs.finish_post, new_post.post_id, None, staged)
+            raise
+        return new_post
+    
+    # Upload files to the image storage
     print(f"📤 Processing {len(image_files)} file uploads...")
     image_urls = await upload_files_to_cloudinary(
         image_files,
@@ -198,76 +376,212 @@ async def create_post_with_files(
         category_id=category_id
     )
     
-    # Save to database
-    session.add(new_post)
-    session.commit()
-    session.refresh(new_post)
+    # Save to database (threadpool or async driver, never on the event loop)
+    await run_db(session, _save_post, new_post)
     
     return new_post
 
 
-def create_post(session: Session, post_data: Post) -> Post:
+async def create_post(session: DbSession, post_data: Post) -> Post:
     """
     Create a post with URLs (legacy support).
+    The images are fetched and uploaded in a worker thread, outside the
+    database session, so async sessions never run them on the event loop.
     """
     if len(post_data.images) > 10:
         raise ValueError("Max 10 images")
     
     if post_data.images and len(post_data.images) > 0:
         print(f"📤 Processing {len(post_data.images)} images...")
-        post_data.images = upload_images_to_cloudinary(
+        post_data.images = await asyncio.to_thread(
+            upload_images_to_cloudinary,
             post_data.images,
             public_prefix=f"post_{datetime.now().timestamp()}"
         )
     
-    session.add(post_data)
-    session.commit()
-    session.refresh(post_data)
+    await run_db(session, _save_post, post_data)
     
     return post_data
 
 
-def get_posts(session: Session):
-    return session.exec(select(Post)).all()
+def get_posts(
+    session: Session,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    category_id: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    sort: PostSort = PostSort.created_at_asc,
+    expand_category: bool = False,
+    as_rows: bool = False,
+    fields: Optional[Tuple[str, ...]] = None
+) -> Page:
+    """
+    Filtered, sorted page of posts.
+    Filters and sort line up with the composite indexes on Post.
+    as_rows=True returns column rows for fast_json instead of ORM objects,
+    limited to fields (a sparse fieldset) when given.
+    """
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise ValueError("min_price cannot be greater than max_price")
+    
+    statement = select(Post)
+    if category_id is not None:
+        statement = statement.where(Post.category_id == category_id)
+    if min_price is not None:
+        statement = statement.where(Post.price >= min_price)
+    if max_price is not None:
+        statement = statement.where(Post.price <= max_price)
+    if created_after is not None:
+        statement = statement.where(Post.created_at >= created_after)
+    if created_before is not None:
+        statement = statement.where(Post.created_at < created_before)
+    if as_rows:
+        # The cursor is built from the sort key, even when it isn't a requested field
+        statement = fast_json.post_columns(statement, expand_category, fields, keys=("post_id", sort.column_name))
+    elif expand_category:
+        # One extra IN query for the whole page instead of one per post
+        statement = statement.options(selectinload(Post.category))
+    
+    return paginate_posts(session, statement, limit, cursor, sort, as_rows=as_rows)
+
+
+def get_posts_by_category(
+    session: Session,
+    category_id: int,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    expand_category: bool = False,
+    as_rows: bool = False,
+    fields: Optional[Tuple[str, ...]] = None
+) -> Page:
+    return get_posts(
+        session,
+        limit=limit,
+        cursor=cursor,
+        category_id=category_id,
+        expand_category=expand_category,
+        as_rows=as_rows,
+        fields=fields
+    )
 
 
-def get_post(session: Session, post_id: int):
+def get_post(
+    session: Session,
+    post_id: int,
+    expand_category: bool = False,
+    fields: Optional[Tuple[str, ...]] = None
+):
+    """The post, or with fields just those columns (and its version) as a row (see fast_json.post_columns)"""
+    if fields:
+        statement = fast_json.post_columns(
+            select(Post).where(Post.post_id == post_id), expand_category, fields, keys=("version",)
+        )
+        return session.execute(statement).first()
+    if expand_category:
+        return session.get(Post, post_id, options=[joinedload(Post.category)])
     return session.get(Post, post_id)
 
 
-def update_post(session: Session, post_id: int, data: dict) -> Post | None:
+def _changes_for(
+    session: Session,
+    post_id: int,
+    data: dict,
+    expected_version: Optional[int] = None
+) -> Optional[Tuple[Post, dict]]:
+    """The post and the values of data that differ from it, validated"""
     post = session.get(Post, post_id)
     if not post:
         return None
     
+    if expected_version is not None and post.version != expected_version:
+        raise VersionConflict(
+            f"El post {post_id} fue modificado (versión {post.version}, se esperaba {expected_version})"
+        )
+    
+    changes = {key: value for key, value in data.items() if getattr(post, key) != value}
+    
     # Validate number of images
-    if "images" in data and len(data["images"]) > 10:
+    if "images" in changes and len(changes["images"]) > 10:
         raise ValueError("Máximo 10 imágenes permitidas")
     
     # Validate category exists if being updated
-    if "category_id" in data and data["category_id"] is not None:
-        from app.models.category_model import Category
-        category = session.get(Category, data["category_id"])
+    if "category_id" in changes and changes["category_id"] is not None:
+        from app.services import category_service
+        category = category_service.get_category(session, changes["category_id"])
         if not category:
-            raise ValueError(f"Categoría con ID {data['category_id']} no existe")
-    
-    # Upload new images if provided
-    if "images" in data and data["images"]:
-        print(f"📤 Processing {len(data['images'])} images for update...")
-        data["images"] = upload_images_to_cloudinary(
-            data["images"],
-            public_prefix=f"post_{post_id}"
-        )
+            raise ValueError(f"Categoría con ID {changes['category_id']} no existe")
+    
+    return post, changes
+
+
+def _apply_changes(session: Session, post: Post, changes: dict, expected_version: Optional[int] = None):
+    if expected_version is not None:
+        # Uploads take a while: make sure nobody saved meanwhile, and hold the row until commit
+        claimed = session.execute(
+            update(Post)
+            .where(Post.post_id == post.post_id, Post.version == expected_version)
+            .values(version=expected_version)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            session.rollback()
+            raise VersionConflict(f"El post {post.post_id} fue modificado mientras se procesaba la edición")
     
     # Update post fields
-    for key, value in data.items():
+    for key, value in changes.items():
         setattr(post, key, value)
     
     post.updated_at = datetime.now()
     
-    session.add(post)
-    session.commit()
-    session.refresh(post)
+    _save_post(session, post)
+
+
+async def update_post(
+    session: DbSession,
+    post_id: int,
+    data: dict,
+    expected_version: Optional[int] = None
+) -> Post | None:
+    """
+    Apply data (every field for PUT, the ones sent for PATCH) to a post.
+    Only values that differ are written, and only images the post doesn't
+    already have are uploaded, in a worker thread between the two database
+    steps. With expected_version the edit applies on top of that version
+    only (VersionConflict otherwise): checked before any upload and again,
+    under the row's write lock, before saving.
+    """
+    found = await run_db(session, _changes_for, post_id, data, expected_version)
+    if found is None:
+        return None
+    post, changes = found
+    if not changes:
+        return post
+    
+    # Upload only the images that are new to this post
+    fresh = []
+    if "images" in changes:
+        current = set(post.images or [])
+        new_images = list(dict.fromkeys(image for image in changes["images"] if image not in current))
+        if new_images:
+            print(f"📤 Processing {len(new_images)} new images for update...")
+            uploaded = dict(zip(new_images, await asyncio.to_thread(
+                upload_images_to_cloudinary,
+                new_images,
+                public_prefix=f"post_{post_id}",
+                fresh=fresh
+            )))
+            changes["images"] = [uploaded.get(image, image) for image in changes["images"]]
+    
+    try:
+        await run_db(session, _apply_changes, post, changes, expected_version)
+    except Exception:
+        # The edit didn't land (e.g. lost the version race): its uploads would be orphans
+        if fresh:
+            await asyncio.to_thread(discard_uploads, fresh)
+        raise
     
     return post
 
@@ -278,13 +592,27 @@ def delete_post(session: Session, post_id: int):
         return None
     
     session.delete(post)
+    image_assets.release_post_images(session, post)
+    search_service.remove_post(session, post_id)
+    version = version_service.bump(session, POSTS_TABLE)
     session.commit()
+    suggest_index.post_names.remove(post_id)
+    suggest_index.post_names.advance(version)
+    single_flight.post_reads.invalidate(post_id)
+    response_cache.invalidate(POSTS_TABLE, version)
     
     return True
 
-def search_posts_by_name(session: Session, name: str) -> List[Post]:
-    posts = session.exec(
-        select(Post).where(Post.name.ilike(f"%{name}%"))
-    ).all()
-    
-    return posts
\ No newline at end of file
+def search_posts_by_name(
+    session: Session,
+    name: str,
+    limit: int = 20,
+    offset: int = 0,
+    expand_category: bool = False,
+    as_rows: bool = False,
+    fields: Optional[Tuple[str, ...]] = None
+) -> List[Post]:
+    """Full-text search over name and content, ranked by relevance"""
+    return search_service.search_posts(
+        session, name, limit=limit, offset=offset, expand_category=expand_category, as_rows=as_rows, fields=fields
+    )
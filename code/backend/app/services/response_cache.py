@@ -0,0 +1,203 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Tuple
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlmodel import Session
+from app.services import version_service
+
+# Serialized-response LRU, bounded by total body size and entry age
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+
+# How often (seconds) table versions are re-read from the database,
+# i.e. how long another worker's write can go unnoticed
+VERSION_CHECK_INTERVAL = float(os.getenv("RESPONSE_CACHE_VERSION_CHECK_INTERVAL", "1"))
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "tables", "versions", "expires_at")
+
+    def __init__(self, body: bytes, etag: str, tables: Tuple[str, ...], versions: Tuple[int, ...], expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.tables = tables
+        self.versions = versions
+        self.expires_at = expires_at
+
+
+class Versioned(NamedTuple):
+    """
+    What build() returns for a single versioned row (cached_entry only): the
+    ETag then starts with the row version, so clients can send it back in If-Match.
+    """
+    body: Any
+    version: int
+
+
+class ResponseCache:
+    """LRU of serialized response bodies"""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries: "OrderedDict[Any, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, versions: Tuple[int, ...]) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.versions != versions or entry.expires_at < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry: CacheEntry):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self.size += len(entry.body)
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, table: str):
+        """Drop every entry built from `table`"""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if table in e.tables]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self.size -= len(entry.body)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL)
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _adapter(response_type) -> TypeAdapter:
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    return adapter
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+def invalidate(table: str, version: int):
+    """Called by write functions once their transaction has committed"""
+    version_service.remember(table, version)
+    cache.invalidate(table)
+
+
+def request_key(request: Request) -> tuple:
+    """Route and query string: what makes two reads identical"""
+    return (request.url.path, tuple(sorted(request.query_params.multi_items())))
+
+
+def _versions_and_etag(session: Session, key: tuple, tables: Tuple[str, ...]) -> Tuple[Tuple[int, ...], str]:
+    versions = tuple(
+        version_service.current(session, table, max_age=VERSION_CHECK_INTERVAL)
+        for table in tables
+    )
+    etag = '"' + hashlib.sha1(repr((key, tables, versions)).encode()).hexdigest() + '"'
+    return versions, etag
+
+
+def _get_or_build(
+    session: Session,
+    key: tuple,
+    tables: Tuple[str, ...],
+    versions: Tuple[int, ...],
+    etag: str,
+    response_type,
+    build: Callable[[Session], Any]
+) -> Tuple[CacheEntry, str]:
+    entry = cache.get(key, versions)
+    if entry is not None:
+        return entry, "HIT"
+
+    body = build(session)
+    if isinstance(body, Versioned):
+        # "<version>-<hash>": still changes with the tables, and leads with what If-Match checks
+        etag = f'"{body.version}-{etag[1:-1]}"'
+        body = body.body
+    if not isinstance(body, bytes):
+        adapter = _adapter(response_type)
+        body = adapter.dump_json(adapter.validate_python(body, from_attributes=True))
+    entry = CacheEntry(body, etag, tables, versions, time.monotonic() + cache.ttl)
+    cache.put(key, entry)
+    return entry, "MISS"
+
+
+def cached_entry(
+    session: Session,
+    key: tuple,
+    tables: Tuple[str, ...],
+    response_type,
+    build: Callable[[Session], Any]
+) -> Tuple[CacheEntry, str]:
+    """
+    The cached body for key, built on a miss, plus "HIT"/"MISS".
+    For callers sharing one entry between requests; entry_response() turns it into each one's reply.
+    """
+    versions, etag = _versions_and_etag(session, key, tables)
+    return _get_or_build(session, key, tables, versions, etag, response_type, build)
+
+
+def entry_response(request: Request, entry: CacheEntry, status: str) -> Response:
+    """200 with the cached body, or 304 when the client already has it"""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    headers["X-Cache"] = status
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def cached_json_response(
+    session: Session,
+    request: Request,
+    tables: Tuple[str, ...],
+    response_type,
+    build: Callable[[Session], Any]
+) -> Response:
+    """
+    Serve a read endpoint from the cache; build(session) produces the body on a miss,
+    either as data validated against response_type or as already encoded JSON bytes.
+    The ETag comes from the route, query string and table versions, so a
+    matching If-None-Match gets a 304 without building anything.
+    """
+    key = request_key(request)
+    versions, etag = _versions_and_etag(session, key, tables)
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    entry, status = _get_or_build(session, key, tables, versions, etag, response_type, build)
+    return entry_response(request, entry, status)
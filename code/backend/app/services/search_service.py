@@ -0,0 +1,136 @@
+import re
+from typing import List, Optional, Tuple
+from sqlalchemy import column, literal_column, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, func, or_, select
+from app.models.post_model import Post
+from app.services import fast_json
+
+# Full-text search over post name + content.
+#   PostgreSQL: generated tsvector column + GIN index (kept up to date by Postgres)
+#   SQLite: FTS5 table kept in sync by index_post/remove_post
+#   Anything else: ILIKE fallback
+_backend = "like"
+
+post_fts = table("post_fts", column("rowid"), column("name"), column("content"))
+search_vector = literal_column("post.search_vector")
+
+
+def setup_search_index(engine: Engine):
+    """Create the full-text index for the current database (idempotent)"""
+    global _backend
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text("""
+                ALTER TABLE post ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+                    setweight(to_tsvector('simple', coalesce(content, '')), 'B')
+                ) STORED
+            """))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_post_search_vector ON post USING GIN (search_vector)"
+            ))
+        _backend = "postgres"
+
+    elif engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'post_fts'"
+            )).first()
+            if not exists:
+                try:
+                    conn.execute(text(
+                        "CREATE VIRTUAL TABLE post_fts USING fts5("
+                        "name, content, tokenize = 'unicode61 remove_diacritics 2')"
+                    ))
+                except Exception as e:
+                    print(f"⚠️ FTS5 not available, search falls back to LIKE: {str(e)}")
+                    _backend = "like"
+                    return
+                # Backfill existing posts
+                conn.execute(text(
+                    "INSERT INTO post_fts (rowid, name, content) SELECT post_id, name, content FROM post"
+                ))
+        _backend = "fts5"
+
+    else:
+        _backend = "like"
+
+
+def _terms(term: str) -> List[str]:
+    """Split a search string into plain word tokens"""
+    return re.findall(r"\w+", term.lower())
+
+
+def index_post(session: Session, post: Post):
+    """Add or refresh a post in the search index (same transaction as the write)"""
+    if _backend != "fts5":
+        return
+
+    remove_post(session, post.post_id)
+    session.execute(
+        post_fts.insert().values(rowid=post.post_id, name=post.name, content=post.content)
+    )
+
+
+def remove_post(session: Session, post_id: int):
+    """Drop a post from the search index"""
+    if _backend != "fts5":
+        return
+
+    session.execute(post_fts.delete().where(post_fts.c.rowid == post_id))
+
+
+def search_posts(
+    session: Session,
+    term: str,
+    limit: int = 20,
+    offset: int = 0,
+    expand_category: bool = False,
+    as_rows: bool = False,
+    fields: Optional[Tuple[str, ...]] = None
+) -> List[Post]:
+    """Search posts by name and content, best matches first (as_rows, fields: see fast_json)"""
+    words = _terms(term)
+    if not words:
+        return []
+
+    if _backend == "postgres":
+        # Prefix match on every word: "red sho" -> red:* & sho:*
+        query = func.to_tsquery("simple", " & ".join(f"{word}:*" for word in words))
+        statement = (
+            select(Post)
+            .where(search_vector.op("@@")(query))
+            .order_by(func.ts_rank(search_vector, query).desc(), Post.post_id)
+        )
+
+    elif _backend == "fts5":
+        query = " ".join(f'"{word}"*' for word in words)
+        statement = (
+            select(Post)
+            .join(post_fts, post_fts.c.rowid == Post.post_id)
+            .where(text("post_fts MATCH :query").bindparams(query=query))
+            # Name matches weigh more than content matches
+            .order_by(text("bm25(post_fts, 10.0, 1.0)"), Post.post_id)
+        )
+
+    else:
+        pattern = f"%{term}%"
+        statement = (
+            select(Post)
+            .where(or_(Post.name.ilike(pattern), Post.content.ilike(pattern)))
+            .order_by(Post.post_id)
+        )
+
+    if as_rows:
+        statement = fast_json.post_columns(statement, expand_category, fields)
+    elif expand_category:
+        statement = statement.options(selectinload(Post.category))
+
+    statement = statement.limit(limit).offset(offset)
+    if as_rows:
+        return session.execute(statement).all()
+    return session.exec(statement).all()
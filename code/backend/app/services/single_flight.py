@@ -0,0 +1,123 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+# Concurrent identical GET /posts/{post_id} share one fetch. A finished
+# result may also be reused for this long (seconds, 0 = only while in flight)
+POST_READ_MICRO_TTL = float(os.getenv("POST_READ_MICRO_TTL", "0"))
+
+
+# Expired results are swept once the map grows past this
+_SWEEP_SIZE = 1024
+
+
+class _Flight:
+    __slots__ = ("future", "stale")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.stale = False
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one. Keys are
+    (group, ...) tuples; invalidate(group) drops every key of a group, so
+    callers arriving after a write never join a fetch that started before it.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.calls = 0
+        self.shared = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._results: Dict[Hashable, Tuple[Any, float]] = {}
+        # Invalidation comes from worker threads (sync service code)
+        self._lock = threading.Lock()
+
+    async def do(self, key: tuple, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Result of fn() for this key, and whether it came from another caller"""
+        with self._lock:
+            self.calls += 1
+        while True:
+            with self._lock:
+                cached = self._results.get(key)
+                if cached is not None:
+                    if cached[1] > time.monotonic():
+                        self.shared += 1
+                        return cached[0], True
+                    del self._results[key]
+
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = _Flight(asyncio.get_running_loop().create_future())
+                    self._flights[key] = flight
+                    leader = True
+                else:
+                    self.shared += 1
+                    leader = False
+
+            if leader:
+                return await self._lead(key, flight, fn), False
+
+            try:
+                return await asyncio.shield(flight.future), True
+            except asyncio.CancelledError:
+                # The leader's request went away: try again, unless we are the ones being cancelled
+                if flight.future.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+    async def _lead(self, key: tuple, flight: _Flight, fn: Callable[[], Awaitable[Any]]):
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._land(key, flight)
+            if isinstance(e, Exception):
+                # Followers get the same error (e.g. the 404)
+                flight.future.set_exception(e)
+                flight.future.exception()  # retrieved: no warning when nobody was waiting
+            else:
+                flight.future.cancel()
+            raise
+
+        if self._land(key, flight) and self.ttl > 0:
+            now = time.monotonic()
+            with self._lock:
+                if len(self._results) >= _SWEEP_SIZE:
+                    for expired in [k for k, (_, expires_at) in self._results.items() if expires_at <= now]:
+                        del self._results[expired]
+                self._results[key] = (result, now + self.ttl)
+        flight.future.set_result(result)
+        return result
+
+    def _land(self, key: tuple, flight: _Flight) -> bool:
+        """Retire a finished flight; False when its group was invalidated meanwhile"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            return not flight.stale
+
+    def invalidate(self, group: Hashable):
+        with self._lock:
+            if not self._flights and not self._results:
+                return
+            for key in [k for k in self._flights if k[0] == group]:
+                # Its result may predate the write: hand it to the current followers only
+                self._flights.pop(key).stale = True
+            for key in [k for k in self._results if k[0] == group]:
+                del self._results[key]
+
+    def stats(self) -> dict:
+        return {
+            "micro_ttl": self.ttl,
+            "in_flight": len(self._flights),
+            "cached": len(self._results),
+            "calls": self.calls,
+            "shared": self.shared,
+        }
+
+
+post_reads = SingleFlight(POST_READ_MICRO_TTL)
@@ -0,0 +1,270 @@
+import base64
+import binascii
+import hashlib
+import ipaddress
+import os
+import re
+import socket
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+from urllib.parse import urljoin, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from app.services import cloudinary_client
+from app.services.ingest_service import CHUNK_SIZE, MAX_FILE_SIZE, sniff_image_type
+
+# Where post images live:
+#   cloudinary: Cloudinary (needs the cloudinary_* secrets)
+#   local:      content-addressed files under IMAGE_STORAGE_DIR, served by /images
+IMAGE_STORAGE = os.getenv("IMAGE_STORAGE", "cloudinary")
+IMAGE_STORAGE_DIR = Path(os.getenv("IMAGE_STORAGE_DIR", "media"))
+# Public prefix of local image URLs (the app is mounted under /api/v1)
+IMAGE_STORAGE_BASE_URL = os.getenv("IMAGE_STORAGE_BASE_URL", "/api/v1/images").rstrip("/")
+# Timeout (seconds) when the local store fetches a source URL
+IMAGE_FETCH_TIMEOUT = float(os.getenv("IMAGE_FETCH_TIMEOUT", "15"))
+# Redirects followed when fetching a source URL (each hop is checked again)
+IMAGE_FETCH_MAX_REDIRECTS = int(os.getenv("IMAGE_FETCH_MAX_REDIRECTS", "3"))
+
+Source = Union[str, BinaryIO]
+
+
+class StorageBackend(ABC):
+    """
+    Where uploaded images go. upload() takes a file object, an http(s)
+    URL or a data URI and returns {"secure_url", "public_id", "bytes"},
+    plus "existed": True when the store already held that very object.
+    """
+    name = ""
+
+    def setup(self):
+        pass
+
+    @abstractmethod
+    def upload(self, source: Source, public_id: str, filename: Optional[str] = None) -> dict:
+        ...
+
+    @abstractmethod
+    def destroy(self, public_id: str):
+        ...
+
+    @abstractmethod
+    def owns(self, url: str) -> bool:
+        """True for URLs this backend already serves (no upload needed)"""
+
+
+class CloudinaryStorage(StorageBackend):
+    name = "cloudinary"
+
+    def configure(self, cloud_name: str, api_key: str, api_secret: str):
+        cloudinary_client.client.configure(
+            cloud_name=cloud_name,
+            api_key=api_key,
+            api_secret=api_secret,
+            secure=True
+        )
+
+    def upload(self, source: Source, public_id: str, filename: Optional[str] = None) -> dict:
+        # The SDK reads a file object whole (cloudinary.utils.handle_file_parameter)
+        # and sends it in one multipart body; files are capped at MAX_FILE_SIZE
+        options = {"filename": filename} if filename else {}
+        return cloudinary_client.client.upload(
+            source,
+            public_id=public_id,
+            resource_type="image",
+            folder="posts",  # Organize in a folder
+            **options
+        )
+
+    def destroy(self, public_id: str):
+        cloudinary_client.client.destroy(public_id, resource_type="image")
+
+    def owns(self, url: str) -> bool:
+        return "cloudinary.com" in url
+
+
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/bmp": "bmp",
+    "image/tiff": "tiff",
+    "image/svg+xml": "svg",
+}
+
+MEDIA_TYPES = {extension: media_type for media_type, extension in EXTENSIONS.items()}
+
+# <sha256>.<ext>: the only names the local store creates or serves
+LOCAL_PUBLIC_ID = re.compile(r"^[0-9a-f]{64}\.(" + "|".join(MEDIA_TYPES) + r")$")
+
+
+def _check_address(host: str, address: str):
+    """Refuse loopback, private, link-local and other non-public addresses"""
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    if not ip.is_global or ip.is_multicast:
+        raise ValueError(f"URL no permitida: '{host}' no es una dirección pública")
+
+
+def _check_fetch_url(url: str):
+    """
+    Refuse source URLs the server shouldn't fetch itself: anything but
+    http(s), and hosts resolving to loopback, private, link-local or
+    other non-public addresses (internal services, cloud metadata).
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"URL no permitida: '{url[:100]}'")
+    try:
+        addresses = socket.getaddrinfo(parts.hostname, parts.port or 80, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise ValueError(f"No se pudo resolver el host '{parts.hostname}'")
+    for _, _, _, _, sockaddr in addresses:
+        _check_address(parts.hostname, sockaddr[0])
+
+
+class _PublicPeerMixin:
+    """
+    Checks the address of the socket actually opened, before anything is
+    sent: the name is resolved again when connecting, and a DNS-rebinding
+    host can answer with an internal address the second time.
+    """
+
+    def _new_conn(self):
+        sock = super()._new_conn()
+        try:
+            _check_address(self.host, sock.getpeername()[0])
+        except ValueError:
+            sock.close()
+            raise
+        return sock
+
+
+class _PublicHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = type("PublicHTTPConnection", (_PublicPeerMixin, HTTPConnection), {})
+
+
+class _PublicHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = type("PublicHTTPSConnection", (_PublicPeerMixin, HTTPSConnection), {})
+
+
+class _PublicOnlyAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _PublicHTTPConnectionPool,
+            "https": _PublicHTTPSConnectionPool,
+        }
+
+
+_fetch_session = requests.Session()
+# Connect directly: through a proxy the peer would be the proxy, not the source host
+_fetch_session.trust_env = False
+_fetch_session.mount("http://", _PublicOnlyAdapter())
+_fetch_session.mount("https://", _PublicOnlyAdapter())
+
+
+def _fetch(url: str) -> requests.Response:
+    """Streamed GET of a source URL, following a few redirects, each one checked"""
+    for _ in range(IMAGE_FETCH_MAX_REDIRECTS + 1):
+        _check_fetch_url(url)
+        response = _fetch_session.get(url, stream=True, timeout=IMAGE_FETCH_TIMEOUT, allow_redirects=False)
+        if not response.is_redirect:
+            return response
+        response.close()
+        url = urljoin(url, response.headers["location"])
+    raise ValueError(f"Demasiadas redirecciones (máximo {IMAGE_FETCH_MAX_REDIRECTS})")
+
+
+class LocalStorage(StorageBackend):
+    """
+    Content-addressed files: <root>/<first 2 hex>/<sha256>.<ext>.
+    The same bytes always land on the same path, so writes are idempotent.
+    """
+    name = "local"
+
+    def __init__(self, root: Path, base_url: str):
+        self.root = root
+        self.base_url = base_url
+
+    def setup(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, public_id: str) -> Optional[Path]:
+        """Path of a stored image, None for anything that isn't a valid public_id"""
+        if not LOCAL_PUBLIC_ID.match(public_id):
+            return None
+        return self.root / public_id[:2] / public_id
+
+    def _chunks(self, source: Source):
+        if isinstance(source, str):
+            if source.startswith("data:image"):
+                try:
+                    yield base64.b64decode(source.split(",", 1)[1], validate=True)
+                except (IndexError, binascii.Error) as e:
+                    raise ValueError(f"Invalid base64 image: {str(e)}")
+                return
+            with _fetch(source) as response:
+                response.raise_for_status()
+                yield from response.iter_content(CHUNK_SIZE)
+            return
+        source.seek(0)
+        while chunk := source.read(CHUNK_SIZE):
+            yield chunk
+
+    def upload(self, source: Source, public_id: str, filename: Optional[str] = None) -> dict:
+        self.setup()
+        digest = hashlib.sha256()
+        size = 0
+        media_type = None
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in self._chunks(source):
+                    if size == 0:
+                        media_type = sniff_image_type(chunk)
+                        if media_type is None:
+                            raise ValueError(f"'{filename or 'image'}' no es una imagen válida")
+                    size += len(chunk)
+                    if size > MAX_FILE_SIZE:
+                        raise ValueError(f"'{filename or 'image'}' supera el tamaño máximo")
+                    digest.update(chunk)
+                    out.write(chunk)
+            if size == 0:
+                raise ValueError(f"'{filename or 'image'}' está vacío")
+
+            stored_id = f"{digest.hexdigest()}.{EXTENSIONS[media_type]}"
+            path = self.path_for(stored_id)
+            path.parent.mkdir(exist_ok=True)
+            # Someone else's upload of the same bytes: not ours to destroy
+            existed = path.exists()
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        return {"secure_url": f"{self.base_url}/{stored_id}", "public_id": stored_id, "bytes": size, "existed": existed}
+
+    def destroy(self, public_id: str):
+        path = self.path_for(public_id)
+        if path is not None and path.exists():
+            path.unlink()
+
+    def owns(self, url: str) -> bool:
+        return url.startswith(self.base_url + "/")
+
+
+BACKENDS = {
+    "cloudinary": lambda: CloudinaryStorage(),
+    "local": lambda: LocalStorage(IMAGE_STORAGE_DIR, IMAGE_STORAGE_BASE_URL),
+}
+
+if IMAGE_STORAGE not in BACKENDS:
+    raise RuntimeError(f"IMAGE_STORAGE must be one of: {', '.join(BACKENDS)}")
+
+backend: StorageBackend = BACKENDS[IMAGE_STORAGE]()
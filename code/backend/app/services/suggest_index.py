@@ -0,0 +1,118 @@
+import os
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+from sqlmodel import Session, select
+from app.models.post_model import Post
+from app.services import version_service
+
+# How often (seconds) a worker checks the shared version counter
+# to notice posts written by other workers
+SUGGEST_INDEX_CHECK_INTERVAL = float(os.getenv("SUGGEST_INDEX_CHECK_INTERVAL", "5"))
+
+TABLE = Post.__tablename__
+
+
+class PrefixIndex:
+    """
+    In-memory prefix index of post names (sorted array + bisect).
+    Every name is indexed whole and from the start of each word,
+    so "roj" finds "Zapatos rojos".
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[str, int]] = []
+        self._entries: Dict[int, Tuple[str, List[Tuple[str, int]]]] = {}
+        self._lock = threading.Lock()
+        # Version of the post table the index reflects
+        self.version = -1
+        # Held while rebuilding from the database, so write-throughs wait for the new arrays
+        self.write_lock = threading.RLock()
+
+    @staticmethod
+    def _keys_for(post_id: int, name: str) -> List[Tuple[str, int]]:
+        words = name.casefold().split()
+        return sorted({(" ".join(words[i:]), post_id) for i in range(len(words))})
+
+    def build(self, rows: List[Tuple[int, str]], version: int = -1):
+        """Replace the whole index with (post_id, name) rows as of a table version"""
+        entries = {post_id: (name, self._keys_for(post_id, name)) for post_id, name in rows}
+        keys = sorted(key for _, post_keys in entries.values() for key in post_keys)
+        with self._lock:
+            self._entries = entries
+            self._keys = keys
+            self.version = version
+
+    def add(self, post_id: int, name: str):
+        """Index a new post or re-index a renamed one"""
+        with self.write_lock, self._lock:
+            self._remove_locked(post_id)
+            post_keys = self._keys_for(post_id, name)
+            for key in post_keys:
+                insort(self._keys, key)
+            self._entries[post_id] = (name, post_keys)
+
+    def remove(self, post_id: int):
+        with self.write_lock, self._lock:
+            self._remove_locked(post_id)
+
+    def advance(self, version: int):
+        """After the write-throughs of a committed write, which bumped the table to version"""
+        with self.write_lock:
+            # Missed someone else's write in between: the next check rebuilds
+            if version == self.version + 1:
+                self.version = version
+
+    def _remove_locked(self, post_id: int):
+        entry = self._entries.pop(post_id, None)
+        if not entry:
+            return
+        for key in entry[1]:
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Top `limit` posts whose name (or a word in it) starts with prefix"""
+        prefix = " ".join(prefix.casefold().split())
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._keys, (prefix, -1))
+            while position < len(self._keys) and len(results) < limit:
+                key, post_id = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                if post_id not in seen:
+                    seen.add(post_id)
+                    results.append({"post_id": post_id, "name": self._entries[post_id][0]})
+                position += 1
+        return results
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Shared by the whole process, built in the app lifespan
+post_names = PrefixIndex()
+
+
+def build_post_name_index(session: Session):
+    """Load every post name into the prefix index"""
+    with post_names.write_lock:
+        version = version_service.current(session, TABLE)
+        post_names.build(session.exec(select(Post.post_id, Post.name)).all(), version)
+
+
+def refresh_if_stale(session: Session):
+    """Rebuild when another worker changed the post table"""
+    # Only move forward: a lagging replica must not roll the index back
+    if version_service.current(session, TABLE, max_age=SUGGEST_INDEX_CHECK_INTERVAL) <= post_names.version:
+        return
+    with post_names.write_lock:
+        # Concurrent requests noticed it too: rebuild once
+        if version_service.current(session, TABLE, max_age=SUGGEST_INDEX_CHECK_INTERVAL) > post_names.version:
+            build_post_name_index(session)
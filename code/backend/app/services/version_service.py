@@ -0,0 +1,69 @@
+import threading
+import time
+from typing import Dict, Tuple
+from sqlalchemy import update
+from sqlmodel import Session
+from app.database import ReadOnlySession
+from app.models.table_version_model import TableVersion
+
+# Last version seen per (database, table), and when it was read:
+# {("primary" | "replica", name): (version, monotonic time)}
+_seen: Dict[Tuple[str, str], Tuple[int, float]] = {}
+_lock = threading.Lock()
+
+
+def ensure_version(session: Session, name: str):
+    """Create the counter row for a table if missing"""
+    if not session.get(TableVersion, name):
+        session.add(TableVersion(name=name, version=0))
+        session.commit()
+
+
+def bump(session: Session, name: str) -> int:
+    """
+    Increment a table's version inside the caller's transaction.
+    Returns the new version; call remember() once the transaction commits.
+    """
+    result = session.execute(
+        update(TableVersion)
+        .where(TableVersion.name == name)
+        .values(version=TableVersion.version + 1)
+        .returning(TableVersion.version)
+    ).first()
+    if result is None:
+        session.add(TableVersion(name=name, version=1))
+        session.flush()
+        return 1
+    return result[0]
+
+
+def _source(session: Session) -> str:
+    """A replica can lag behind the primary, so their versions are tracked apart"""
+    return "replica" if isinstance(session, ReadOnlySession) else "primary"
+
+
+def remember(name: str, version: int):
+    """Record a version this process just wrote"""
+    key = ("primary", name)
+    with _lock:
+        seen = _seen.get(key)
+        if seen is None or version >= seen[0]:
+            _seen[key] = (version, time.monotonic())
+
+
+def current(session: Session, name: str, max_age: float = 0) -> int:
+    """
+    A table's version. Reads the database at most every `max_age`
+    seconds, so other workers' writes are noticed within that window.
+    """
+    key = (_source(session), name)
+    with _lock:
+        seen = _seen.get(key)
+    if seen is not None and time.monotonic() - seen[1] < max_age:
+        return seen[0]
+
+    row = session.get(TableVersion, name, populate_existing=True)
+    version = row.version if row else 0
+    with _lock:
+        _seen[key] = (version, time.monotonic())
+    return version
@@ -0,0 +1,128 @@
+"""
+Query plans for the filtered / sorted post listings.
+
+Seeds a throwaway database and prints the plan of every GET /posts/
+filter + sort combination, flagging the ones that fall back to a
+sequential scan.
+
+    cd code/backend
+    python -m bench.explain_post_queries --posts 50000
+
+Uses BENCH_DATABASE_URL when set (e.g. a scratch PostgreSQL database,
+its post/category tables get truncated), otherwise a temporary SQLite file.
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import event, text
+from sqlmodel import SQLModel, Session, create_engine
+from app.models.category_model import Category
+from app.models.post_model import Post
+from app.services import post_service
+from app.services.pagination import PostSort
+
+
+SCENARIOS = [
+    ("newest first", {"sort": PostSort.created_at_desc}),
+    ("cheapest first", {"sort": PostSort.price_asc}),
+    ("price range", {"min_price": 100, "max_price": 200, "sort": PostSort.price_asc}),
+    ("category", {"category_id": 7}),
+    ("category by price", {"category_id": 7, "sort": PostSort.price_desc}),
+    ("category + price range", {"category_id": 7, "min_price": 100, "max_price": 200, "sort": PostSort.price_asc}),
+    ("created window", {"created_after": datetime(2024, 3, 1), "created_before": datetime(2024, 4, 1)}),
+]
+
+
+def seed(engine, posts: int, categories: int):
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM post"))
+        conn.execute(text("DELETE FROM category"))
+        conn.execute(Category.__table__.insert(), [
+            {"category_id": i, "name": f"Category {i}", "created_at": start}
+            for i in range(1, categories + 1)
+        ])
+        batch = []
+        for i in range(1, posts + 1):
+            batch.append({
+                "post_id": i,
+                "name": f"Post {i}",
+                "content": "x" * 200,
+                "created_at": start + timedelta(minutes=i),
+                "images": [],
+                "price": round(rng.uniform(1, 1000), 2),
+                "category_id": rng.randint(1, categories),
+            })
+            if len(batch) == 5000:
+                conn.execute(Post.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Post.__table__.insert(), batch)
+        conn.execute(text("ANALYZE"))
+
+
+def explain(engine, statement: str, params) -> list[str]:
+    with engine.connect() as conn:
+        raw = conn.connection.cursor()
+        if engine.dialect.name == "sqlite":
+            raw.execute(f"EXPLAIN QUERY PLAN {statement}", params)
+            return [row[-1] for row in raw.fetchall()]
+        raw.execute(f"EXPLAIN {statement}", params)
+        return [row[0] for row in raw.fetchall()]
+
+
+def uses_index(plan: list[str]) -> bool:
+    joined = "\n".join(plan)
+    if "Seq Scan" in joined:
+        return False
+    for line in plan:
+        if line.startswith("SCAN") and "INDEX" not in line:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--categories", type=int, default=50)
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine = create_engine(url)
+
+    print(f"Seeding {args.posts} posts into {engine.url.render_as_string(hide_password=True)}...")
+    seed(engine, args.posts, args.categories)
+
+    # Capture the SQL post_service actually runs
+    captured = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    failures = 0
+    for label, filters in SCENARIOS:
+        captured.clear()
+        with Session(engine) as session:
+            post_service.get_posts(session, limit=20, **filters)
+        statement, params = captured[-1]
+        plan = explain(engine, statement, params)
+        ok = uses_index(plan)
+        failures += not ok
+        print(f"\n[{'INDEX' if ok else 'SEQ SCAN'}] {label}")
+        for line in plan:
+            print(f"    {line}")
+
+    print(f"\n{len(SCENARIOS) - failures}/{len(SCENARIOS)} queries use an index")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
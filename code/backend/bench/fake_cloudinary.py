@@ -0,0 +1,86 @@
+"""
+Local stand-in for the Cloudinary upload API, for benchmarks and offline
+development.
+
+    cd code/backend
+    python -m bench.fake_cloudinary --port 8900 --latency 0.05
+
+Then start the API with CLOUDINARY_UPLOAD_PREFIX=http://127.0.0.1:8900 and
+any CLOUDINARY_CLOUD_NAME / CLOUDINARY_API_KEY / CLOUDINARY_API_SECRET.
+Uploads are read and discarded; the reply has the fields the app uses.
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+class FakeCloudinaryHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real API, so the client's connection pool is exercised
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def do_POST(self):
+        # /v1_1/<cloud>/<resource_type>/<action>
+        parts = self.path.strip("/").split("/")
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.latency:
+            time.sleep(self.latency)
+
+        action = parts[-1] if parts else ""
+        if action == "upload":
+            digest = hashlib.sha256(body).hexdigest()[:20]
+            reply = {
+                "public_id": f"posts/{digest}",
+                "secure_url": f"https://res.cloudinary.com/fake/image/upload/posts/{digest}.png",
+                "bytes": len(body),
+                "resource_type": "image",
+            }
+        elif action == "destroy":
+            reply = {"result": "ok"}
+        else:
+            self._send(404, {"error": {"message": f"Unknown action {action}"}})
+            return
+        self._send(200, reply)
+
+    def _send(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(port: int = 0, latency: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve in a background thread; returns the server and its upload prefix"""
+    handler = type("Handler", (FakeCloudinaryHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every call")
+    args = parser.parse_args()
+
+    server, prefix = start(args.port, args.latency)
+    print(f"Fake Cloudinary listening on {prefix}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Load test for the Posts API: throughput and p50/p95/p99 latency per endpoint.
+
+Seeds a throwaway database, starts the API under uvicorn against it with
+a local fake Cloudinary (bench.fake_cloudinary), then drives every
+scenario at a fixed concurrency and prints the results as JSON.
+
+    cd code/backend
+    python -m bench.load_test --posts 100000 --concurrency 16 --output results.json
+    python -m bench.load_test --posts 100000 --concurrency 16 --baseline results.json
+
+With --baseline, a scenario whose p95/p99 latency grew, or whose
+throughput dropped, by more than --tolerance is reported as a regression
+and the exit code is 1.
+
+Uses BENCH_DATABASE_URL when set (e.g. a scratch PostgreSQL database,
+its post/category tables get truncated), otherwise a temporary SQLite file.
+Other settings (RESPONSE_CACHE_TTL, DB_ASYNC, DB_POOL_SIZE...) are passed
+through to the server from the environment.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+import requests
+from sqlmodel import create_engine
+from bench import fake_cloudinary
+from bench.explain_post_queries import seed
+from app.services.pagination import PostSort
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+
+def _list(rng: random.Random, posts: int, categories: int):
+    params = {"limit": 20, "sort": rng.choice(list(PostSort)).value}
+    if rng.random() < 0.5:
+        params["category_id"] = rng.randint(1, categories)
+    return "GET", "/posts/", {"params": params}
+
+
+def _list_fields(rng: random.Random, posts: int, categories: int):
+    method, path, options = _list(rng, posts, categories)
+    options["params"]["fields"] = "post_id,name,price,images"
+    return method, path, options
+
+
+def _search(rng: random.Random, posts: int, categories: int):
+    return "GET", "/posts/search/", {"params": {"name": f"Post {rng.randint(1, posts)}", "limit": 20}}
+
+
+def _get(rng: random.Random, posts: int, categories: int):
+    return "GET", f"/posts/{rng.randint(1, posts)}", {}
+
+
+def _create(rng: random.Random, posts: int, categories: int):
+    # Random bytes after the PNG signature: every upload is new content (no dedup hit)
+    image = PNG_HEADER + rng.randbytes(2048)
+    return "POST", "/posts/", {
+        "data": {"name": f"Bench {rng.random()}", "content": "x" * 200, "price": "9.99"},
+        "files": [("images", ("bench.png", image, "image/png"))],
+    }
+
+
+SCENARIOS = {
+    "list": _list,
+    "list_fields": _list_fields,
+    "search": _search,
+    "get": _get,
+    "create": _create,
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, upload_prefix: str, workers: int):
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "IMAGE_STORAGE": "cloudinary",
+        "CLOUDINARY_UPLOAD_PREFIX": upload_prefix,
+        "CLOUDINARY_CLOUD_NAME": "bench",
+        "CLOUDINARY_API_KEY": "bench",
+        "CLOUDINARY_API_SECRET": "bench",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 300  # startup builds the search and suggest indexes
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The API exited during startup (code {process.returncode})")
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("The API did not start in time")
+
+
+def _drive(base_url: str, name: str, args, count: int, phase: str) -> tuple:
+    """Send count requests over args.concurrency connections; returns (latencies, errors, seconds)"""
+    make_request = SCENARIOS[name]
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = iter(range(count))
+
+    def worker(worker_id: int):
+        nonlocal errors
+        # Same seed, same requests: runs are comparable
+        rng = random.Random(f"{name}-{phase}-{worker_id}")
+        http = requests.Session()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            method, path, options = make_request(rng, args.posts, args.categories)
+            start = time.perf_counter()
+            try:
+                response = http.request(method, base_url + path, timeout=60, **options)
+                failed = response.status_code >= 400 and response.status_code != 404
+            except requests.RequestException:
+                failed = True
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors += failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(worker, range(args.concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def run_scenario(base_url: str, name: str, args) -> dict:
+    if args.warmup:
+        _drive(base_url, name, args, args.warmup, "warmup")
+    latencies, errors, duration = _drive(base_url, name, args, args.requests, "measure")
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3),
+            "p50": round(cuts[49] * 1000, 3),
+            "p95": round(cuts[94] * 1000, 3),
+            "p99": round(cuts[98] * 1000, 3),
+            "max": round(max(latencies) * 1000, 3),
+        },
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """Regressions of current against baseline, as readable lines"""
+    if baseline.get("meta", {}).get("posts") != current["meta"]["posts"]:
+        print("⚠️ Baseline was seeded with a different number of posts", file=sys.stderr)
+
+    regressions = []
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        for percentile in ("p95", "p99"):
+            old, new = before["latency_ms"][percentile], result["latency_ms"][percentile]
+            if new > old * (1 + tolerance):
+                regressions.append(f"{name}: {percentile} {old:.1f}ms -> {new:.1f}ms (+{(new / old - 1) * 100:.0f}%)")
+        old, new = before["throughput_rps"], result["throughput_rps"]
+        if new < old * (1 - tolerance):
+            regressions.append(f"{name}: throughput {old:.1f} -> {new:.1f} req/s ({(new / old - 1) * 100:.0f}%)")
+        if result["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {result['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1000, help="posts to seed (e.g. 1000, 100000, 1000000)")
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per scenario")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--cloudinary-latency", type=float, default=0.0, help="seconds added to each fake upload")
+    parser.add_argument("--output", help="write the JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before flagging (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine = create_engine(url)
+    print(f"Seeding {args.posts} posts into {engine.url.render_as_string(hide_password=True)}...", file=sys.stderr)
+    seed(engine, args.posts, args.categories)
+    engine.dispose()
+
+    cloudinary_server, upload_prefix = fake_cloudinary.start(latency=args.cloudinary_latency)
+    process, base_url = start_server(url, upload_prefix, args.workers)
+    results = {}
+    try:
+        for name in scenarios:
+            print(f"Running {name} ({args.requests} requests, concurrency {args.concurrency})...", file=sys.stderr)
+            results[name] = run_scenario(base_url, name, args)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        cloudinary_server.shutdown()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "database": engine.dialect.name,
+            "posts": args.posts,
+            "categories": args.categories,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "workers": args.workers,
+            "cloudinary_latency_s": args.cloudinary_latency,
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(baseline, report, args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+        print(f"✅ No regressions against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Post list serialization: ORM + pydantic vs column rows + fast_json.
+
+Seeds a throwaway database and times building the GET /posts/ body both
+ways (query + serialize + encode), checking they produce the same bytes.
+
+    cd code/backend
+    python -m bench.serialize_posts --limit 100 --rounds 200
+
+Uses BENCH_DATABASE_URL when set (e.g. a scratch PostgreSQL database,
+its post/category tables get truncated), otherwise a temporary SQLite file.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pydantic import TypeAdapter
+from sqlmodel import Session, create_engine
+from app.schemas.post_schema import PostPage, PostRead, PostReadWithCategory
+from app.services import fast_json, post_service
+from app.services.pagination import PostSort
+from bench.explain_post_queries import seed
+
+
+def orm_body(session: Session, limit: int, expand: bool) -> bytes:
+    """The previous path: Post objects -> pydantic models -> JSON"""
+    page = post_service.get_posts(session, limit=limit, sort=PostSort.price_desc, expand_category=expand)
+    schema = PostReadWithCategory if expand else PostRead
+    items = [schema.model_validate(post) for post in page.items]
+    adapter = TypeAdapter(PostPage)
+    return adapter.dump_json(adapter.validate_python(page._replace(items=items)._asdict(), from_attributes=True))
+
+
+def rows_body(session: Session, limit: int, expand: bool) -> bytes:
+    """The list endpoints' path: column rows -> dicts -> fast_json"""
+    page = post_service.get_posts(session, limit=limit, sort=PostSort.price_desc, expand_category=expand, as_rows=True)
+    return fast_json.dumps({
+        "items": fast_json.post_dicts(page.items, expand),
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor
+    })
+
+
+def timed(engine, body, limit: int, expand: bool, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        with Session(engine) as session:
+            start = time.perf_counter()
+            body(session, limit, expand)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine = create_engine(url)
+
+    print(f"Seeding {args.posts} posts into {engine.url.render_as_string(hide_password=True)}...")
+    seed(engine, args.posts, args.categories)
+    print(f"JSON encoder: {'orjson' if fast_json.orjson is not None else 'json (install orjson for the fast one)'}")
+
+    for expand in (False, True):
+        with Session(engine) as session:
+            if orm_body(session, args.limit, expand) != rows_body(session, args.limit, expand):
+                print(f"⚠️ Bodies differ (expand={expand})")
+                raise SystemExit(1)
+
+        orm = timed(engine, orm_body, args.limit, expand, args.rounds)
+        rows = timed(engine, rows_body, args.limit, expand, args.rounds)
+        label = "expand=category" if expand else "plain"
+        print(f"\n{label}, {args.limit} posts per page, {args.rounds} rounds (median / p95 ms)")
+        for name, timings in (("ORM + pydantic", orm), ("rows + fast_json", rows)):
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            print(f"    {name:<18} {statistics.median(timings):7.2f} / {p95:7.2f}")
+        print(f"    speedup            {statistics.median(orm) / statistics.median(rows):7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
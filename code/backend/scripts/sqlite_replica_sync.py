@@ -0,0 +1,43 @@
+"""
+Copy a SQLite primary into a replica file on an interval, to try the
+read/write split locally without a real replication setup.
+
+    cd code/backend
+    python -m scripts.sqlite_replica_sync database.db replica.db --interval 2
+
+Then start the API with DATABASE_REPLICA_URL=sqlite:///replica.db.
+--interval is the simulated replication lag.
+"""
+import argparse
+import sqlite3
+import time
+
+
+def sync_once(primary_path: str, replica_path: str):
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path, timeout=30)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("primary")
+    parser.add_argument("replica")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between copies")
+    parser.add_argument("--once", action="store_true", help="copy once and exit")
+    args = parser.parse_args()
+
+    while True:
+        sync_once(args.primary, args.replica)
+        print(f"🔁 {args.primary} -> {args.replica}")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
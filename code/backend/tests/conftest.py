@@ -0,0 +1,146 @@
+"""
+Test setup: a throwaway SQLite database and staging folder, and an
+in-process fake in place of the Cloudinary upload API.
+
+    cd code/backend
+    pip install -r requirements-dev.txt
+    python -m pytest -q
+
+The app keeps its engines and caches at module level, so settings are
+set here before it is imported and every test starts from a new
+database file and empty caches.
+"""
+import base64
+import hashlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+WORK_DIR = Path(tempfile.mkdtemp(prefix="posts-api-tests-"))
+DATABASE_FILE = WORK_DIR / "test.db"
+
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_FILE}"
+os.environ["IMAGE_STORAGE"] = "cloudinary"
+os.environ["IMAGE_JOB_STAGING_DIR"] = str(WORK_DIR / "staging")
+os.environ["IMAGE_JOB_RETRY_DELAY"] = "0.01"
+os.environ["IMAGE_JOB_POLL_INTERVAL"] = "0.01"
+os.environ["CLOUDINARY_CLOUD_NAME"] = "test"
+os.environ["CLOUDINARY_API_KEY"] = "test"
+os.environ["CLOUDINARY_API_SECRET"] = "test"
+os.environ["CLOUDINARY_MAX_RETRIES"] = "0"
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import cloudinary.uploader
+import pytest
+from fastapi.testclient import TestClient
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def png(seed: str) -> bytes:
+    """A different (fake) PNG per seed"""
+    return PNG + seed.encode()
+
+
+def data_uri(content: bytes) -> str:
+    return "data:image/png;base64," + base64.b64encode(content).decode()
+
+
+class FakeCloudinary:
+    """Records uploads and answers like the upload API; set fail to make the next calls raise"""
+
+    def __init__(self):
+        self.uploads = []
+        self.destroyed = []
+        self.fail = 0
+
+    def upload(self, file, **options):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("Cloudinary is down")
+        data = file.read() if hasattr(file, "read") else file.encode()
+        public_id = f"{options.get('folder', 'posts')}/{options['public_id']}"
+        self.uploads.append(public_id)
+        return {
+            "public_id": public_id,
+            "secure_url": f"https://res.cloudinary.com/test/image/upload/{public_id}.png",
+            "bytes": len(data),
+            "etag": hashlib.md5(data).hexdigest(),
+        }
+
+    def destroy(self, public_id, **options):
+        self.destroyed.append(public_id)
+        return {"result": "ok"}
+
+
+def _reset_app_state(monkeypatch):
+    from app.database import async_engine, engine
+    from app.services import image_jobs, response_cache, single_flight, version_service
+
+    engine.dispose()
+    if async_engine is not None:
+        # Its connections belong to the previous test's event loop: drop them unclosed
+        async_engine.sync_engine.dispose(close=False)
+    DATABASE_FILE.unlink(missing_ok=True)
+    version_service._seen.clear()
+    response_cache.cache.clear()
+    monkeypatch.setattr(single_flight, "post_reads", single_flight.SingleFlight(single_flight.POST_READ_MICRO_TTL))
+    monkeypatch.setattr(image_jobs, "queue", image_jobs.QUEUES[image_jobs.IMAGE_JOB_QUEUE]())
+
+
+@pytest.fixture
+def cloudinary_fake(monkeypatch):
+    fake = FakeCloudinary()
+    monkeypatch.setattr(cloudinary.uploader, "upload", fake.upload)
+    monkeypatch.setattr(cloudinary.uploader, "destroy", fake.destroy)
+    return fake
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """A fresh database without starting the app: no lifespan, no job workers"""
+    import app.main  # registers every model
+    from app.database import create_db_and_tables, engine
+    from app.services import search_service
+
+    _reset_app_state(monkeypatch)
+    create_db_and_tables()
+    search_service.setup_search_index(engine)
+
+
+@pytest.fixture
+def client(cloudinary_fake, monkeypatch):
+    from app.main import app
+
+    _reset_app_state(monkeypatch)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_post(client):
+    """Create a post through the API; returns its JSON"""
+
+    def make(name: str = "Post", price: float = 10, images=(), **fields):
+        response = client.post(
+            "/posts/from-urls",
+            json={"name": name, "content": f"About {name}", "price": price, "images": list(images), **fields},
+        )
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return make
+
+
+@pytest.fixture
+def make_category(client):
+    """Create a category through the API; returns its JSON"""
+
+    def make(name: str, description: str = None):
+        response = client.post("/categories/", json={"name": name, "description": description})
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return make
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app import database
+from app.database import engine, run_db
+from app.models.post_model import Post
+from app.services import post_service, storage
+from conftest import DATABASE_FILE, data_uri, png
+
+
+def test_async_urls_use_async_drivers():
+    assert database._async_url("postgresql://u:p@db/posts") == "postgresql+asyncpg://u:p@db/posts"
+    assert database._async_url("sqlite:///./database.db") == "sqlite+aiosqlite:///./database.db"
+
+
+def test_run_db_gives_the_same_results_with_either_session(client, make_post):
+    for i in range(3):
+        make_post(f"Post {i}", price=i)
+
+    async def both():
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{DATABASE_FILE}")
+        try:
+            async with AsyncSession(async_engine) as session:
+                from_async = await run_db(session, post_service.get_posts, limit=10)
+        finally:
+            await async_engine.dispose()
+        with Session(engine) as session:
+            from_sync = await run_db(session, post_service.get_posts, limit=10)
+        return from_async, from_sync
+
+    from_async, from_sync = asyncio.run(both())
+
+    assert [p.post_id for p in from_async.items] == [p.post_id for p in from_sync.items]
+    assert from_async.next_cursor == from_sync.next_cursor
+
+
+def test_run_db_keeps_sync_sessions_off_the_loop_thread(client):
+    async def where():
+        with Session(engine) as session:
+            return await run_db(session, lambda session: threading.get_ident())
+
+    assert asyncio.run(where()) != threading.get_ident()
+
+
+def test_uploads_do_not_stall_the_event_loop_with_async_sessions(client, monkeypatch):
+    upload = storage.backend.upload
+
+    def slow_upload(*args, **kwargs):
+        time.sleep(0.3)
+        return upload(*args, **kwargs)
+
+    monkeypatch.setattr(storage.backend, "upload", slow_upload)
+
+    async def create_while_ticking():
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{DATABASE_FILE}")
+        lags = []
+        done = False
+
+        async def ticker():
+            while not done:
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(time.perf_counter() - start - 0.01)
+
+        ticking = asyncio.create_task(ticker())
+        try:
+            async with AsyncSession(async_engine) as session:
+                post = Post(name="Slow", content="c", price=1, images=[data_uri(png("slow"))])
+                await post_service.create_post(session, post)
+        finally:
+            done = True
+            await ticking
+            await async_engine.dispose()
+        return post, max(lags)
+
+    post, worst_lag = asyncio.run(create_while_ticking())
+
+    assert post.post_id is not None
+    assert worst_lag < 0.1
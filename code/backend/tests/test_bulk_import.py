@@ -0,0 +1,116 @@
+import asyncio
+import json
+import pytest
+from sqlmodel import Session, select
+from app.database import engine
+from app.models.image_asset_model import ImageAsset
+from app.services import bulk_import_service, post_service
+from app.services.cloudinary_client import CircuitOpenError
+from conftest import data_uri, png
+
+
+def _ndjson(*lines) -> bytes:
+    return "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines).encode()
+
+
+def _lines(*chunks: bytes) -> list:
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [line async for line in bulk_import_service.iter_ndjson_lines(stream())]
+
+    return asyncio.run(collect())
+
+
+def _post(i: int) -> dict:
+    return {"name": f"Imported {i}", "content": "From NDJSON", "price": i, "images": []}
+
+
+def test_bad_lines_are_reported_and_skipped(client):
+    body = _ndjson(_post(1), "{not json", {"name": "No price"}, _post(4))
+
+    report = client.post("/posts/bulk", content=body).json()
+
+    assert report["created"] == 2
+    assert report["failed"] == 2
+    assert [result["status"] for result in report["results"]] == ["created", "error", "error", "created"]
+    assert report["last_committed_line"] == 4
+
+
+def test_resume_after_a_failed_batch(client, monkeypatch):
+    body = _ndjson(*(_post(i) for i in range(1, 6)))
+    save_posts = post_service.save_posts
+    calls = 0
+
+    def second_batch_fails(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise RuntimeError("database went away")
+        return save_posts(*args, **kwargs)
+
+    monkeypatch.setattr(post_service, "save_posts", second_batch_fails)
+    first = client.post("/posts/bulk", params={"batch_size": 2}, content=body).json()
+
+    assert first["aborted"]
+    assert first["created"] == 2
+    assert first["last_committed_line"] == 2
+
+    monkeypatch.setattr(post_service, "save_posts", save_posts)
+    resumed = client.post(
+        "/posts/bulk", params={"batch_size": 2, "resume_from": first["last_committed_line"] + 1}, content=body
+    ).json()
+
+    assert not resumed["aborted"]
+    assert resumed["skipped"] == 2
+    assert resumed["created"] == 3
+    names = [post["name"] for post in client.get("/posts/", params={"limit": 100}).json()["items"]]
+    assert names == [f"Imported {i}" for i in range(1, 6)]
+
+
+def test_lines_split_across_chunks_are_joined():
+    assert _lines(b'{"a"', b': 1}\n{"b": 2', b"}\n", b"\n", b'{"c": 3}') == [
+        (1, b'{"a": 1}'), (2, b'{"b": 2}'), (3, b""), (4, b'{"c": 3}'),
+    ]
+
+
+def test_a_line_over_the_limit_fails_before_its_newline(monkeypatch):
+    monkeypatch.setattr(bulk_import_service, "MAX_LINE_BYTES", 10)
+
+    assert _lines(b"12345\n", b"1234567890\n") == [(1, b"12345"), (2, b"1234567890")]
+    with pytest.raises(ValueError, match="Línea 2"):
+        _lines(b"12345\n123456", b"78901")
+    with pytest.raises(ValueError, match="Línea 1"):
+        _lines(b"12345678901\n")
+
+
+def test_a_storage_outage_fails_only_its_lines(client, cloudinary_fake, monkeypatch):
+    upload = cloudinary_fake.upload
+    public_ids = {}
+
+    def down_for_b(file, **options):
+        if file == data_uri(png("b")):
+            raise CircuitOpenError("Cloudinary no disponible (circuito abierto), reintente más tarde")
+        result = upload(file, **options)
+        public_ids[file] = result["public_id"]
+        return result
+
+    monkeypatch.setattr("cloudinary.uploader.upload", down_for_b)
+    body = _ndjson(
+        {**_post(1), "images": [data_uri(png("a"))]},
+        {**_post(2), "images": [data_uri(png("c")), data_uri(png("b"))]},
+        _post(3),
+    )
+
+    report = client.post("/posts/bulk", content=body).json()
+
+    assert not report["aborted"]
+    assert [result["status"] for result in report["results"]] == ["created", "error", "created"]
+    assert "circuito abierto" in report["results"][1]["error"]
+    # Line 2's first image made it up before the second failed: it is removed again
+    assert len(cloudinary_fake.uploads) == 2
+    assert cloudinary_fake.destroyed == [public_ids[data_uri(png("c"))]]
+    with Session(engine) as session:
+        assert len(session.exec(select(ImageAsset)).all()) == 1
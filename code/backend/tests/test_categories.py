@@ -0,0 +1,93 @@
+from sqlalchemy import event
+from sqlmodel import Session
+from app.database import engine
+from app.models.category_model import Category
+from app.services import category_registry, category_service, version_service
+
+
+def _insert_elsewhere(name: str):
+    """A category committed by another worker: this process's registry doesn't know yet"""
+    with Session(engine) as session:
+        session.add(Category(name=name))
+        version_service.bump(session, category_registry.TABLE)
+        session.commit()
+
+
+def test_reads_come_from_the_registry(client, make_category):
+    toys = make_category("Toys")
+    client.get(f"/categories/{toys['category_id']}")
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert client.get(f"/categories/{toys['category_id']}").json()["name"] == "Toys"
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert not [s for s in statements if "FROM category" in s]
+
+
+def test_writes_go_through_to_the_registry(client, make_category):
+    toys = make_category("Toys")
+
+    client.put(f"/categories/{toys['category_id']}", json={"name": "Games"})
+    assert client.get(f"/categories/{toys['category_id']}").json()["name"] == "Games"
+
+    assert client.delete(f"/categories/{toys['category_id']}").status_code == 204
+    assert client.get(f"/categories/{toys['category_id']}").status_code == 404
+    assert client.get("/categories/").json() == []
+
+
+def test_other_workers_categories_show_up(client, make_category, monkeypatch):
+    make_category("Toys")
+    _insert_elsewhere("Books")
+    monkeypatch.setattr(category_registry, "REGISTRY_CHECK_INTERVAL", 0)
+
+    assert [c["name"] for c in client.get("/categories/").json()] == ["Toys", "Books"]
+
+
+def test_duplicate_names_are_a_400_even_when_the_registry_is_behind(client, make_category):
+    make_category("Toys")
+    _insert_elsewhere("Books")
+
+    for name in ("Books", "books", " BOOKS ", "toys"):
+        response = client.post("/categories/", json={"name": name})
+        assert response.status_code == 400, name
+
+
+def test_renaming_onto_another_category_is_a_400(client, make_category):
+    make_category("Toys")
+    books = make_category("Books")
+
+    response = client.put(f"/categories/{books['category_id']}", json={"name": "TOYS"})
+
+    assert response.status_code == 400
+    assert client.put(f"/categories/{books['category_id']}", json={"name": "books"}).status_code == 200
+
+
+def test_a_lost_insert_race_is_a_400_not_a_500(client, make_category, monkeypatch):
+    make_category("Toys")
+    # Both workers passed the check before either committed
+    monkeypatch.setattr(category_service, "_name_taken", lambda *args: False)
+
+    response = client.post("/categories/", json={"name": "Toys"})
+
+    assert response.status_code == 400
+    assert "already exists" in response.json()["detail"]
+
+
+def test_lookup_by_name_ignores_case_and_padding(client):
+    _insert_elsewhere("  Garden Tools ")
+    with Session(engine) as session:
+        category_registry.categories.load(session)
+
+        assert category_service.get_category_by_name(session, "garden tools").name == "  Garden Tools "
+
+
+def test_categories_with_posts_cannot_be_deleted(client, make_category, make_post):
+    toys = make_category("Toys")
+    make_post("Robot", category_id=toys["category_id"])
+
+    assert client.delete(f"/categories/{toys['category_id']}").status_code == 400
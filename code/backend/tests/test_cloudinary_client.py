@@ -0,0 +1,230 @@
+import asyncio
+import io
+import pytest
+from cloudinary import exceptions
+from app.services import cloudinary_client
+from app.services.cloudinary_client import CircuitBreaker, CircuitOpenError, CloudinaryClient
+from conftest import png
+
+
+class Clock:
+    """Stands in for time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cloudinary_client.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays, without sleeping"""
+    delays = []
+    monkeypatch.setattr(cloudinary_client.time, "sleep", delays.append)
+    return delays
+
+
+class FlakyCall:
+    """An SDK call that raises the given errors first, then succeeds"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+        self.positions = []
+
+    def __call__(self, source, **options):
+        self.calls += 1
+        if hasattr(source, "tell"):
+            self.positions.append(source.tell())
+            source.read()
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"public_id": "posts/ok"}
+
+
+def _client(monkeypatch, retries=3, threshold=5):
+    monkeypatch.setattr(cloudinary_client, "CLOUDINARY_MAX_RETRIES", retries)
+    monkeypatch.setattr(cloudinary_client, "CLOUDINARY_BREAKER_THRESHOLD", threshold)
+    return CloudinaryClient()
+
+
+def test_breaker_opens_after_the_threshold_and_fails_fast(clock):
+    breaker = CircuitBreaker(threshold=3, reset_after=30)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert (breaker.state, breaker.times_opened) == (CircuitBreaker.OPEN, 1)
+
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(threshold=2, reset_after=30)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert (breaker.state, breaker.failures) == (CircuitBreaker.CLOSED, 1)
+
+
+def test_half_open_lets_one_trial_through_and_closes_on_success(clock):
+    breaker = CircuitBreaker(threshold=1, reset_after=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # A second caller while the trial runs
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert (breaker.state, breaker.failures) == (CircuitBreaker.CLOSED, 0)
+    breaker.before_call()
+
+
+def test_a_failed_trial_opens_the_circuit_again(clock):
+    breaker = CircuitBreaker(threshold=3, reset_after=30)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert (breaker.state, breaker.times_opened) == (CircuitBreaker.OPEN, 2)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_a_released_trial_frees_the_slot(clock):
+    breaker = CircuitBreaker(threshold=1, reset_after=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    breaker.before_call()
+    breaker.release()
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+
+
+@pytest.mark.parametrize("error, transient", [
+    (exceptions.Error("Connection reset by peer"), True),
+    (exceptions.RateLimited("Slow down"), True),
+    (exceptions.GeneralError("Server error"), True),
+    (exceptions.BadRequest("Invalid image file"), False),
+    (exceptions.AuthorizationRequired("Invalid Signature"), False),
+    (exceptions.NotFound("Resource not found"), False),
+    (ValueError("not from the SDK"), False),
+])
+def test_only_server_and_network_errors_are_transient(error, transient):
+    assert cloudinary_client.is_transient(error) is transient
+
+
+def test_transient_errors_are_retried_with_backoff(monkeypatch, clock, sleeps):
+    client = _client(monkeypatch, retries=3)
+    call = FlakyCall(exceptions.Error("timeout"), exceptions.Error("timeout"))
+    source = io.BytesIO(png("retry"))
+
+    assert client._call("upload", call, source) == {"public_id": "posts/ok"}
+
+    assert call.calls == 3
+    # Every attempt sends the file from the start
+    assert call.positions == [0, 0, 0]
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= cloudinary_client.CLOUDINARY_RETRY_BASE
+    assert 0 <= sleeps[1] <= cloudinary_client.CLOUDINARY_RETRY_BASE * 2
+    assert client.status() | {"max_concurrency": None} == {
+        "circuit": "closed",
+        "consecutive_failures": 0,
+        "times_opened": 0,
+        "in_flight": 0,
+        "max_concurrency": None,
+        "calls": 1,
+        "retries": 2,
+        "failures": 0,
+    }
+
+
+def test_retries_give_up_after_the_maximum(monkeypatch, clock, sleeps):
+    client = _client(monkeypatch, retries=2)
+    call = FlakyCall(*(exceptions.Error("timeout") for _ in range(5)))
+
+    with pytest.raises(exceptions.Error, match="timeout"):
+        client._call("upload", call, "https://example.com/a.png")
+
+    assert call.calls == 3
+    assert len(sleeps) == 2
+    assert (client.retries, client.failures, client.breaker.failures) == (2, 1, 3)
+
+
+def test_permanent_errors_are_not_retried(monkeypatch, clock, sleeps):
+    client = _client(monkeypatch, retries=3, threshold=1)
+    call = FlakyCall(exceptions.BadRequest("Invalid image file"))
+
+    with pytest.raises(exceptions.BadRequest):
+        client._call("upload", call, "https://example.com/a.png")
+
+    assert call.calls == 1
+    assert sleeps == []
+    # Our mistake, not Cloudinary's: the circuit stays closed
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_an_open_circuit_stops_retrying_and_fails_fast(monkeypatch, clock, sleeps):
+    client = _client(monkeypatch, retries=10, threshold=2)
+    call = FlakyCall(*(exceptions.Error("timeout") for _ in range(10)))
+
+    with pytest.raises(exceptions.Error):
+        client._call("upload", call, "https://example.com/a.png")
+    assert (call.calls, client.breaker.state) == (2, CircuitBreaker.OPEN)
+
+    with pytest.raises(CircuitOpenError):
+        client._call("upload", call, "https://example.com/a.png")
+    assert call.calls == 2
+
+
+def test_calls_refuse_to_block_the_event_loop(monkeypatch):
+    client = _client(monkeypatch)
+    call = FlakyCall()
+
+    async def on_the_loop():
+        client._call("upload", call, "https://example.com/a.png")
+
+    with pytest.raises(RuntimeError, match="to_thread"):
+        asyncio.run(on_the_loop())
+    assert call.calls == 0
+
+
+def test_open_circuit_answers_503_with_retry_after(client, cloudinary_fake, monkeypatch):
+    breaker = CircuitBreaker(threshold=1, reset_after=30)
+    breaker.record_failure()
+    monkeypatch.setattr(cloudinary_client.client, "breaker", breaker)
+
+    response = client.post(
+        "/posts/",
+        data={"name": "Files", "content": "Uploaded", "price": "5"},
+        files=[("images", ("a.png", png("a"), "image/png"))],
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(int(cloudinary_client.CLOUDINARY_BREAKER_RESET))
+    assert cloudinary_fake.uploads == []
+    assert client.get("/diagnostics/cloudinary").json()["circuit"] == "open"
@@ -0,0 +1,79 @@
+from sqlalchemy import event
+from app.database import async_engine, engine
+
+
+def _count_queries(fn) -> int:
+    """SELECTs on posts and categories while fn runs (not the job workers' polling)"""
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    for current in engines:
+        event.listen(current, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        for current in engines:
+            event.remove(current, "before_cursor_execute", capture)
+    return sum(
+        1 for statement in statements
+        if statement.lstrip().upper().startswith("SELECT") and "image_job" not in statement
+    )
+
+
+def test_expand_embeds_the_category_everywhere(client, make_post, make_category):
+    toys = make_category("Toys", "Fun things")
+    post = make_post("Robot", category_id=toys["category_id"])
+    responses = [
+        client.get("/posts/", params={"expand": "category"}).json()["items"][0],
+        client.get(f"/posts/{post['post_id']}", params={"expand": "category"}).json(),
+        client.get("/posts/search/", params={"name": "robot", "expand": "category"}).json()[0],
+        client.get(f"/posts/category/{toys['category_id']}", params={"expand": "category"}).json()["items"][0],
+    ]
+
+    for body in responses:
+        assert body["category"]["name"] == "Toys"
+        assert body["category"]["description"] == "Fun things"
+
+
+def test_without_expand_there_is_no_category_key(client, make_post, make_category):
+    post = make_post("Robot", category_id=make_category("Toys")["category_id"])
+
+    assert "category" not in client.get("/posts/").json()["items"][0]
+    assert "category" not in client.get(f"/posts/{post['post_id']}").json()
+
+
+def test_posts_without_a_category_get_null(client, make_post):
+    make_post("Loose")
+
+    assert client.get("/posts/", params={"expand": "category"}).json()["items"][0]["category"] is None
+
+
+def test_category_edits_show_in_expanded_posts(client, make_post, make_category):
+    toys = make_category("Toys")
+    make_post("Robot", category_id=toys["category_id"])
+    client.get("/posts/", params={"expand": "category"})
+
+    client.put(f"/categories/{toys['category_id']}", json={"name": "Games"})
+
+    assert client.get("/posts/", params={"expand": "category"}).json()["items"][0]["category"]["name"] == "Games"
+
+
+def test_categories_are_not_loaded_one_post_at_a_time(client, make_post, make_category):
+    categories = [make_category(f"Category {i}")["category_id"] for i in range(5)]
+
+    def listing():
+        # A different limit each time: no response cache hit
+        listing.limit += 1
+        client.get("/posts/", params={"expand": "category", "limit": listing.limit})
+
+    listing.limit = 20
+    make_post("First", category_id=categories[0])
+    few = _count_queries(listing)
+    for i in range(10):
+        make_post(f"Post {i}", category_id=categories[i % 5])
+    many = _count_queries(listing)
+
+    assert 0 < many == few
@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from sqlmodel import SQLModel, create_engine
+from app.services import export_service
+from bench.explain_post_queries import seed
+
+
+def test_ndjson_export_round_trips_through_bulk_import(client, make_post, make_category):
+    toys = make_category("Toys")["category_id"]
+    make_post("Robot", price=12.5, category_id=toys, content="Beeps, \"loudly\"\nand often")
+    make_post("Ball", price=3)
+
+    response = client.get("/posts/export")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"] == 'attachment; filename="posts.ndjson"'
+    assert [(row["name"], row["price"], row["category_id"]) for row in rows] == [("Robot", 12.5, toys), ("Ball", 3, None)]
+    assert rows[0]["content"] == "Beeps, \"loudly\"\nand often"
+    assert list(rows[0]) == list(export_service.EXPORT_COLUMNS)
+
+    body = "\n".join(json.dumps({k: row[k] for k in ("name", "content", "price", "category_id", "images")}) for row in rows)
+    assert client.post("/posts/bulk", content=body.encode()).json()["created"] == 2
+
+
+def test_csv_export_has_a_header_and_quotes_content(client, make_post):
+    make_post("Robot", content="Beeps, \"loudly\"\nand often")
+
+    response = client.get("/posts/export", params={"format": "csv"})
+    rows = list(csv.reader(io.StringIO(response.text)))
+
+    assert response.headers["content-type"].startswith("text/csv")
+    assert rows[0] == list(export_service.EXPORT_COLUMNS)
+    assert rows[1][1:3] == ["Robot", "Beeps, \"loudly\"\nand often"]
+    assert json.loads(rows[1][5]) == []
+
+
+def test_export_filters(client, make_post, make_category):
+    toys = make_category("Toys")["category_id"]
+    make_post("Old toy", category_id=toys)
+    make_post("Book")
+    since = datetime.now().isoformat()
+    time.sleep(0.01)
+    make_post("New toy", category_id=toys)
+
+    def names(**params):
+        return [json.loads(line)["name"] for line in client.get("/posts/export", params=params).text.splitlines()]
+
+    assert names(category_id=toys) == ["Old toy", "New toy"]
+    assert names(updated_since=since) == ["New toy"]
+
+
+def test_export_streams_one_batch_per_chunk(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/export.db")
+    SQLModel.metadata.create_all(engine)
+    seed(engine, 25, 3)
+
+    chunks = list(export_service.export_posts(engine, batch_size=10))
+
+    assert [chunk.count(b"\n") for chunk in chunks] == [10, 10, 5]
+    ids = [json.loads(line)["post_id"] for chunk in chunks for line in chunk.splitlines()]
+    assert ids == sorted(ids) and len(set(ids)) == 25
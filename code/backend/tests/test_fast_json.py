@@ -0,0 +1,97 @@
+import json
+from datetime import datetime
+import pytest
+from app.schemas.post_schema import PostPage, PostRead, PostReadWithCategory
+from app.services import fast_json, response_cache
+
+ROWS = [
+    {
+        "name": "Zapatos rojos ñandú 👟",
+        "content": 'Comillas "dobles", barra \\ y\nsalto',
+        "images": ["https://res.cloudinary.com/test/image/upload/posts/a.png"],
+        "price": 10.0,
+        "category_id": 1,
+        "post_id": 1,
+        "created_at": datetime(2024, 1, 2, 3, 4, 5, 678901),
+        "updated_at": None,
+        "status": "ready",
+        "version": 3,
+        "category": {"name": "Calzado", "description": None, "category_id": 1, "created_at": datetime(2023, 12, 1)},
+    },
+    {
+        "name": "Plain",
+        "content": "x",
+        "images": [],
+        "price": 0.1,
+        "category_id": None,
+        "post_id": 2,
+        "created_at": datetime(2024, 1, 2, 3, 4, 5),
+        "updated_at": datetime(2024, 5, 6, 7, 8, 9, 10),
+        "status": "pending",
+        "version": 1,
+    },
+]
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        if fast_json.orjson is None:
+            pytest.skip("orjson is not installed")
+    else:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    return request.param
+
+
+def test_output_matches_pydantic_byte_for_byte(encoder):
+    expected = b"[" + b",".join([
+        PostReadWithCategory.model_validate(ROWS[0]).model_dump_json().encode(),
+        PostRead.model_validate(ROWS[1]).model_dump_json().encode(),
+    ]) + b"]"
+
+    assert fast_json.dumps(ROWS) == expected
+
+
+def test_datetimes_are_iso_8601(encoder):
+    decoded = json.loads(fast_json.dumps(ROWS))
+
+    assert decoded[0]["created_at"] == "2024-01-02T03:04:05.678901"
+    assert decoded[1]["created_at"] == "2024-01-02T03:04:05"
+
+
+def test_unknown_types_are_an_error(encoder):
+    with pytest.raises(TypeError):
+        fast_json.dumps({"value": object()})
+
+
+def test_post_dicts_follow_the_schema_order():
+    category = ("Calzado", None, 1, datetime(2023, 12, 1))
+    rows = [
+        tuple(ROWS[0][name] for name in fast_json.POST_FIELDS) + category,
+        tuple(ROWS[1][name] for name in fast_json.POST_FIELDS) + (None, None, None, None),
+    ]
+
+    items = fast_json.post_dicts(rows, expand_category=True)
+
+    assert list(items[0]) == list(fast_json.POST_FIELDS) + ["category"]
+    assert items[0]["category"] == ROWS[0]["category"]
+    assert items[1]["category"] is None
+
+
+def test_list_pages_are_the_same_on_either_encoder(client, make_post, make_category, monkeypatch):
+    shoes = make_category("Calzado")
+    make_post("Zapatos ñandú", category_id=shoes["category_id"], images=["https://example.com/a.png"])
+    make_post("Plain")
+
+    bodies = []
+    for module in (fast_json.orjson, None):
+        monkeypatch.setattr(fast_json, "orjson", module)
+        response_cache.cache.clear()
+        response = client.get("/posts/", params={"expand": "category"})
+        assert response.status_code == 200
+        bodies.append(response.content)
+
+    assert bodies[0] == bodies[1]
+    # What the response model would have produced
+    page = PostPage.model_validate_json(bodies[0])
+    assert page.model_dump_json(exclude_unset=True).encode() == bodies[0]
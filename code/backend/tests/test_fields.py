@@ -0,0 +1,130 @@
+import pytest
+from sqlalchemy import event
+from app.database import async_engine, engine
+
+
+def _post_selects(fn) -> list:
+    """The SELECTs from the posts table sent while fn runs"""
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    for current in engines:
+        event.listen(current, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        for current in engines:
+            event.remove(current, "before_cursor_execute", capture)
+    return [
+        statement for statement in statements
+        if statement.lstrip().upper().startswith("SELECT") and "FROM post" in statement
+    ]
+
+
+def _selected_columns(statement: str) -> str:
+    return statement.split("FROM", 1)[0]
+
+
+@pytest.fixture
+def toys(make_post, make_category):
+    category = make_category("Toys", "Fun things")
+    post = make_post("Robot", images=["https://example.com/robot.png"], category_id=category["category_id"])
+    return category, post
+
+
+def test_fields_trim_every_post_endpoint(client, toys):
+    category, post = toys
+    params = {"fields": "name,price"}
+    bodies = [
+        client.get("/posts/", params=params).json()["items"][0],
+        client.get(f"/posts/{post['post_id']}", params=params).json(),
+        client.get("/posts/search/", params={"name": "robot", **params}).json()[0],
+        client.get(f"/posts/category/{category['category_id']}", params=params).json()["items"][0],
+    ]
+
+    for body in bodies:
+        assert body == {"name": "Robot", "price": 10}
+
+
+def test_fields_keep_the_schema_order_and_ignore_blanks(client, toys):
+    body = client.get("/posts/", params={"fields": " price, ,name,price "}).json()["items"][0]
+
+    assert list(body) == ["name", "price"]
+
+
+def test_no_fields_means_every_field(client, toys):
+    full = client.get("/posts/").json()["items"][0]
+
+    assert client.get("/posts/", params={"fields": ""}).json()["items"][0] == full
+    assert {"post_id", "content", "images", "created_at", "version"} <= set(full)
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/posts/", {}),
+    ("/posts/1", {}),
+    ("/posts/search/", {"name": "robot"}),
+    ("/posts/category/1", {}),
+])
+def test_unknown_fields_are_a_400(client, toys, path, params):
+    response = client.get(path, params={**params, "fields": "name,password"})
+
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
+    # The error lists what can be asked for
+    assert "post_id" in response.json()["detail"]
+
+
+def test_only_the_requested_columns_are_read(client, toys):
+    category, post = toys
+    # Nothing cached yet: every request reaches the database
+    statements = _post_selects(lambda: [
+        client.get("/posts/", params={"fields": "name", "sort": "price_asc"}),
+        client.get(f"/posts/{post['post_id']}", params={"fields": "name"}),
+        client.get("/posts/search/", params={"name": "robot", "fields": "name"}),
+        client.get(f"/posts/category/{category['category_id']}", params={"fields": "name"}),
+    ])
+
+    assert statements
+    for statement in statements:
+        columns = _selected_columns(statement)
+        assert "post.name" in columns
+        assert "post.content" not in columns
+        assert "post.images" not in columns
+
+
+def test_fields_combine_with_expand(client, toys):
+    category, post = toys
+    params = {"fields": "name", "expand": "category"}
+    bodies = [
+        client.get("/posts/", params=params).json()["items"][0],
+        client.get(f"/posts/{post['post_id']}", params=params).json(),
+        client.get("/posts/search/", params={"name": "robot", **params}).json()[0],
+    ]
+
+    for body in bodies:
+        assert body["name"] == "Robot"
+        assert body["category"]["name"] == "Toys"
+        assert set(body) == {"name", "category"}
+
+
+def test_category_fields(client, toys):
+    category, _ = toys
+
+    listed = client.get("/categories/", params={"fields": "name"})
+    single = client.get(f"/categories/{category['category_id']}", params={"fields": "category_id,name"})
+
+    assert listed.json() == [{"name": "Toys"}]
+    assert single.json() == {"name": "Toys", "category_id": category["category_id"]}
+    assert client.get("/categories/", params={"fields": "nope"}).status_code == 400
+    assert client.get(f"/categories/{category['category_id']}", params={"fields": "nope"}).status_code == 400
+
+
+def test_fields_are_part_of_the_cache_key(client, toys):
+    first = client.get("/posts/", params={"fields": "name"})
+    second = client.get("/posts/", params={"fields": "price"})
+
+    assert first.headers["ETag"] != second.headers["ETag"]
+    assert second.json()["items"][0] == {"price": 10}
@@ -0,0 +1,72 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+from app.services import post_service
+from bench.explain_post_queries import SCENARIOS, explain, seed, uses_index
+
+
+def _list(client, **params) -> list:
+    response = client.get("/posts/", params={"limit": 100, **params})
+    assert response.status_code == 200, response.text
+    return response.json()["items"]
+
+
+def test_sorts_break_ties_by_post_id(client, make_post):
+    for name, price in [("a", 20), ("b", 10), ("c", 20), ("d", 5)]:
+        make_post(name, price=price)
+
+    assert [p["name"] for p in _list(client, sort="price_asc")] == ["d", "b", "a", "c"]
+    assert [p["name"] for p in _list(client, sort="price_desc")] == ["c", "a", "b", "d"]
+    assert [p["name"] for p in _list(client, sort="created_at_desc")] == ["d", "c", "b", "a"]
+
+
+def test_filters_combine(client, make_post, make_category):
+    toys = make_category("Toys")["category_id"]
+    books = make_category("Books")["category_id"]
+    make_post("cheap toy", price=5, category_id=toys)
+    make_post("dear toy", price=50, category_id=toys)
+    make_post("dear book", price=50, category_id=books)
+
+    names = [p["name"] for p in _list(client, category_id=toys, min_price=10, max_price=100)]
+
+    assert names == ["dear toy"]
+
+
+def test_created_window(client, make_post):
+    before = datetime.now().isoformat()
+    make_post("inside")
+    after = datetime.now().isoformat()
+    make_post("outside")
+
+    names = [p["name"] for p in _list(client, created_after=before, created_before=after)]
+
+    assert names == ["inside"]
+
+
+def test_inverted_price_range_is_a_400(client):
+    response = client.get("/posts/", params={"min_price": 10, "max_price": 5})
+
+    assert response.status_code == 400
+
+
+def test_a_cursor_only_works_with_its_sort(client, make_post):
+    for i in range(3):
+        make_post(f"Post {i}")
+    cursor = client.get("/posts/", params={"limit": 1, "sort": "price_asc"}).json()["next_cursor"]
+
+    assert client.get("/posts/", params={"cursor": cursor, "sort": "price_desc"}).status_code == 400
+
+
+@pytest.mark.parametrize("label, filters", SCENARIOS, ids=[label for label, _ in SCENARIOS])
+def test_listings_use_an_index(tmp_path, label, filters):
+    engine = create_engine(f"sqlite:///{tmp_path}/plans.db")
+    SQLModel.metadata.create_all(engine)
+    seed(engine, 2000, 10)
+    captured = []
+    event.listen(engine, "before_cursor_execute", lambda *args: captured.append(args[2:4]))
+
+    with Session(engine) as session:
+        post_service.get_posts(session, limit=20, **filters)
+
+    assert uses_index(explain(engine, *captured[-1]))
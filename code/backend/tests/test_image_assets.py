@@ -0,0 +1,62 @@
+from sqlmodel import Session, select
+from app.database import engine
+from app.models.image_asset_model import ImageAsset
+from conftest import data_uri, png
+
+
+def _ref_counts() -> dict:
+    with Session(engine) as session:
+        return {asset.secure_url: asset.ref_count for asset in session.exec(select(ImageAsset)).all()}
+
+
+def test_same_bytes_are_uploaded_once(client, make_post, cloudinary_fake):
+    first = make_post("First", images=[data_uri(png("shared"))])
+    second = make_post("Second", images=[data_uri(png("shared"))])
+
+    assert len(cloudinary_fake.uploads) == 1
+    assert first["images"] == second["images"]
+    assert _ref_counts() == {first["images"][0]: 2}
+
+
+def test_same_file_upload_reuses_the_data_uri_asset(client, make_post, cloudinary_fake):
+    post = make_post("Data URI", images=[data_uri(png("shared"))])
+
+    response = client.post(
+        "/posts/",
+        data={"name": "File", "content": "Same bytes", "price": "1"},
+        files=[("images", ("same.png", png("shared"), "image/png"))],
+    )
+
+    assert response.status_code == 201
+    assert response.json()["images"] == post["images"]
+    assert len(cloudinary_fake.uploads) == 1
+
+
+def test_ref_counts_follow_edits_and_deletes(client, make_post):
+    post = make_post("Counted", images=[data_uri(png("a")), data_uri(png("b"))])
+    url_a, url_b = post["images"]
+
+    client.patch(f"/posts/{post['post_id']}", json={"images": [url_a]})
+    assert _ref_counts() == {url_a: 1, url_b: 0}
+
+    client.delete(f"/posts/{post['post_id']}")
+    assert _ref_counts() == {url_a: 0, url_b: 0}
+
+
+def test_same_source_url_is_uploaded_once(client, make_post, cloudinary_fake):
+    first = make_post("First", images=["https://example.com/lamp.png"])
+    second = make_post("Second", images=["https://example.com/lamp.png"])
+
+    assert len(cloudinary_fake.uploads) == 1
+    assert first["images"] == second["images"]
+
+
+def test_unreferenced_assets_are_reused(client, make_post, cloudinary_fake):
+    post = make_post("Gone", images=[data_uri(png("a"))])
+    client.delete(f"/posts/{post['post_id']}")
+
+    again = make_post("Back", images=[data_uri(png("a"))])
+
+    assert again["images"] == post["images"]
+    assert len(cloudinary_fake.uploads) == 1
+    assert _ref_counts() == {post["images"][0]: 1}
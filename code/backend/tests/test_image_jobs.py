@@ -0,0 +1,154 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+from app.database import engine
+from app.models.image_job_model import ImageJob
+from app.models.post_model import Post
+from app.services import image_jobs
+from conftest import png
+
+
+def _create_in_background(client, *images: bytes):
+    response = client.post(
+        "/posts/",
+        params={"background": "true"},
+        data={"name": "Background", "content": "Later", "price": "5"},
+        files=[("images", (f"{i}.png", image, "image/png")) for i, image in enumerate(images)],
+    )
+    assert response.status_code == 202, response.text
+    return response.json()
+
+
+def _staging_is_emptied() -> bool:
+    """Staged files go once the post is saved, just after the status changes"""
+    deadline = time.monotonic() + 5
+    while os.listdir(image_jobs.IMAGE_JOB_STAGING_DIR) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return not os.listdir(image_jobs.IMAGE_JOB_STAGING_DIR)
+
+
+def _wait_for_status(client, post_id: int) -> dict:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        status = client.get(f"/posts/{post_id}/status").json()
+        if status["status"] != "processing":
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"Post {post_id} still processing")
+
+
+def test_background_post_becomes_ready(client, cloudinary_fake):
+    post = _create_in_background(client, png("a"), png("b"))
+
+    assert post["status"] == "processing"
+    assert post["images"] == []
+
+    status = _wait_for_status(client, post["post_id"])
+
+    assert status["status"] == "ready"
+    assert len(status["images"]) == 2
+    assert client.get(f"/posts/{post['post_id']}").json()["images"] == status["images"]
+    assert _staging_is_emptied()
+
+
+def test_failed_uploads_are_retried(client, cloudinary_fake):
+    cloudinary_fake.fail = image_jobs.IMAGE_JOB_MAX_ATTEMPTS - 1
+    post = _create_in_background(client, png("a"))
+
+    status = _wait_for_status(client, post["post_id"])
+
+    assert status["status"] == "ready"
+    assert cloudinary_fake.fail == 0
+    assert len(cloudinary_fake.uploads) == 1
+
+
+def test_post_fails_after_the_last_attempt(client, cloudinary_fake):
+    cloudinary_fake.fail = image_jobs.IMAGE_JOB_MAX_ATTEMPTS
+    post = _create_in_background(client, png("a"))
+
+    status = _wait_for_status(client, post["post_id"])
+
+    assert status["status"] == "failed"
+    assert "Cloudinary is down" in status["error"]
+    assert _staging_is_emptied()
+
+
+def test_database_queue_fails_a_job_that_keeps_losing_its_worker(database, tmp_path):
+    staged = tmp_path / "staged"
+    staged.write_bytes(png("a"))
+    with Session(engine) as session:
+        post = Post(name="Stuck", content="c", price=1, images=[], status="processing")
+        session.add(post)
+        session.commit()
+        session.add(ImageJob(post_id=post.post_id, files=[{"path": str(staged)}]))
+        session.commit()
+        post_id = post.post_id
+
+    queue = image_jobs.DatabaseJobQueue()
+    for attempt in range(1, image_jobs.IMAGE_JOB_MAX_ATTEMPTS + 1):
+        job = queue._claim()
+        assert job.attempts == attempt
+        # The worker dies: nothing reports back and the lease runs out
+        queue._update(job.job_id, locked_until=datetime.now() - timedelta(seconds=1))
+
+    assert queue._claim() is None
+    with Session(engine) as session:
+        assert session.get(Post, post_id).status == "failed"
+        assert session.get(ImageJob, job.job_id).status == "failed"
+    assert not staged.exists()
+
+
+def test_staged_files_are_kept_when_saving_fails(database, tmp_path, monkeypatch):
+    staged = tmp_path / "staged"
+    staged.write_bytes(png("a"))
+    with Session(engine) as session:
+        post = Post(name="Pending", content="c", price=1, images=[], status="processing")
+        session.add(post)
+        session.commit()
+        post_id = post.post_id
+
+    def failing_save(session, post):
+        raise RuntimeError("database is gone")
+
+    monkeypatch.setattr(image_jobs.post_service, "_save_post", failing_save)
+    try:
+        image_jobs.finish_post(post_id, ["https://res.cloudinary.com/test/a.png"], [{"path": str(staged)}])
+    except RuntimeError:
+        pass
+
+    assert staged.exists()
+
+
+def test_workers_survive_queue_errors(database, monkeypatch):
+    claims = []
+    ran = []
+
+    class FlakyQueue:
+        async def get(self):
+            claims.append(time.monotonic())
+            if len(claims) <= 2:
+                raise OperationalError("UPDATE image_job ...", {}, Exception("database is locked"))
+            if len(claims) == 3:
+                return ImageJob(job_id=1, post_id=1, files=[])
+            await asyncio.Event().wait()
+
+    async def fake_run(job):
+        ran.append(job.job_id)
+
+    monkeypatch.setattr(image_jobs, "queue", FlakyQueue())
+    monkeypatch.setattr(image_jobs, "_run", fake_run)
+
+    async def run_worker():
+        worker = asyncio.create_task(image_jobs._worker())
+        while len(claims) < 4:
+            await asyncio.sleep(0.01)
+        worker.cancel()
+
+    asyncio.run(run_worker())
+
+    assert ran == [1]
+    # Backed off between the failed claims, longer the second time
+    assert claims[2] - claims[1] > claims[1] - claims[0] >= image_jobs.IMAGE_JOB_RETRY_DELAY
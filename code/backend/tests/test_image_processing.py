@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import io
+import pytest
+from app.services import image_processing
+from app.services.image_processing import OptimizeStats
+from app.services.ingest_service import IngestedUpload
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def _image(size) -> bytes:
+    image = PIL.effect_noise(size, 64).convert("RGB")
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
+
+
+def _upload(data: bytes, filename="photo.png", content_type="image/png") -> IngestedUpload:
+    return IngestedUpload(filename, content_type, len(data), io.BytesIO(data), hashlib.sha256(data).hexdigest())
+
+
+@pytest.fixture
+def optimizing(monkeypatch):
+    monkeypatch.setattr(image_processing, "IMAGE_OPTIMIZE", True)
+    monkeypatch.setattr(image_processing, "IMAGE_MAX_DIMENSION", 64)
+    monkeypatch.setattr(image_processing, "stats", OptimizeStats())
+    yield
+    image_processing.shutdown()
+
+
+def test_large_images_are_downscaled_and_reencoded(optimizing):
+    data = _image((256, 128))
+    original = _upload(data)
+
+    file = asyncio.run(image_processing.optimize(original))
+
+    assert (file.filename, file.content_type) == ("photo.webp", "image/webp")
+    assert file.size < len(data)
+    # Still deduplicated by the bytes the client sent
+    assert file.sha256 == original.sha256
+    with PIL.open(file.stream) as image:
+        assert (image.format, image.size) == ("WEBP", (64, 32))
+    assert image_processing.stats.as_dict()["images"] == 1
+
+
+def test_jpeg_output_drops_the_alpha_channel(optimizing, monkeypatch):
+    monkeypatch.setattr(image_processing, "IMAGE_OUTPUT_FORMAT", "jpeg")
+    image = PIL.effect_noise((128, 128), 64).convert("RGBA")
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+
+    file = asyncio.run(image_processing.optimize(_upload(out.getvalue())))
+
+    assert (file.filename, file.content_type) == ("photo.jpg", "image/jpeg")
+    with PIL.open(file.stream) as result:
+        assert (result.format, result.mode) == ("JPEG", "RGB")
+
+
+def test_images_that_would_grow_are_uploaded_unchanged(optimizing, monkeypatch):
+    monkeypatch.setattr(image_processing, "IMAGE_MAX_DIMENSION", 2048)
+    # A heavily compressed JPEG only gets bigger as webp
+    image = PIL.effect_noise((64, 64), 64).convert("RGB")
+    out = io.BytesIO()
+    image.save(out, format="JPEG", quality=5)
+    original = _upload(out.getvalue(), "photo.jpg", "image/jpeg")
+
+    assert asyncio.run(image_processing.optimize(original)) is original
+    assert image_processing.stats.as_dict()["skipped"] == 1
+
+
+def test_broken_images_are_uploaded_unchanged(optimizing):
+    original = _upload(b"\x89PNG\r\n\x1a\n" + b"\x00" * 64)
+
+    assert asyncio.run(image_processing.optimize(original)) is original
+    assert original.stream.tell() == 0
+
+
+def test_non_raster_and_disabled_are_left_alone(optimizing, monkeypatch):
+    svg = _upload(b"<svg xmlns='http://www.w3.org/2000/svg'/>", "logo.svg", "image/svg+xml")
+    assert asyncio.run(image_processing.optimize(svg)) is svg
+
+    monkeypatch.setattr(image_processing, "IMAGE_OPTIMIZE", False)
+    png = _upload(_image((256, 128)))
+    assert asyncio.run(image_processing.optimize(png)) is png
+
+
+def test_created_posts_upload_the_optimized_bytes(client, cloudinary_fake, optimizing, monkeypatch):
+    uploaded = []
+    upload = cloudinary_fake.upload
+
+    def recording_upload(file, **options):
+        uploaded.append(file.read())
+        file.seek(0)
+        return upload(file, **options)
+
+    monkeypatch.setattr("cloudinary.uploader.upload", recording_upload)
+    data = _image((256, 128))
+
+    response = client.post(
+        "/posts/",
+        data={"name": "Big", "content": "Photo", "price": "5"},
+        files=[("images", ("big.png", data, "image/png"))],
+    )
+
+    assert response.status_code == 201, response.text
+    assert uploaded[0][:4] == b"RIFF" and uploaded[0][8:12] == b"WEBP"
+    assert client.get("/diagnostics/images").json()["bytes_in"] == len(data)
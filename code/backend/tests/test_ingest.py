@@ -0,0 +1,79 @@
+import hashlib
+import io
+import pytest
+from app.services import ingest_service
+from app.services.ingest_service import CHUNK_SIZE, sniff_image_type
+from conftest import PNG
+
+
+class CountingStream(io.BytesIO):
+    """Counts the bytes read, to check validation stops early"""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+@pytest.mark.parametrize("head, media_type", [
+    (b"\xff\xd8\xff\xe0rest", "image/jpeg"),
+    (PNG, "image/png"),
+    (b"GIF89a...", "image/gif"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+    (b"BM\x00\x00", "image/bmp"),
+    (b"II*\x00rest", "image/tiff"),
+    (b'\xef\xbb\xbf<?xml version="1.0"?><svg xmlns="http://www.w3.org/2000/svg"/>', "image/svg+xml"),
+    (b"<html><body>not an image</body></html>", None),
+    (b"%PDF-1.7", None),
+])
+def test_image_type_comes_from_the_magic_bytes(head, media_type):
+    assert sniff_image_type(head) == media_type
+
+
+def test_scan_hashes_and_rewinds():
+    data = PNG + b"x" * (3 * CHUNK_SIZE)
+    stream = io.BytesIO(data)
+
+    media_type, size, sha256 = ingest_service._scan_stream(stream, "big.png", len(data))
+
+    assert (media_type, size, sha256) == ("image/png", len(data), hashlib.sha256(data).hexdigest())
+    assert stream.tell() == 0
+
+
+def test_scan_stops_reading_past_the_size_limit():
+    stream = CountingStream(PNG + b"x" * (10 * CHUNK_SIZE))
+
+    with pytest.raises(ValueError, match="demasiado grande"):
+        ingest_service._scan_stream(stream, "big.png", CHUNK_SIZE)
+
+    assert stream.bytes_read <= 2 * CHUNK_SIZE
+
+
+def test_scan_rejects_renamed_files_after_the_first_chunk():
+    stream = CountingStream(b"MZ" + b"\x00" * (5 * CHUNK_SIZE))
+
+    with pytest.raises(ValueError, match="no es una imagen"):
+        ingest_service._scan_stream(stream, "setup.png", 10 * CHUNK_SIZE)
+
+    assert stream.bytes_read == CHUNK_SIZE
+
+
+@pytest.mark.parametrize("content, error", [
+    (b"", "vacío"),
+    (b"just text", "no es una imagen"),
+    (PNG + b"x" * ingest_service.MAX_FILE_SIZE, "demasiado grande"),
+])
+def test_invalid_files_are_rejected_before_any_upload(client, cloudinary_fake, content, error):
+    response = client.post(
+        "/posts/",
+        data={"name": "Bad file", "content": "c", "price": "1"},
+        files=[("images", ("ok.png", PNG, "image/png")), ("images", ("bad.png", content, "image/png"))],
+    )
+
+    assert response.status_code == 400
+    assert error in response.json()["detail"]
+    assert cloudinary_fake.uploads == []
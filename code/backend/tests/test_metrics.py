@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from app.main import app
+from app.services import metrics, post_service
+from fastapi.testclient import TestClient
+
+
+def _requests_total(route: str, status: str) -> float:
+    labels = (("method", "GET"), ("route", route), ("status", status))
+    return metrics.requests_total.values.get(labels, 0)
+
+
+def test_unhandled_errors_are_counted_as_500(client, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(post_service, "get_posts", broken)
+    before = _requests_total("/posts/", "500")
+
+    # Not entered: the lifespan already runs in the client fixture
+    failing_client = TestClient(app, raise_server_exceptions=False)
+    assert failing_client.get("/posts/").status_code == 500
+
+    assert _requests_total("/posts/", "500") == before + 1
+    assert 'status="500"' in client.get("/metrics").text
+
+
+def _in_flight() -> float:
+    return metrics.requests_in_flight.values.get((), 0)
+
+
+def _http_scope(path: str) -> dict:
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [], "client": ("test", 1), "server": ("test", 80),
+    }
+
+
+def test_requests_are_measured_by_route(client, make_post):
+    post = make_post("Robot")
+    before = _requests_total("/posts/{post_id}", "200")
+
+    assert client.get(f"/posts/{post['post_id']}").status_code == 200
+    assert client.get("/posts/export").status_code == 200
+
+    assert _requests_total("/posts/{post_id}", "200") == before + 1
+    sizes = metrics.response_size.series[(("method", "GET"), ("route", "/posts/export"))]
+    # Streamed body measured to its last byte
+    assert sizes[-2] > 0
+    queries = metrics.request_queries.series[(("method", "GET"), ("route", "/posts/{post_id}"))]
+    assert queries[-2] > 0
+    assert _in_flight() == 0
+
+
+def test_in_flight_comes_down_when_the_client_is_gone(database):
+    before = _requests_total("/posts/export", "200")
+
+    async def disconnected_send(message):
+        # Gone before the first byte: the body is never iterated
+        raise OSError("Connection reset by peer")
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    with pytest.raises(Exception):
+        asyncio.run(app(_http_scope("/posts/export"), receive, disconnected_send))
+
+    assert _in_flight() == 0
+    assert _requests_total("/posts/export", "200") == before + 1
+
+
+def test_in_flight_comes_down_when_the_request_is_cancelled(database):
+    started = None
+
+    async def cancel_midway():
+        nonlocal started
+
+        async def send(message):
+            pass
+
+        async def receive():
+            await asyncio.sleep(10)
+            return {"type": "http.disconnect"}
+
+        task = asyncio.create_task(app(_http_scope("/health"), receive, send))
+        await asyncio.sleep(0)
+        started = _in_flight()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_midway())
+
+    assert started == 1
+    assert _in_flight() == 0
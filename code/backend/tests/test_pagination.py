@@ -0,0 +1,49 @@
+def _walk(client, direction_key="next_cursor", **params):
+    """Follow cursors until the last page; returns the post ids in page order"""
+    ids = []
+    cursor = None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/posts/", params=query).json()
+        ids += [post["post_id"] for post in page["items"]]
+        cursor = page[direction_key]
+        if cursor is None:
+            return ids, page
+
+
+def test_cursor_pages_cover_every_post_once(client, make_post):
+    created = [make_post(f"Post {i}")["post_id"] for i in range(7)]
+
+    ids, last = _walk(client, limit=3)
+
+    assert ids == created
+    assert last["next_cursor"] is None
+
+
+def test_prev_cursor_returns_the_previous_page(client, make_post):
+    for i in range(5):
+        make_post(f"Post {i}")
+
+    first = client.get("/posts/", params={"limit": 2}).json()
+    second = client.get("/posts/", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    back = client.get("/posts/", params={"limit": 2, "cursor": second["prev_cursor"]}).json()
+
+    assert first["prev_cursor"] is None
+    assert back["items"] == first["items"]
+
+
+def test_sort_and_filters_keep_paging_stable(client, make_post):
+    prices = [30, 10, 20, 10, 40]
+    for i, price in enumerate(prices):
+        make_post(f"Post {i}", price=price)
+
+    ids, _ = _walk(client, limit=2, sort="price_desc", min_price=15)
+    posts = {post["post_id"]: post for post in client.get("/posts/", params={"limit": 100}).json()["items"]}
+
+    assert [posts[i]["price"] for i in ids] == [40, 30, 20]
+
+
+def test_invalid_cursor_is_a_400(client):
+    response = client.get("/posts/", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
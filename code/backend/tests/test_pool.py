@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import exc, text
+from app import database
+from app.database import engine
+from conftest import DATABASE_FILE
+
+
+def test_sqlite_connections_use_wal_and_wait_on_locks(client):
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == database.SQLITE_BUSY_TIMEOUT_MS
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+
+
+def test_pool_diagnostics_count_checkouts(client, make_post):
+    pool = "primary_async" if database.DB_ASYNC else "primary"
+    before = client.get("/diagnostics/pool").json()[pool]["checkouts"]
+    make_post("Counted")
+
+    primary = client.get("/diagnostics/pool").json()[pool]
+
+    assert primary["checkouts"] > before
+    assert primary["pool_size"] == database.DB_POOL_SIZE
+    assert primary["checked_out"] == 0
+    assert primary["max_overflow"] == database.DB_MAX_OVERFLOW
+
+
+def test_checkout_timeouts_are_recorded(monkeypatch):
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(database, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(database, "DB_POOL_TIMEOUT", 0.05)
+    small = database._make_engine(f"sqlite:///{DATABASE_FILE}", "test_small_pool")
+    try:
+        with small.connect():
+            with pytest.raises(exc.TimeoutError):
+                small.connect()
+    finally:
+        small.dispose()
+
+    stats = database.pool_stats["test_small_pool"]
+    assert (stats.checkouts, stats.timeouts) == (1, 1)
+    assert stats.max_wait >= 0.05
@@ -0,0 +1,88 @@
+from sqlmodel import Session, select
+from app.database import engine
+from app.models.image_asset_model import ImageAsset
+from app.models.post_model import Post
+from app.services import post_service
+from conftest import data_uri, png
+
+
+def test_get_etag_round_trips_into_if_match(client, make_post):
+    post = make_post("Versioned")
+    etag = client.get(f"/posts/{post['post_id']}").headers["etag"]
+
+    response = client.patch(f"/posts/{post['post_id']}", json={"price": 5}, headers={"If-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["version"] == post["version"] + 1
+
+
+def test_stale_if_match_is_a_412(client, make_post):
+    post = make_post("Versioned")
+    etag = client.get(f"/posts/{post['post_id']}").headers["etag"]
+    client.patch(f"/posts/{post['post_id']}", json={"price": 5})
+
+    response = client.patch(f"/posts/{post['post_id']}", json={"price": 6}, headers={"If-Match": etag})
+
+    assert response.status_code == 412
+    assert client.get(f"/posts/{post['post_id']}").json()["price"] == 5
+
+
+def test_if_match_accepts_a_bare_version_or_star(client, make_post):
+    post = make_post("Versioned")
+
+    assert client.patch(f"/posts/{post['post_id']}", json={"price": 1}, headers={"If-Match": '"1"'}).status_code == 200
+    assert client.patch(f"/posts/{post['post_id']}", json={"price": 2}, headers={"If-Match": "*"}).status_code == 200
+    assert client.patch(f"/posts/{post['post_id']}", json={"price": 3}, headers={"If-Match": "abc"}).status_code == 400
+
+
+def test_patch_only_uploads_new_images(client, make_post, cloudinary_fake):
+    post = make_post("Images", images=[data_uri(png("a"))])
+    uploads = len(cloudinary_fake.uploads)
+
+    response = client.patch(
+        f"/posts/{post['post_id']}", json={"images": post["images"] + [data_uri(png("b"))]}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["images"][0] == post["images"][0]
+    assert len(cloudinary_fake.uploads) == uploads + 1
+
+
+def test_lost_version_race_removes_the_new_uploads(client, make_post, cloudinary_fake, monkeypatch):
+    post = make_post("Raced")
+    etag = client.get(f"/posts/{post['post_id']}").headers["etag"]
+    upload = post_service.upload_images_to_cloudinary
+
+    def upload_while_someone_saves(*args, **kwargs):
+        with Session(engine) as session:
+            other = session.get(Post, post["post_id"])
+            other.price = 99
+            post_service._save_post(session, other)
+        return upload(*args, **kwargs)
+
+    monkeypatch.setattr(post_service, "upload_images_to_cloudinary", upload_while_someone_saves)
+    response = client.patch(
+        f"/posts/{post['post_id']}", json={"images": [data_uri(png("new"))]}, headers={"If-Match": etag}
+    )
+
+    assert response.status_code == 412
+    assert cloudinary_fake.destroyed == cloudinary_fake.uploads
+    with Session(engine) as session:
+        assert session.exec(select(ImageAsset)).all() == []
+
+
+def test_edits_from_the_same_read_get_distinct_versions(client, make_post):
+    post = make_post("Versioned")
+
+    with Session(engine) as first, Session(engine) as second:
+        # Both loaded version 1 before either saved
+        a = first.get(Post, post["post_id"])
+        b = second.get(Post, post["post_id"])
+        a.price = 1
+        post_service._save_post(first, a)
+        b.price = 2
+        post_service._save_post(second, b)
+
+        assert (a.version, b.version) == (2, 3)
+
+    assert client.get(f"/posts/{post['post_id']}").json()["version"] == 3
@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel
+from app import database
+from app.database import ReadOnlySession, PRIMARY_STICKY_COOKIE
+from app.main import app
+from app.models.post_model import Post
+from app.services import search_service
+
+pytestmark = pytest.mark.skipif(database.DB_ASYNC, reason="swaps the sync replica engine")
+
+
+@pytest.fixture
+def replica(client, tmp_path, monkeypatch):
+    """A replica that hasn't caught up with anything yet"""
+    replica_engine = database._make_engine(f"sqlite:///{tmp_path}/replica.db", "test_replica")
+    SQLModel.metadata.create_all(replica_engine)
+    search_service.setup_search_index(replica_engine)
+    monkeypatch.setattr(database, "replica_engine", replica_engine)
+    yield replica_engine
+    replica_engine.dispose()
+
+
+def test_reads_go_to_the_replica(client, replica, make_post):
+    make_post("Only on the primary")
+    # Another client, without the read-your-writes cookie
+    reader = TestClient(app)
+
+    assert reader.get("/posts/").json()["items"] == []
+    assert reader.get("/posts/search/", params={"name": "primary"}).status_code == 404
+
+
+def test_writers_read_their_own_writes(client, replica, make_post):
+    post = make_post("Mine")
+
+    assert PRIMARY_STICKY_COOKIE in client.cookies
+    assert [p["name"] for p in client.get("/posts/").json()["items"]] == ["Mine"]
+    assert client.get(f"/posts/{post['post_id']}").status_code == 200
+
+
+def test_the_window_ends(client, replica, make_post):
+    make_post("Mine")
+    client.cookies.set(PRIMARY_STICKY_COOKIE, "1")
+
+    assert client.get("/posts/").json()["items"] == []
+
+
+def test_failed_writes_do_not_pin_reads(client, replica):
+    response = client.post("/posts/from-urls", json={"name": "Bad", "content": "c", "price": 1, "images": ["string"]})
+
+    assert response.status_code == 400
+    assert PRIMARY_STICKY_COOKIE not in client.cookies
+
+
+def test_read_only_sessions_refuse_writes(replica):
+    with ReadOnlySession(replica) as session:
+        session.add(Post(name="Nope", content="c", price=1, images=[]))
+        with pytest.raises(RuntimeError, match="Read-only"):
+            session.flush()
@@ -0,0 +1,94 @@
+from sqlmodel import Session
+from app.database import engine
+from app.services import response_cache, version_service
+from app.services.response_cache import CacheEntry, ResponseCache
+
+
+def test_etag_304_until_the_post_changes(client, make_post):
+    post = make_post("Cached")
+
+    first = client.get(f"/posts/{post['post_id']}")
+    etag = first.headers["etag"]
+    unchanged = client.get(f"/posts/{post['post_id']}", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    client.patch(f"/posts/{post['post_id']}", json={"price": 99})
+    changed = client.get(f"/posts/{post['post_id']}", headers={"If-None-Match": etag})
+
+    assert changed.status_code == 200
+    assert changed.json()["price"] == 99
+    assert changed.headers["etag"] != etag
+
+
+def test_list_etag_changes_on_writes(client, make_post):
+    make_post("One")
+    etag = client.get("/posts/").headers["etag"]
+
+    assert client.get("/posts/", headers={"If-None-Match": etag}).status_code == 304
+
+    make_post("Two")
+    response = client.get("/posts/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 2
+
+
+def test_second_read_is_a_cache_hit(client, make_post):
+    post = make_post("Hit")
+
+    assert client.get(f"/posts/{post['post_id']}").headers["x-cache"] == "MISS"
+    assert client.get(f"/posts/{post['post_id']}").headers["x-cache"] == "HIT"
+
+
+def test_query_string_order_does_not_split_the_cache(client, make_post):
+    make_post("One")
+
+    first = client.get("/posts/?limit=5&sort=price_asc")
+    second = client.get("/posts/?sort=price_asc&limit=5")
+
+    assert second.headers["x-cache"] == "HIT"
+    assert first.headers["etag"] == second.headers["etag"]
+
+
+def test_weak_and_listed_etags_match(client, make_post):
+    make_post("One")
+    etag = client.get("/posts/").headers["etag"]
+
+    assert client.get("/posts/", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get("/posts/", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_category_writes_invalidate_category_lists(client, make_category):
+    make_category("Toys")
+    etag = client.get("/categories/").headers["etag"]
+
+    make_category("Books")
+    response = client.get("/categories/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert [c["name"] for c in response.json()] == ["Toys", "Books"]
+
+
+def test_writes_by_other_workers_change_the_etag(client, make_post, monkeypatch):
+    make_post("One")
+    etag = client.get("/posts/").headers["etag"]
+    with Session(engine) as session:
+        version_service.bump(session, "post")
+        session.commit()
+    monkeypatch.setattr(response_cache, "VERSION_CHECK_INTERVAL", 0)
+
+    assert client.get("/posts/", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_lru_evicts_past_the_byte_budget():
+    cache = ResponseCache(max_bytes=10, ttl=60)
+    for key in "abc":
+        cache.put(key, CacheEntry(b"1234", key, ("post",), (1,), float("inf")))
+
+    assert cache.get("a", (1,)) is None
+    assert cache.get("c", (1,)) is not None
+    assert cache.get("c", (2,)) is None
+    assert cache.size == 4
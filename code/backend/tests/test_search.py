@@ -0,0 +1,64 @@
+from app.services import search_service
+
+
+def _search(client, term: str, **params):
+    response = client.get("/posts/search/", params={"name": term, **params})
+    if response.status_code == 404:
+        return []
+    assert response.status_code == 200, response.text
+    return [post["name"] for post in response.json()]
+
+
+def test_uses_the_sqlite_full_text_index(client):
+    assert search_service._backend == "fts5"
+
+
+def test_every_word_matches_as_a_prefix(client, make_post):
+    make_post("Red running shoes")
+    make_post("Red hat")
+    make_post("Blue shoes")
+
+    assert _search(client, "red sho") == ["Red running shoes"]
+    assert sorted(_search(client, "shoe")) == ["Blue shoes", "Red running shoes"]
+
+
+def test_name_matches_rank_above_content_matches(client, make_post):
+    make_post("Garden chair", content="A lamp goes well with it")
+    make_post("Desk lamp", content="Bright")
+
+    assert _search(client, "lamp") == ["Desk lamp", "Garden chair"]
+
+
+def test_accents_and_case_are_ignored(client, make_post):
+    make_post("Canción de cumpleaños")
+
+    assert _search(client, "CANCION") == ["Canción de cumpleaños"]
+
+
+def test_edits_and_deletes_update_the_index(client, make_post):
+    post = make_post("Old name", content="Plain")
+
+    client.patch(f"/posts/{post['post_id']}", json={"name": "New name"})
+    assert _search(client, "old") == []
+    assert _search(client, "new") == ["New name"]
+
+    client.delete(f"/posts/{post['post_id']}")
+    assert _search(client, "new") == []
+
+
+def test_query_syntax_is_not_interpreted(client, make_post):
+    make_post("Plain")
+
+    assert client.get("/posts/search/", params={"name": '"*) OR name:'}).status_code == 404
+    assert client.get("/posts/search/", params={"name": "--"}).status_code == 404
+
+
+def test_results_page_with_limit_and_offset(client, make_post):
+    for i in range(5):
+        make_post(f"Widget {i}")
+
+    first = _search(client, "widget", limit=2)
+    second = _search(client, "widget", limit=2, offset=2)
+
+    assert len(first) == len(second) == 2
+    assert not set(first) & set(second)
@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from app.services import single_flight
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_fetch():
+    flights = SingleFlight(ttl=0)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "post"
+
+    async def main():
+        return await asyncio.gather(*(flights.do((1, "primary"), fetch) for _ in range(20)))
+
+    results = asyncio.run(main())
+
+    assert calls == 1
+    assert [result for result, _ in results] == ["post"] * 20
+    assert sum(shared for _, shared in results) == 19
+
+
+def test_errors_are_shared_too():
+    flights = SingleFlight(ttl=0)
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise LookupError("Post not found")
+
+    async def main():
+        return await asyncio.gather(*(flights.do((1,), fetch) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, LookupError) for result in asyncio.run(main()))
+
+
+def test_invalidate_mid_flight_starts_a_new_fetch():
+    flights = SingleFlight(ttl=60)
+    versions = iter(["before write", "after write"])
+
+    async def main():
+        fetching = asyncio.Event()
+
+        async def fetch():
+            fetching.set()
+            await asyncio.sleep(0.01)
+            return next(versions)
+
+        first = asyncio.create_task(flights.do((1, "primary"), fetch))
+        await fetching.wait()
+        # A write to post 1 commits while the read is in flight
+        flights.invalidate(1)
+        second = await flights.do((1, "primary"), fetch)
+        return await first, second
+
+    (first, first_shared), (second, second_shared) = asyncio.run(main())
+
+    assert first == "before write"
+    assert second == "after write"
+    assert not second_shared
+    # Only the fresh result is kept for the micro-TTL
+    assert flights.stats()["cached"] == 1
+
+
+def test_micro_ttl_reuses_a_finished_result():
+    flights = SingleFlight(ttl=60)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    async def main():
+        first = await flights.do((1,), fetch)
+        second = await flights.do((1,), fetch)
+        flights.invalidate(1)
+        third = await flights.do((1,), fetch)
+        return first, second, third
+
+    assert asyncio.run(main()) == ((1, False), (1, True), (2, False))
+
+
+@pytest.mark.parametrize("group", [1, 2])
+def test_invalidate_only_touches_its_group(group):
+    flights = SingleFlight(ttl=60)
+
+    async def fetch():
+        return "cached"
+
+    async def main():
+        await flights.do((1,), fetch)
+        flights.invalidate(group)
+        return flights.stats()["cached"]
+
+    assert asyncio.run(main()) == (0 if group == 1 else 1)
+
+
+def test_post_reads_are_reused_until_the_post_is_written(client, make_post, monkeypatch):
+    monkeypatch.setattr(single_flight, "post_reads", SingleFlight(ttl=60))
+    post = make_post("Robot")
+    path = f"/posts/{post['post_id']}"
+
+    first = client.get(path)
+    second = client.get(path)
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "COALESCED"
+
+    assert client.patch(path, json={"name": "Robot 2"}).status_code == 200
+    third = client.get(path)
+
+    assert third.headers["X-Cache"] != "COALESCED"
+    assert third.json()["name"] == "Robot 2"
+    assert client.get("/diagnostics/coalescing").json()["shared"] >= 1
@@ -0,0 +1,161 @@
+import hashlib
+import io
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers import image_router
+from app.services import storage
+from conftest import PNG, png
+
+
+@pytest.mark.parametrize("url", [
+    "file:///etc/passwd",
+    "ftp://8.8.8.8/image.png",
+    "http://127.0.0.1/image.png",
+    "http://localhost:8000/admin",
+    "http://10.0.0.5/image.png",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/image.png",
+    "http://[::ffff:127.0.0.1]/image.png",
+])
+def test_internal_urls_are_not_fetched(url):
+    with pytest.raises(ValueError):
+        storage._check_fetch_url(url)
+
+
+def test_public_urls_are_allowed():
+    storage._check_fetch_url("https://8.8.8.8/image.png")
+
+
+class FakeResponse:
+    def __init__(self, status: int, location: str = None, body: bytes = b""):
+        self.status_code = status
+        self.headers = {"location": location} if location else {}
+        self.is_redirect = location is not None
+        self.body = body
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def test_redirects_to_internal_hosts_are_refused(monkeypatch):
+    fetched = []
+
+    def fake_get(url, **options):
+        fetched.append(url)
+        return FakeResponse(302, location="http://169.254.169.254/latest/meta-data/")
+
+    monkeypatch.setattr(storage._fetch_session, "get", fake_get)
+
+    with pytest.raises(ValueError):
+        storage._fetch("https://8.8.8.8/image.png")
+    assert fetched == ["https://8.8.8.8/image.png"]
+
+
+def test_a_rebinding_host_is_checked_again_on_connect(monkeypatch):
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(PNG)))
+            self.end_headers()
+            self.wfile.write(PNG)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    getaddrinfo = socket.getaddrinfo
+    lookups = []
+
+    def rebinding_dns(host, *args, **kwargs):
+        if host != "rebind.test":
+            return getaddrinfo(host, *args, **kwargs)
+        lookups.append(host)
+        # Public for the check, loopback for the connection
+        address = "93.184.216.34" if len(lookups) == 1 else "127.0.0.1"
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port))]
+
+    monkeypatch.setattr(socket, "getaddrinfo", rebinding_dns)
+    try:
+        with pytest.raises(ValueError, match="no es una dirección pública"):
+            storage._fetch(f"http://rebind.test:{port}/image.png")
+    finally:
+        server.shutdown()
+
+    assert len(lookups) == 2
+    assert requests_seen == []
+
+
+def test_storage_backends_must_implement_every_operation():
+    class Partial(storage.StorageBackend):
+        def upload(self, source, public_id, filename=None):
+            return {}
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    backend = storage.LocalStorage(tmp_path, "/api/v1/images")
+    monkeypatch.setattr(storage, "backend", backend)
+    return backend
+
+
+@pytest.fixture
+def images_client(local_storage):
+    # The app only mounts /images with IMAGE_STORAGE=local
+    app = FastAPI()
+    app.include_router(image_router.router)
+    return TestClient(app)
+
+
+def test_local_upload_reports_existing_objects(local_storage):
+    first = local_storage.upload(io.BytesIO(png("a")), "ignored")
+    second = local_storage.upload(io.BytesIO(png("a")), "ignored")
+
+    assert first["public_id"] == f"{hashlib.sha256(png('a')).hexdigest()}.png"
+    assert not first["existed"]
+    assert second["existed"]
+
+
+def test_svg_is_served_as_an_attachment(images_client, local_storage):
+    svg = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+    stored = local_storage.upload(io.BytesIO(svg), "ignored")
+
+    response = images_client.get(f"/images/{stored['public_id']}")
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment"
+    assert "sandbox" in response.headers["content-security-policy"]
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_images_are_revalidated_by_etag(images_client, local_storage):
+    stored = local_storage.upload(io.BytesIO(PNG), "ignored")
+    url = f"/images/{stored['public_id']}"
+
+    etag = images_client.get(url).headers["etag"]
+
+    assert images_client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert "content-disposition" not in images_client.get(url).headers
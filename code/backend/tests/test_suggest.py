@@ -0,0 +1,77 @@
+from sqlmodel import Session
+from app.database import engine
+from app.models.post_model import Post
+from app.services import suggest_index, version_service
+from app.services.suggest_index import PrefixIndex
+
+
+def _names(results) -> list:
+    return [result["name"] for result in results]
+
+
+def test_prefix_matches_the_start_of_any_word():
+    index = PrefixIndex()
+    index.build([(1, "Zapatos rojos"), (2, "Rojo intenso"), (3, "Camisa")])
+
+    assert _names(index.suggest("roj")) == ["Rojo intenso", "Zapatos rojos"]
+    assert _names(index.suggest("ZAPATOS  ro")) == ["Zapatos rojos"]
+    assert index.suggest("   ") == []
+
+
+def test_a_post_is_suggested_once_and_limit_applies():
+    index = PrefixIndex()
+    index.build([(1, "Red red red"), (2, "Red shoes"), (3, "Red hat")])
+
+    assert sorted(_names(index.suggest("red"))) == ["Red hat", "Red red red", "Red shoes"]
+    assert len(index.suggest("red", limit=2)) == 2
+
+
+def test_add_and_remove_keep_the_index_in_step():
+    index = PrefixIndex()
+    index.add(1, "Old lamp")
+    index.add(1, "New lamp")
+    index.add(2, "Lamp shade")
+
+    assert _names(index.suggest("old")) == []
+    assert sorted(_names(index.suggest("lamp"))) == ["Lamp shade", "New lamp"]
+
+    index.remove(2)
+    assert _names(index.suggest("lamp")) == ["New lamp"]
+    assert len(index) == 1
+
+
+def test_advance_only_follows_consecutive_versions():
+    index = PrefixIndex()
+    index.build([], version=3)
+
+    index.advance(4)
+    index.advance(6)
+
+    assert index.version == 4
+
+
+def test_suggest_endpoint_follows_writes(client, make_post):
+    post = make_post("Lamp")
+    assert _names(client.get("/posts/suggest", params={"q": "la"}).json()) == ["Lamp"]
+
+    client.patch(f"/posts/{post['post_id']}", json={"name": "Table"})
+    assert client.get("/posts/suggest", params={"q": "la"}).json() == []
+
+    client.delete(f"/posts/{post['post_id']}")
+    assert client.get("/posts/suggest", params={"q": "ta"}).json() == []
+
+
+def test_suggestions_see_posts_written_by_other_workers(client, make_post, monkeypatch):
+    make_post("Lamp")
+    assert _names(client.get("/posts/suggest", params={"q": "la"}).json()) == ["Lamp"]
+
+    # Another process: the row and the version bump, but not this process's index
+    with Session(engine) as session:
+        session.add(Post(name="Ladder", content="c", price=1, images=[]))
+        version_service.bump(session, suggest_index.TABLE)
+        session.commit()
+    monkeypatch.setattr(suggest_index, "SUGGEST_INDEX_CHECK_INTERVAL", 0)
+
+    names = _names(client.get("/posts/suggest", params={"q": "la"}).json())
+
+    assert sorted(names) == ["Ladder", "Lamp"]
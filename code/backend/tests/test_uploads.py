@@ -0,0 +1,75 @@
+import threading
+import time
+from sqlmodel import Session, select
+from app.database import engine
+from app.models.post_model import Post
+from app.services import post_service
+from conftest import png
+
+
+def _post_with_files(client, *images: bytes):
+    return client.post(
+        "/posts/",
+        data={"name": "Files", "content": "Uploaded", "price": "5"},
+        files=[("images", (f"{i}.png", image, "image/png")) for i, image in enumerate(images)],
+    )
+
+
+def test_uploads_run_in_parallel_and_keep_their_order(client, cloudinary_fake, monkeypatch):
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+    seeds = {}
+    upload = cloudinary_fake.upload
+
+    def slow_upload(file, **options):
+        nonlocal running, peak
+        seed = file.read()[-1:].decode()
+        file.seek(0)
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        # Later images finish first
+        time.sleep(0.02 * (5 - int(seed)))
+        with lock:
+            running -= 1
+        result = upload(file, **options)
+        seeds[result["secure_url"]] = seed
+        return result
+
+    monkeypatch.setattr("cloudinary.uploader.upload", slow_upload)
+
+    response = _post_with_files(client, *(png(str(i)) for i in range(5)))
+
+    assert response.status_code == 201, response.text
+    assert 1 < peak <= post_service.UPLOAD_CONCURRENCY_PER_REQUEST
+    assert [seeds[url] for url in response.json()["images"]] == ["0", "1", "2", "3", "4"]
+
+
+def test_a_failed_upload_removes_the_others(client, cloudinary_fake, monkeypatch):
+    upload = cloudinary_fake.upload
+
+    def second_fails(file, **options):
+        data = file.read()
+        file.seek(0)
+        if data.endswith(b"1"):
+            time.sleep(0.05)
+            raise RuntimeError("Cloudinary is down")
+        return upload(file, **options)
+
+    monkeypatch.setattr("cloudinary.uploader.upload", second_fails)
+
+    response = _post_with_files(client, png("0"), png("1"), png("2"))
+
+    assert response.status_code == 400
+    assert "1.png" in response.json()["detail"]
+    assert sorted(cloudinary_fake.destroyed) == sorted(cloudinary_fake.uploads)
+    with Session(engine) as session:
+        assert session.exec(select(Post)).all() == []
+
+
+def test_more_than_ten_files_are_rejected(client, cloudinary_fake):
+    response = _post_with_files(client, *(png(str(i)) for i in range(11)))
+
+    assert response.status_code == 400
+    assert cloudinary_fake.uploads == []